@@ -8,6 +8,7 @@ from aws_cdk import Stack, Tags, Duration, CfnOutput
 from constructs import Construct
 
 import infrastructure.constants as constants
+from infrastructure.database import UsersTableConstruct
 from infrastructure.lambdas import DemoLambdaConstruct
 from infrastructure.monitoring import MonitoringDashboard
 
@@ -28,10 +29,17 @@ class PythonDemoStack(Stack):
             "Observation",
         )
 
+        # Users table
+        users_table_construct = UsersTableConstruct(
+            self,
+            f"{construct_id}{constants.DELIMITER}users",
+        )
+
         # Create a simple lambda function
         demo_lambda_construct = DemoLambdaConstruct(
             self,
             f"{construct_id}{constants.DELIMITER}hello_lambda",
+            users_table_construct.table,
         )
 
         # Add lambda function metrics to the dashboard
@@ -16,3 +16,12 @@ LAYER_BUILD_FOLDER = ".build/layers/"
 # Lambda settings
 HANDLER_LAMBDA_TIMEOUT = 10
 HANDLER_LAMBDA_MEMORY_SIZE = 128
+
+# Users table settings
+# The deployed function serves the mock users of `service/logic/data.py`, which
+# the README examples use; "dynamodb" serves the users table, created empty
+USERS_REPOSITORY = "memory"
+USERS_TABLE_USER_INDEX = "user-index"
+USERS_TABLE_ROLE_INDEX = "role-index"
+USERS_TABLE_ACTIVE_INDEX = "active-index"
+USERS_TABLE_EMAIL_INDEX = "email-index"
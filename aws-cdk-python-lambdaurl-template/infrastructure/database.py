@@ -0,0 +1,77 @@
+"""
+Users table construct
+"""
+
+from aws_cdk import RemovalPolicy, aws_dynamodb as dynamodb
+from constructs import Construct
+
+import infrastructure.constants as constants
+
+
+class UsersTableConstruct(Construct):
+    def __init__(self, scope: Construct, construct_id: str) -> None:
+        super().__init__(scope, construct_id)
+        self.construct_id = construct_id
+        self.table = self._build_table()
+
+    def _build_table(self) -> dynamodb.Table:
+        """
+        Single table for users and their email locks
+        """
+        table = dynamodb.Table(
+            self,
+            "UsersTable",
+            table_name=self.construct_id,
+            partition_key=dynamodb.Attribute(
+                name="pk", type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+        # Every user in one partition, sorted by user_id for paginated listings
+        table.add_global_secondary_index(
+            index_name=constants.USERS_TABLE_USER_INDEX,
+            partition_key=dynamodb.Attribute(
+                name="entity", type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="user_id", type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=["etag"],
+        )
+        table.add_global_secondary_index(
+            index_name=constants.USERS_TABLE_ROLE_INDEX,
+            partition_key=dynamodb.Attribute(
+                name="role", type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="user_id", type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=["active_key", "etag"],
+        )
+        table.add_global_secondary_index(
+            index_name=constants.USERS_TABLE_ACTIVE_INDEX,
+            partition_key=dynamodb.Attribute(
+                name="active_key", type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="user_id", type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=["etag"],
+        )
+        # Every user in one partition, sorted by email for prefix searches
+        table.add_global_secondary_index(
+            index_name=constants.USERS_TABLE_EMAIL_INDEX,
+            partition_key=dynamodb.Attribute(
+                name="entity", type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="email", type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=["role", "active_key", "etag"],
+        )
+        return table
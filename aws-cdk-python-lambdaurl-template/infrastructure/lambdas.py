@@ -2,7 +2,12 @@
 Simple Lambda Construct
 """
 
-from aws_cdk import aws_lambda as _lambda, Duration, RemovalPolicy
+from aws_cdk import (
+    aws_dynamodb as dynamodb,
+    aws_lambda as _lambda,
+    Duration,
+    RemovalPolicy,
+)
 from aws_cdk.aws_lambda_python_alpha import PythonLayerVersion
 from aws_cdk.aws_logs import RetentionDays
 from constructs import Construct
@@ -11,10 +16,14 @@ import infrastructure.constants as constants
 
 
 class DemoLambdaConstruct(Construct):
-    def __init__(self, scope: Construct, construct_id: str) -> None:
+    def __init__(
+        self, scope: Construct, construct_id: str, users_table: dynamodb.Table
+    ) -> None:
         super().__init__(scope, construct_id)
         self.construct_id = construct_id
+        self.users_table = users_table
         self.lambda_function = self._build_lambda_function()
+        self.users_table.grant_read_write_data(self.lambda_function)
         self.lambda_function_url = self.lambda_function.add_function_url(
             auth_type=_lambda.FunctionUrlAuthType.NONE,
         )
@@ -36,6 +45,8 @@ class DemoLambdaConstruct(Construct):
                 "POWERTOOLS_SERVICE_NAME": "demo-service",  # for logger, tracer and metrics
                 "POWERTOOLS_TRACE_DISABLED": "true",  # for tracer
                 "AWS_LAMBDA_LOG_LEVEL": constants.LOG_LEVEL,  # for logger
+                "USERS_REPOSITORY": constants.USERS_REPOSITORY,
+                "USERS_TABLE_NAME": self.users_table.table_name,
             },
             tracing=_lambda.Tracing.DISABLED,
             retry_attempts=0,
@@ -0,0 +1,41 @@
+"""
+Data access layer
+"""
+
+import os
+from functools import lru_cache
+
+from service.dal.repository import (
+    EmailAlreadyExistsError,
+    RepositoryError,
+    UserNotFoundError,
+    UserRepository,
+)
+
+__all__ = [
+    "EmailAlreadyExistsError",
+    "RepositoryError",
+    "UserNotFoundError",
+    "UserRepository",
+    "get_user_repository",
+]
+
+
+@lru_cache(maxsize=1)
+def get_user_repository() -> UserRepository:
+    """
+    Return the repository selected by the `USERS_REPOSITORY` env variable
+    ("memory" or "dynamodb"), built once per warm container
+    """
+    backend = os.getenv("USERS_REPOSITORY", "memory")
+    if backend == "dynamodb":
+        # boto3 is only imported when the DynamoDB backend is used
+        from service.dal.dynamodb import DynamoDBUserRepository
+
+        return DynamoDBUserRepository(os.environ["USERS_TABLE_NAME"])
+    if backend == "memory":
+        from service.dal.memory import InMemoryUserRepository
+        from service.logic.store import get_user_store
+
+        return InMemoryUserRepository(get_user_store())
+    raise ValueError(f"Unknown users repository: {backend}")
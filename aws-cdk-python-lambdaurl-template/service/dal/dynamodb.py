@@ -0,0 +1,486 @@
+"""
+DynamoDB user repository
+
+Table layout (single table, partition key `pk`):
+    - user items:  pk=USER#<user_id>, user_id, email, role, active, active_key,
+                   entity=USER, etag
+    - email locks: pk=EMAIL#<email>, user_id
+
+Email locks are written with conditional puts in the same transaction as
+the user item, which keeps emails unique without a scan. Batch writes read
+all the email locks of the batch with BatchGetItem first, so most conflicts
+are found without a failed transaction.
+Listings query GSIs sorted by `user_id` that only project keys and `etag`
+(plus `active_key` on the role index), so a page is resumed with a key
+condition on `user_id`, and the users of the page are fetched with
+BatchGetItem. The ETag of a page is computed from the index alone, before
+the users are fetched, and the ETag of a user is stored on its item.
+The unfiltered listing uses the `entity` index, which puts every user in
+one partition; shard `entity` if the write rate ever needs it.
+Email prefix searches query the `email` index, sorted by email in the same
+partition, which also projects `role` and `active_key` to filter on them.
+"""
+
+from functools import lru_cache, partial
+from itertools import islice, takewhile
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+import boto3
+from botocore.exceptions import ClientError
+
+from service.dal.repository import (
+    EmailAlreadyExistsError,
+    RepositoryError,
+    UserNotFoundError,
+    UserEntry,
+    UserRepository,
+    UsersPage,
+)
+from service.logic.etag import collection_etag, user_etag
+from service.logic.pagination import DEFAULT_PAGE_SIZE
+from service.models.users import User, UserRole
+
+USER_INDEX = "user-index"
+ROLE_INDEX = "role-index"
+ACTIVE_INDEX = "active-index"
+EMAIL_INDEX = "email-index"
+
+_USER_PREFIX = "USER#"
+_USER_ENTITY = "USER"
+_EMAIL_PREFIX = "EMAIL#"
+_BATCH_GET_LIMIT = 100
+
+
+@lru_cache(maxsize=1)
+def get_dynamodb_client() -> Any:
+    """
+    Return a DynamoDB client, created once per warm container
+    """
+    return boto3.client("dynamodb")
+
+
+def _user_key(user_id: UUID) -> dict[str, Any]:
+    return {"pk": {"S": f"{_USER_PREFIX}{user_id}"}}
+
+
+def _email_key(email: str) -> dict[str, Any]:
+    return {"pk": {"S": f"{_EMAIL_PREFIX}{email}"}}
+
+
+def _active_key(active: bool) -> str:
+    return "true" if active else "false"
+
+
+def _to_item(user: User) -> dict[str, Any]:
+    return {
+        **_user_key(user.user_id),
+        "user_id": {"S": str(user.user_id)},
+        "email": {"S": user.email},
+        "role": {"S": user.role.value},
+        "active": {"BOOL": user.active},
+        "active_key": {"S": _active_key(user.active)},
+        "entity": {"S": _USER_ENTITY},
+        "etag": {"S": user_etag(user)},
+    }
+
+
+def _from_item(item: dict[str, Any]) -> User:
+    # Items are only written from validated users, so they are not validated again
+    return User.model_construct(
+        user_id=UUID(item["user_id"]["S"]),
+        email=item["email"]["S"],
+        role=UserRole(item["role"]["S"]),
+        active=item["active"]["BOOL"],
+    )
+
+
+class DynamoDBUserRepository(UserRepository):
+    """
+    Repository backed by a DynamoDB table
+    """
+
+    def __init__(self, table_name: str, client: Any = None) -> None:
+        self._table_name = table_name
+        self._client = client or get_dynamodb_client()
+
+    def get_user(self, user_id: UUID) -> Optional[User]:
+        response = self._client.get_item(
+            TableName=self._table_name, Key=_user_key(user_id)
+        )
+        item = response.get("Item")
+        return None if item is None else _from_item(item)
+
+    def get_user_entry(self, user_id: UUID) -> Optional[UserEntry]:
+        # The ETag is stored on the item, one read returns it with the user
+        response = self._client.get_item(
+            TableName=self._table_name, Key=_user_key(user_id)
+        )
+        item = response.get("Item")
+        if item is None:
+            return None
+        return UserEntry(item["etag"]["S"], partial(_from_item, item))
+
+    def get_users(self, user_ids: Iterable[UUID]) -> dict[UUID, User]:
+        users = self._batch_get([_user_key(user_id) for user_id in user_ids])
+        return {user.user_id: user for user in users}
+
+    def list_users(
+        self,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[UUID] = None,
+    ) -> Tuple[List[User], Optional[UUID]]:
+        items, last_user_id = self._list_index_items(role, active, limit, after)
+        return self._load_page(items), last_user_id
+
+    def list_users_page(
+        self,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[UUID] = None,
+    ) -> UsersPage[UUID]:
+        # The ETags are projected into the indexes, the users are only fetched
+        # with BatchGetItem when the page is loaded
+        items, last_user_id = self._list_index_items(role, active, limit, after)
+        etag = collection_etag(
+            (item["etag"]["S"] for item in items),
+            None if last_user_id is None else str(last_user_id),
+        )
+        return UsersPage(etag, last_user_id, partial(self._load_page, items))
+
+    def _list_index_items(
+        self,
+        role: Optional[UserRole],
+        active: Optional[bool],
+        limit: int,
+        after: Optional[UUID],
+    ) -> Tuple[List[dict[str, Any]], Optional[UUID]]:
+        """
+        Return the index items of a page and the user ID to resume after
+        """
+        names: dict[str, str] = {}
+        values: dict[str, Any] = {}
+        if role is not None:
+            index, partition = ROLE_INDEX, "#role = :role"
+            names["#role"] = "role"
+            values[":role"] = {"S": role.value}
+        elif active is not None:
+            index, partition = ACTIVE_INDEX, "active_key = :active"
+        else:
+            index, partition = USER_INDEX, "entity = :entity"
+            values[":entity"] = {"S": _USER_ENTITY}
+        if active is not None:
+            values[":active"] = {"S": _active_key(active)}
+
+        query: dict[str, Any] = {
+            "IndexName": index,
+            "KeyConditionExpression": partition,
+            "ExpressionAttributeValues": values,
+            # One extra key tells whether there is a next page
+            "Limit": limit + 1,
+        }
+        if after is not None:
+            query["KeyConditionExpression"] += " AND user_id > :after"
+            values[":after"] = {"S": str(after)}
+        if names:
+            query["ExpressionAttributeNames"] = names
+        if role is not None and active is not None:
+            query["FilterExpression"] = "active_key = :active"
+
+        items = list(islice(self._query(query), limit + 1))
+        if len(items) > limit:
+            return items[:limit], UUID(items[limit - 1]["user_id"]["S"])
+        return items, None
+
+    def search_users(
+        self,
+        email_prefix: str,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Tuple[List[User], Optional[str]]:
+        items, last_email = self._search_index_items(
+            email_prefix, role, active, limit, after
+        )
+        return self._load_page(items), last_email
+
+    def search_users_page(
+        self,
+        email_prefix: str,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> UsersPage[str]:
+        items, last_email = self._search_index_items(
+            email_prefix, role, active, limit, after
+        )
+        etag = collection_etag((item["etag"]["S"] for item in items), last_email)
+        return UsersPage(etag, last_email, partial(self._load_page, items))
+
+    def _search_index_items(
+        self,
+        email_prefix: str,
+        role: Optional[UserRole],
+        active: Optional[bool],
+        limit: int,
+        after: Optional[str],
+    ) -> Tuple[List[dict[str, Any]], Optional[str]]:
+        """
+        Return the index items of a search page and the email to resume after
+        """
+        values: dict[str, Any] = {":entity": {"S": _USER_ENTITY}}
+        if after is None or after < email_prefix:
+            condition = "entity = :entity AND begins_with(email, :prefix)"
+            values[":prefix"] = {"S": email_prefix}
+        else:
+            # begins_with can not be combined with a range, reading stops at
+            # the first email without the prefix instead
+            condition = "entity = :entity AND email > :after"
+            values[":after"] = {"S": after}
+        query: dict[str, Any] = {
+            "IndexName": EMAIL_INDEX,
+            "KeyConditionExpression": condition,
+            "ExpressionAttributeValues": values,
+            "Limit": limit + 1,
+        }
+
+        items: Iterable[dict[str, Any]] = takewhile(
+            lambda item: item["email"]["S"].startswith(email_prefix),
+            self._query(query),
+        )
+        # Filtered here rather than with a FilterExpression, which would hide
+        # the first email without the prefix
+        if role is not None:
+            items = (item for item in items if item["role"]["S"] == role.value)
+        if active is not None:
+            active_key = _active_key(active)
+            items = (item for item in items if item["active_key"]["S"] == active_key)
+
+        # One extra item tells whether there is a next page
+        page = list(islice(items, limit + 1))
+        if len(page) > limit:
+            return page[:limit], page[limit - 1]["email"]["S"]
+        return page, None
+
+    def create_user(self, user: User) -> None:
+        self._transact(
+            [
+                {
+                    "Put": {
+                        "TableName": self._table_name,
+                        "Item": _to_item(user),
+                        "ConditionExpression": "attribute_not_exists(pk)",
+                    }
+                },
+                self._put_email_lock(user),
+            ],
+            email=user.email,
+        )
+
+    def update_user(self, user: User) -> None:
+        current = self.get_user(user.user_id)
+        if current is None:
+            raise UserNotFoundError(str(user.user_id))
+        self._replace_user(current, user)
+
+    def create_users(self, users: List[User]) -> List[Optional[RepositoryError]]:
+        owners = self._email_owners(user.email for user in users)
+        errors: List[Optional[RepositoryError]] = []
+        for user in users:
+            if user.email in owners:
+                errors.append(EmailAlreadyExistsError(user.email))
+                continue
+            # The transaction still guards against concurrent writers
+            errors.append(self._apply(self.create_user, user))
+            if errors[-1] is None:
+                owners[user.email] = user.user_id
+        return errors
+
+    def update_users(self, users: List[User]) -> List[Optional[RepositoryError]]:
+        current_users = self.get_users(user.user_id for user in users)
+        owners = self._email_owners(user.email for user in users)
+        errors: List[Optional[RepositoryError]] = []
+        for user in users:
+            current = current_users.get(user.user_id)
+            if current is None:
+                errors.append(UserNotFoundError(str(user.user_id)))
+                continue
+            if owners.get(user.email, user.user_id) != user.user_id:
+                errors.append(EmailAlreadyExistsError(user.email))
+                continue
+            try:
+                self._replace_user(current, user)
+            except RepositoryError as error:
+                errors.append(error)
+                continue
+            if owners.get(current.email) == user.user_id:
+                del owners[current.email]
+            owners[user.email] = user.user_id
+            errors.append(None)
+        return errors
+
+    def _replace_user(self, current: User, user: User) -> None:
+        """
+        Replace the current version of a user, moving the email lock if needed
+        """
+        put_user = {
+            "TableName": self._table_name,
+            "Item": _to_item(user),
+            "ConditionExpression": "attribute_exists(pk)",
+        }
+        if current.email == user.email:
+            try:
+                self._client.put_item(**put_user)
+            except self._client.exceptions.ConditionalCheckFailedException as error:
+                raise UserNotFoundError(str(user.user_id)) from error
+            return
+
+        self._transact(
+            [
+                {"Put": put_user},
+                self._put_email_lock(user),
+                {
+                    "Delete": {
+                        "TableName": self._table_name,
+                        "Key": _email_key(current.email),
+                    }
+                },
+            ],
+            email=user.email,
+            user_id=user.user_id,
+        )
+
+    def delete_user(self, user_id: UUID) -> None:
+        current = self.get_user(user_id)
+        if current is None:
+            raise UserNotFoundError(str(user_id))
+        self._delete_user(current)
+
+    def delete_users(self, user_ids: List[UUID]) -> List[Optional[RepositoryError]]:
+        current_users = self.get_users(user_ids)
+        errors: List[Optional[RepositoryError]] = []
+        for user_id in user_ids:
+            current = current_users.pop(user_id, None)
+            if current is None:
+                errors.append(UserNotFoundError(str(user_id)))
+                continue
+            errors.append(self._apply(self._delete_user, current))
+        return errors
+
+    def _delete_user(self, current: User) -> None:
+        """
+        Delete the current version of a user and its email lock
+        """
+        self._transact(
+            [
+                {
+                    "Delete": {
+                        "TableName": self._table_name,
+                        "Key": _user_key(current.user_id),
+                        "ConditionExpression": "attribute_exists(pk)",
+                    }
+                },
+                {
+                    "Delete": {
+                        "TableName": self._table_name,
+                        "Key": _email_key(current.email),
+                    }
+                },
+            ],
+            user_id=current.user_id,
+        )
+
+    def _email_owners(self, emails: Iterable[str]) -> dict[str, UUID]:
+        """
+        Read the email locks of many emails at once
+
+        Returns:
+            The user ID of each email that is already in use
+        """
+        keys = [_email_key(email) for email in set(emails)]
+        return {
+            item["pk"]["S"][len(_EMAIL_PREFIX) :]: UUID(item["user_id"]["S"])
+            for item in self._batch_get_items(keys)
+        }
+
+    def _put_email_lock(self, user: User) -> dict[str, Any]:
+        return {
+            "Put": {
+                "TableName": self._table_name,
+                "Item": {
+                    **_email_key(user.email),
+                    "user_id": {"S": str(user.user_id)},
+                },
+                "ConditionExpression": "attribute_not_exists(pk)",
+            }
+        }
+
+    def _transact(
+        self,
+        items: List[dict[str, Any]],
+        email: Optional[str] = None,
+        user_id: Optional[UUID] = None,
+    ) -> None:
+        """
+        Run a write transaction and map failed conditions to repository errors
+        """
+        try:
+            self._client.transact_write_items(TransactItems=items)
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = error.response.get("CancellationReasons", [])
+            for item, reason in zip(items, reasons):
+                if reason.get("Code") != "ConditionalCheckFailed":
+                    continue
+                operation = next(iter(item.values()))
+                key = operation.get("Item", operation.get("Key"))["pk"]["S"]
+                if key.startswith(_EMAIL_PREFIX):
+                    raise EmailAlreadyExistsError(email) from error
+                if user_id is not None:
+                    raise UserNotFoundError(str(user_id)) from error
+            raise
+
+    def _query(self, query: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        """
+        Yield query results, fetching the next page only when it is needed
+        """
+        while True:
+            response = self._client.query(TableName=self._table_name, **query)
+            yield from response["Items"]
+            if "LastEvaluatedKey" not in response:
+                return
+            query = {**query, "ExclusiveStartKey": response["LastEvaluatedKey"]}
+
+    def _load_page(self, items: List[dict[str, Any]]) -> List[User]:
+        """
+        Fetch the users of the index items of a page, in the same order
+        """
+        return self._batch_get([{"pk": item["pk"]} for item in items])
+
+    def _batch_get(self, keys: List[dict[str, Any]]) -> List[User]:
+        """
+        Fetch users by key, keeping the order of the keys
+        """
+        found = {
+            item["pk"]["S"]: _from_item(item) for item in self._batch_get_items(keys)
+        }
+        return [found[key["pk"]["S"]] for key in keys if key["pk"]["S"] in found]
+
+    def _batch_get_items(self, keys: List[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """
+        Yield the existing items among the keys, in no particular order
+        """
+        for start in range(0, len(keys), _BATCH_GET_LIMIT):
+            request = {
+                self._table_name: {"Keys": keys[start : start + _BATCH_GET_LIMIT]}
+            }
+            while request:
+                response = self._client.batch_get_item(RequestItems=request)
+                yield from response["Responses"].get(self._table_name, [])
+                request = response.get("UnprocessedKeys")
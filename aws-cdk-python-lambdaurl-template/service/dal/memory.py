@@ -0,0 +1,182 @@
+"""
+In-memory user repository
+"""
+
+from functools import partial
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from service.dal.repository import (
+    EmailAlreadyExistsError,
+    RepositoryError,
+    UserNotFoundError,
+    UserEntry,
+    UserRepository,
+    UsersPage,
+)
+from service.logic.etag import collection_etag
+from service.logic.pagination import DEFAULT_PAGE_SIZE
+from service.logic.store import UserStore
+from service.models.users import User, UserRole
+
+PageKey = Tuple[Optional[UserRole], Optional[bool], int, Optional[UUID]]
+
+_PAGE_ETAGS_CACHE_SIZE = 1024
+
+
+class InMemoryUserRepository(UserRepository):
+    """
+    Repository backed by the indexed in-memory user store.
+
+    Changes live as long as the warm container does.
+    """
+
+    def __init__(self, store: UserStore) -> None:
+        self._store = store
+        # Page ETags and next keys per filter combination, valid for one
+        # store version
+        self._page_etags: dict[PageKey, Tuple[str, Optional[UUID]]] = {}
+        self._page_etags_version = store.version
+
+    def get_user(self, user_id: UUID) -> Optional[User]:
+        return self._store.get(user_id)
+
+    def get_users(self, user_ids: Iterable[UUID]) -> dict[UUID, User]:
+        users = (self._store.get(user_id) for user_id in user_ids)
+        return {user.user_id: user for user in users if user is not None}
+
+    def list_users(
+        self,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[UUID] = None,
+    ) -> Tuple[List[User], Optional[UUID]]:
+        # One extra user tells whether there is a next page
+        users = self._store.filter(
+            role=role, active=active, limit=limit + 1, after=after
+        )
+        if len(users) > limit:
+            return users[:limit], users[limit - 1].user_id
+        return users, None
+
+    def search_users(
+        self,
+        email_prefix: str,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Tuple[List[User], Optional[str]]:
+        users = self._store.search(
+            email_prefix, role=role, active=active, limit=limit + 1, after=after
+        )
+        if len(users) > limit:
+            return users[:limit], users[limit - 1].email
+        return users, None
+
+    def get_user_entry(self, user_id: UUID) -> Optional[UserEntry]:
+        etag = self._store.etag(user_id)
+        return (
+            None if etag is None else UserEntry(etag, partial(self.get_user, user_id))
+        )
+
+    def list_users_page(
+        self,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[UUID] = None,
+    ) -> UsersPage[UUID]:
+        if self._page_etags_version != self._store.version:
+            self._page_etags.clear()
+            self._page_etags_version = self._store.version
+        key = (role, active, limit, after)
+        cached = self._page_etags.get(key)
+        if cached is not None:
+            etag, last_user_id = cached
+            # Only read the page again if the client does not have it
+            return UsersPage(
+                etag,
+                last_user_id,
+                lambda: self.list_users(
+                    role=role, active=active, limit=limit, after=after
+                )[0],
+            )
+
+        users, last_user_id = self.list_users(
+            role=role, active=active, limit=limit, after=after
+        )
+        etag = collection_etag(
+            (self._store.etag(user.user_id) for user in users),
+            None if last_user_id is None else str(last_user_id),
+        )
+        if len(self._page_etags) >= _PAGE_ETAGS_CACHE_SIZE:
+            self._page_etags.clear()
+        self._page_etags[key] = (etag, last_user_id)
+        return UsersPage(etag, last_user_id, lambda: users)
+
+    def search_users_page(
+        self,
+        email_prefix: str,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> UsersPage[str]:
+        users, last_email = self.search_users(
+            email_prefix, role=role, active=active, limit=limit, after=after
+        )
+        etag = collection_etag(
+            (self._store.etag(user.user_id) for user in users), last_email
+        )
+        return UsersPage(etag, last_email, lambda: users)
+
+    def create_user(self, user: User) -> None:
+        if self._store.email_exists(user.email):
+            raise EmailAlreadyExistsError(user.email)
+        self._store.add(user)
+
+    def update_user(self, user: User) -> None:
+        if self._store.get(user.user_id) is None:
+            raise UserNotFoundError(str(user.user_id))
+        owner = self._store.get_by_email(user.email)
+        if owner is not None and owner.user_id != user.user_id:
+            raise EmailAlreadyExistsError(user.email)
+        self._store.replace(user)
+
+    def create_users(self, users: List[User]) -> List[Optional[RepositoryError]]:
+        owners = self._store.email_owners(user.email for user in users)
+        errors: List[Optional[RepositoryError]] = []
+        for user in users:
+            if user.email in owners:
+                errors.append(EmailAlreadyExistsError(user.email))
+                continue
+            self._store.add(user)
+            owners[user.email] = user.user_id
+            errors.append(None)
+        return errors
+
+    def update_users(self, users: List[User]) -> List[Optional[RepositoryError]]:
+        owners = self._store.email_owners(user.email for user in users)
+        errors: List[Optional[RepositoryError]] = []
+        for user in users:
+            current = self._store.get(user.user_id)
+            if current is None:
+                errors.append(UserNotFoundError(str(user.user_id)))
+                continue
+            if owners.get(user.email, user.user_id) != user.user_id:
+                errors.append(EmailAlreadyExistsError(user.email))
+                continue
+            self._store.replace(user)
+            # Keep the owners in sync for the next users of the batch
+            if owners.get(current.email) == user.user_id:
+                del owners[current.email]
+            owners[user.email] = user.user_id
+            errors.append(None)
+        return errors
+
+    def delete_user(self, user_id: UUID) -> None:
+        if self._store.get(user_id) is None:
+            raise UserNotFoundError(str(user_id))
+        self._store.remove(user_id)
@@ -0,0 +1,243 @@
+"""
+User repository interface
+"""
+
+from abc import ABC, abstractmethod
+from typing import (
+    Callable,
+    Generic,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from uuid import UUID
+
+from service.logic.etag import collection_etag, user_etag
+from service.logic.pagination import DEFAULT_PAGE_SIZE
+from service.models.users import User, UserRole
+
+Key = TypeVar("Key")
+Item = TypeVar("Item")
+
+
+class RepositoryError(Exception):
+    """
+    Base repository error
+    """
+
+
+class UserNotFoundError(RepositoryError):
+    """
+    The user does not exist
+    """
+
+
+class EmailAlreadyExistsError(RepositoryError):
+    """
+    The email is already used by another user
+    """
+
+
+class UserEntry(NamedTuple):
+    """
+    A user whose ETag is known before the user is loaded, so a request for an
+    unchanged user does not load it
+    """
+
+    etag: str
+    load: Callable[[], User]
+
+
+class UsersPage(NamedTuple, Generic[Key]):
+    """
+    A page of users whose ETag is known before its users are loaded, so a
+    request for an unchanged page does not load them
+    """
+
+    etag: str
+    # Key to resume after, None on the last page
+    next_key: Optional[Key]
+    load: Callable[[], List[User]]
+
+
+class UserRepository(ABC):
+    """
+    Storage backend for users
+    """
+
+    @abstractmethod
+    def get_user(self, user_id: UUID) -> Optional[User]:
+        """
+        Return the user with the given ID, if it exists
+        """
+
+    def get_users(self, user_ids: Iterable[UUID]) -> dict[UUID, User]:
+        """
+        Return the existing users among the given IDs, by ID.
+
+        Backends should override it when they can fetch users in bulk.
+        """
+        users = (self.get_user(user_id) for user_id in user_ids)
+        return {user.user_id: user for user in users if user is not None}
+
+    @abstractmethod
+    def list_users(
+        self,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[UUID] = None,
+    ) -> Tuple[List[User], Optional[UUID]]:
+        """
+        Return a page of users filtered by role and active status, ordered by
+        `user_id` and starting after the `after` user ID.
+
+        Returns:
+            The users of the page and the user ID to resume after, or None
+            if this is the last page
+        """
+
+    @abstractmethod
+    def search_users(
+        self,
+        email_prefix: str,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Tuple[List[User], Optional[str]]:
+        """
+        Return a page of users whose email starts with `email_prefix`, filtered
+        by role and active status, ordered by email and starting after the
+        `after` email.
+
+        Returns:
+            The users of the page and the email to resume after, or None
+            if this is the last page
+        """
+
+    def get_user_entry(self, user_id: UUID) -> Optional[UserEntry]:
+        """
+        Return the ETag of the user with the given ID, and how to load it, if
+        it exists.
+
+        Backends should override it when the ETag is cheaper to get than the user.
+        """
+        user = self.get_user(user_id)
+        return None if user is None else UserEntry(user_etag(user), lambda: user)
+
+    def list_users_page(
+        self,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[UUID] = None,
+    ) -> UsersPage[UUID]:
+        """
+        Return the page `list_users` returns for the same arguments, with its
+        ETag, the users are loaded by `UsersPage.load`.
+
+        Backends should override it when the ETag is cheaper to get than the page.
+        """
+        users, last_user_id = self.list_users(
+            role=role, active=active, limit=limit, after=after
+        )
+        etag = collection_etag(
+            (user_etag(user) for user in users),
+            None if last_user_id is None else str(last_user_id),
+        )
+        return UsersPage(etag, last_user_id, lambda: users)
+
+    def search_users_page(
+        self,
+        email_prefix: str,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> UsersPage[str]:
+        """
+        Return the page `search_users` returns for the same arguments, with its
+        ETag, the users are loaded by `UsersPage.load`.
+
+        Backends should override it when the ETag is cheaper to get than the page.
+        """
+        users, last_email = self.search_users(
+            email_prefix, role=role, active=active, limit=limit, after=after
+        )
+        etag = collection_etag((user_etag(user) for user in users), last_email)
+        return UsersPage(etag, last_email, lambda: users)
+
+    @abstractmethod
+    def create_user(self, user: User) -> None:
+        """
+        Store a new user.
+
+        Raises:
+            EmailAlreadyExistsError: If the email is already in use
+        """
+
+    @abstractmethod
+    def update_user(self, user: User) -> None:
+        """
+        Replace an existing user.
+
+        Raises:
+            UserNotFoundError: If the user does not exist
+            EmailAlreadyExistsError: If the new email is used by another user
+        """
+
+    def create_users(self, users: List[User]) -> List[Optional[RepositoryError]]:
+        """
+        Store new users one by one, a failed user does not stop the others.
+
+        Backends should override it to check the emails of the batch at once.
+
+        Returns:
+            The error of each user, in order, or None if the user was stored
+        """
+        return [self._apply(self.create_user, user) for user in users]
+
+    def update_users(self, users: List[User]) -> List[Optional[RepositoryError]]:
+        """
+        Replace existing users one by one, a failed user does not stop the others.
+
+        Backends should override it to check the emails of the batch at once.
+
+        Returns:
+            The error of each user, in order, or None if the user was replaced
+        """
+        return [self._apply(self.update_user, user) for user in users]
+
+    def delete_users(self, user_ids: List[UUID]) -> List[Optional[RepositoryError]]:
+        """
+        Delete users one by one, a failed user does not stop the others.
+
+        Backends should override it to read the users of the batch at once.
+
+        Returns:
+            The error of each user, in order, or None if the user was deleted
+        """
+        return [self._apply(self.delete_user, user_id) for user_id in user_ids]
+
+    @staticmethod
+    def _apply(
+        operation: Callable[[Item], None], item: Item
+    ) -> Optional[RepositoryError]:
+        try:
+            operation(item)
+        except RepositoryError as error:
+            return error
+        return None
+
+    @abstractmethod
+    def delete_user(self, user_id: UUID) -> None:
+        """
+        Delete a user.
+
+        Raises:
+            UserNotFoundError: If the user does not exist
+        """
@@ -0,0 +1,16 @@
+"""
+Write the Swagger UI artifacts of the demo lambda, run by `make build`:
+
+    python -m service.handlers.build_swagger .build/lambdas
+"""
+
+import sys
+from pathlib import Path
+
+from service.handlers.demo_lambda import API_DESCRIPTION, API_TITLE, app
+from service.handlers.swagger import write_swagger_artifacts
+
+if __name__ == "__main__":
+    write_swagger_artifacts(
+        app, Path(sys.argv[1]), title=API_TITLE, description=API_DESCRIPTION
+    )
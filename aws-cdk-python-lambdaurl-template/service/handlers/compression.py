@@ -0,0 +1,139 @@
+"""
+Negotiated response compression
+"""
+
+import gzip
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from aws_lambda_powertools.event_handler import LambdaFunctionUrlResolver
+from aws_lambda_powertools.event_handler.api_gateway import ResponseBuilder
+
+try:
+    import brotli
+except ImportError:  # optional, e.g. not in the Lambda layer
+    brotli = None
+
+# Smaller bodies fit in a few packets anyway, compressing them costs more
+# CPU than it saves on the wire
+MIN_SIZE = 1024
+# Levels for dynamic responses, the highest ones are several times slower for
+# a few percent of size
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+Encoder = Callable[[bytes], bytes]
+
+# Supported content codings, in order of preference when the client accepts
+# several of them equally
+ENCODERS: Dict[str, Encoder] = {
+    "gzip": partial(gzip.compress, compresslevel=GZIP_LEVEL, mtime=0),
+}
+if brotli is not None:
+    ENCODERS = {"br": partial(brotli.compress, quality=BROTLI_QUALITY), **ENCODERS}
+
+
+def _quality(params: List[str]) -> float:
+    for param in params:
+        key, _, value = param.partition("=")
+        if key.strip() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate_encoding(
+    accept_encoding: Optional[str], encodings: Sequence[str] = tuple(ENCODERS)
+) -> Optional[str]:
+    """
+    Return the encoding of `encodings` an `Accept-Encoding` header prefers,
+    or None if it accepts none of them
+
+    Codings are ranked by quality (`q`), then by their order in `encodings`.
+    """
+    qualities: Dict[str, float] = {}
+    for coding in (accept_encoding or "").split(","):
+        name, *params = coding.lower().split(";")
+        qualities.setdefault(name.strip(), _quality(params))
+    wildcard = qualities.get("*", 0.0)
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressingResponseBuilder(ResponseBuilder):
+    """
+    Compresses the responses of the routes with `compress=True`, with the
+    encoding negotiated from `Accept-Encoding` instead of always gzip
+    """
+
+    def __init__(self, *args: Any, min_size: int = MIN_SIZE, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+
+    def _route(self, event: Any, cors: Any) -> None:
+        compress = self.response.compress
+        if compress is None and self.route is not None:
+            compress = self.route.compress
+        # Takes precedence over the route, Powertools does not compress it again
+        self.response.compress = False
+        super()._route(event, cors)
+        if compress:
+            self._compress_negotiated(event)
+
+    def _compress_negotiated(self, event: Any) -> None:
+        headers = self.response.headers
+        # Caches must key the response on the encoding, whatever it is
+        headers["Vary"] = ", ".join(
+            filter(None, [headers.get("Vary"), "Accept-Encoding"])
+        )
+        encoding = negotiate_encoding(event.headers.get("accept-encoding"))
+        etag = headers.get("ETag")
+        if encoding is not None and etag is not None and not etag.startswith("W/"):
+            # A strong ETag identifies a single representation, the encoded
+            # bodies only share a weak one; also on 304 and small responses,
+            # so every response of the request carries the same ETag
+            headers["ETag"] = f"W/{etag}"
+        body = self.response.body
+        # Already encoded, e.g. precompressed artifacts
+        if self.response.base64_encoded or "Content-Encoding" in headers:
+            return
+        if isinstance(body, str):
+            body = body.encode()
+        if not body or len(body) < self.min_size or encoding is None:
+            return
+        headers["Content-Encoding"] = encoding
+        # Bytes bodies are base64 encoded by the builder, with isBase64Encoded
+        self.response.body = ENCODERS[encoding](body)
+
+
+def enable_compression(
+    app: LambdaFunctionUrlResolver, min_size: int = MIN_SIZE
+) -> None:
+    """
+    Compress the responses of the routes with `compress=True`.
+
+    The encoding is negotiated from `Accept-Encoding`: brotli when the
+    `brotli` package is installed, then gzip. Responses under `min_size`
+    bytes are returned as they are. Compressed bodies are base64 encoded with
+    `isBase64Encoded`, which function URLs decode before answering. The
+    strong ETags of the responses become weak (`W/`) for the requests that
+    accept an encoding.
+
+    It relies on private members of Powertools, the `_response_builder_class`
+    of the resolver and `ResponseBuilder._route`;
+    `tests/service/test_compression.py` checks they still exist.
+
+    Args:
+        app: Resolver whose responses to compress
+        min_size: Minimum size of the body to compress, in bytes
+    """
+    # Powertools builds every response with this class, its built-in
+    # compression only knows gzip and has no threshold
+    app._response_builder_class = partial(CompressingResponseBuilder, min_size=min_size)
@@ -2,67 +2,255 @@
 Simple lambda handler
 """
 
-from typing import List, Optional, Annotated
+import os
+from functools import lru_cache, partial
+from typing import Any, Callable, List, Optional, Annotated
 from uuid import UUID
 from http import HTTPStatus
 
 from aws_lambda_powertools import Logger, Tracer
-from aws_lambda_powertools.event_handler import LambdaFunctionUrlResolver, Response
+from aws_lambda_powertools.event_handler import (
+    LambdaFunctionUrlResolver,
+    Response,
+    content_types,
+)
 from aws_lambda_powertools.event_handler.exceptions import (
     BadRequestError,
     NotFoundError,
 )
 from aws_lambda_powertools.event_handler.openapi.params import Query, Path, Body
 from aws_lambda_powertools.logging import correlation_paths
+from aws_lambda_powertools.shared.functions import resolve_truthy_env_var_choice
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from pydantic import TypeAdapter
+
+from service.dal import (
+    EmailAlreadyExistsError,
+    RepositoryError,
+    UserNotFoundError,
+    get_user_repository,
+)
+from service.handlers.compression import enable_compression
+from service.handlers.projection import (
+    Fields,
+    parse_fields,
+    user_page_serializer,
+    user_serializer,
+)
+from service.handlers.serialization import trusted_response
+from service.handlers.swagger import enable_swagger_artifacts
+from service.logic.batch import MAX_BATCH_SIZE, validate_batch
+from service.logic.etag import etag_matches, projection_etag
+from service.logic.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    decode_email_cursor,
+    encode_cursor,
+    encode_email_cursor,
+)
+from service.models.users import (
+    User,
+    UserBatchItemResult,
+    UserBatchResult,
+    UserBatchUpdate,
+    UserPage,
+    UserRole,
+    UserUpdate,
+    UserCreate,
+)
 
-from service.logic.data import user_records
-from service.models.users import User, UserRole, UserUpdate, UserCreate
+API_TITLE = "Demo Lambda"
+API_DESCRIPTION = "Demo Lambda API"
 
-tracer = Tracer()
 logger: Logger = Logger()
 
 
 app = LambdaFunctionUrlResolver(enable_validation=True)
-app.enable_swagger(path="/swagger", title="Demo Lambda", description="Demo Lambda API")
+enable_compression(app)
+enable_swagger_artifacts(
+    app, path="/swagger", title=API_TITLE, description=API_DESCRIPTION
+)
+
+_create_batch_adapter = TypeAdapter(List[UserCreate])
+_update_batch_adapter = TypeAdapter(List[UserBatchUpdate])
+_delete_batch_adapter = TypeAdapter(List[UUID])
+
+
+def _is_not_modified(etag: str) -> bool:
+    """
+    Check the `If-None-Match` header of the current request against the ETag
+    """
+    return etag_matches(app.current_event.headers.get("if-none-match"), etag)
+
+
+def _not_modified(etag: str) -> Response[None]:
+    """
+    Empty 304 response, nothing is serialized
+    """
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+
+
+FieldsQuery = Annotated[
+    Optional[List[str]],
+    Query(
+        description="`User` fields to return, e.g. `user_id,email`. "
+        "All fields are returned by default"
+    ),
+]
+
+
+def _parse_fields(fields: Optional[List[str]]) -> Optional[Fields]:
+    if fields is None:
+        return None
+    try:
+        return parse_fields(fields)
+    except ValueError as error:
+        raise BadRequestError(str(error))
+
+
+def _item_failed(index: int, status: HTTPStatus, error: str) -> UserBatchItemResult:
+    return UserBatchItemResult.model_construct(
+        index=index, status=status, user=None, error=error
+    )
+
+
+def _batch_result(
+    size: int,
+    results: dict[int, UserBatchItemResult],
+    users: dict[int, User],
+    errors: List[Optional[RepositoryError]],
+    status: HTTPStatus,
+) -> UserBatchResult:
+    """
+    Merge the repository errors of the written users into the batch results
+    """
+    for (index, user), error in zip(users.items(), errors):
+        if isinstance(error, UserNotFoundError):
+            results[index] = _item_failed(
+                index, HTTPStatus.NOT_FOUND, f"User with ID {user.user_id} not found"
+            )
+        elif isinstance(error, EmailAlreadyExistsError):
+            results[index] = _item_failed(
+                index, HTTPStatus.BAD_REQUEST, "User with this email already exists"
+            )
+        else:
+            # Deleted users are not returned, as with a single delete
+            results[index] = UserBatchItemResult.model_construct(
+                index=index,
+                status=status,
+                user=None if status == HTTPStatus.NO_CONTENT else user,
+                error=None,
+            )
+    logger.info(
+        "Users batch processed",
+        extra={
+            "items": size,
+            "failed": sum(item.error is not None for item in results.values()),
+        },
+    )
+    return UserBatchResult.model_construct(
+        items=[results[index] for index in range(size)]
+    )
 
 
 @app.get(
     "/users",
+    compress=True,
     summary="Get all users",
-    description="API returns all users",
-    response_description="All users",
+    description="API returns users page by page, ordered by user ID, or by email "
+    "when searching by `email_prefix`",
+    response_description="A page of users",
     responses={
         HTTPStatus.OK: {
-            "description": "All users",
-            "content": {"application/json": {"model": List[User]}},
-        }
+            "description": "A page of users",
+            "content": {"application/json": {"model": UserPage}},
+        },
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "The page matches the `If-None-Match` ETag",
+            "content": {},
+        },
+        HTTPStatus.BAD_REQUEST: {
+            "description": "Invalid cursor or fields",
+            "content": {},
+        },
     },
     tags=["users"],
 )
+@trusted_response(UserPage)
 def get_users(
     is_active: Optional[bool] = None,
     role: Annotated[Optional[UserRole], Query()] = None,
-) -> List[User]:
+    email_prefix: Annotated[
+        Optional[str],
+        Query(
+            min_length=1,
+            max_length=254,
+            description="Only return users whose email starts with this prefix "
+            "(case-sensitive)",
+        ),
+    ] = None,
+    limit: Annotated[
+        int,
+        Query(ge=1, le=MAX_PAGE_SIZE, description="Maximum number of users to return"),
+    ] = DEFAULT_PAGE_SIZE,
+    cursor: Annotated[
+        Optional[str],
+        Query(
+            description="Opaque cursor returned as `next_cursor` by the previous page"
+        ),
+    ] = None,
+    fields: FieldsQuery = None,
+) -> Response[UserPage]:
     """
-    Get all users with optional filtering by active status and role.
+    Get a page of users with optional filtering by active status and role.
 
     Args:
         is_active (Optional[bool]): Filter by user active status
         role (Optional[UserRole]): Filter by user role
+        email_prefix (Optional[str]): Filter by the start of the user email
+        limit (int): Page size
+        cursor (Optional[str]): Cursor of the page to return
+        fields (Optional[List[str]]): User fields to return
+
+    Raises:
+        BadRequestError: If the cursor or the fields are invalid
 
     Returns:
-        List[User]: List of filtered users
+        UserPage: Users of the page and the cursor of the next page,
+            or an empty 304 response if the page has not changed
     """
-    filtered_users = [User(**user_data) for user_data in user_records]
-
-    if is_active is not None:
-        filtered_users = [user for user in filtered_users if user.active == is_active]
-
-    if role is not None:
-        filtered_users = [user for user in filtered_users if user.role == role]
-
-    return filtered_users
+    repository = get_user_repository()
+    # Searches by email prefix are ordered by email, their cursors hold an email
+    if email_prefix is None:
+        get_page = repository.list_users_page
+        decode, encode = decode_cursor, encode_cursor
+    else:
+        get_page = partial(repository.search_users_page, email_prefix)
+        decode, encode = decode_email_cursor, encode_email_cursor
+    try:
+        after = None if cursor is None else decode(cursor)
+    except ValueError:
+        raise BadRequestError("Invalid cursor")
+    projection = _parse_fields(fields)
+
+    page = get_page(role=role, active=is_active, limit=limit, after=after)
+    etag = page.etag
+    if projection is not None:
+        etag = projection_etag(etag, projection)
+    if _is_not_modified(etag):
+        return _not_modified(etag)
+
+    users = page.load()
+    next_cursor = None if page.next_key is None else encode(page.next_key)
+    return Response(
+        status_code=HTTPStatus.OK,
+        content_type=content_types.APPLICATION_JSON,
+        body=UserPage.model_construct(items=users, next_cursor=next_cursor)
+        if projection is None
+        else user_page_serializer(projection)(users, next_cursor),
+        headers={"ETag": etag},
+    )
 
 
 @app.get(
@@ -75,6 +263,14 @@ def get_users(
             "description": "User",
             "content": {"application/json": {"model": User}},
         },
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "The user matches the `If-None-Match` ETag",
+            "content": {},
+        },
+        HTTPStatus.BAD_REQUEST: {
+            "description": "Invalid fields",
+            "content": {},
+        },
         HTTPStatus.NOT_FOUND: {
             "description": "User not found",
             "content": {},
@@ -82,26 +278,44 @@ def get_users(
     },
     tags=["users"],
 )
-def get_user(user_id: Annotated[UUID, Path()]) -> User:
+@trusted_response(User)
+def get_user(
+    user_id: Annotated[UUID, Path()],
+    fields: FieldsQuery = None,
+) -> Response[User]:
     """
     Get a user by their ID.
 
     Args:
         user_id: UUID of the user to be retrieved
+        fields: User fields to return
 
     Raises:
+        BadRequestError: If the fields are invalid
         NotFoundError: If the user with the given UUID is not found
 
     Returns:
-        User: User object
+        User: User object, or an empty 304 response if the user has not changed
     """
-    existing_users = [User(**user_data) for user_data in user_records]
-    user = next((user for user in existing_users if user.user_id == user_id), None)
+    projection = _parse_fields(fields)
+    entry = get_user_repository().get_user_entry(user_id)
 
-    if user is None:
+    if entry is None:
         raise NotFoundError(f"User with ID {user_id} not found")
 
-    return user
+    etag = entry.etag
+    if projection is not None:
+        etag = projection_etag(etag, projection)
+    if _is_not_modified(etag):
+        return _not_modified(etag)
+
+    user = entry.load()
+    return Response(
+        status_code=HTTPStatus.OK,
+        content_type=content_types.APPLICATION_JSON,
+        body=user if projection is None else user_serializer(projection)(user),
+        headers={"ETag": etag},
+    )
 
 
 @app.post(
@@ -134,11 +348,11 @@ def create_user(new_user: Annotated[UserCreate, Body()]) -> Response[User]:
     Raises:
         BadRequestError: If a user with the same email already exists
     """
-
-    existing_users = [User(**user_data) for user_data in user_records]
-    if any(user.email == new_user.email for user in existing_users):
-        raise BadRequestError("User with this email already exists")
     user = User(**new_user.model_dump())
+    try:
+        get_user_repository().create_user(user)
+    except EmailAlreadyExistsError:
+        raise BadRequestError("User with this email already exists")
     logger.info("User created", extra={"user_id": user.user_id})
     return Response(
         status_code=HTTPStatus.CREATED,  # 200
@@ -146,6 +360,57 @@ def create_user(new_user: Annotated[UserCreate, Body()]) -> Response[User]:
     )
 
 
+@app.post(
+    "/users:batch",
+    summary="Create users in bulk",
+    description=f"API to create up to {MAX_BATCH_SIZE} users in one request",
+    response_description="The result of each item",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Per-item status: 201 for created users, "
+            "400 for emails in use, 422 for invalid items",
+            "content": {"application/json": {"model": UserBatchResult}},
+        },
+    },
+    tags=["users"],
+)
+@trusted_response(UserBatchResult)
+def create_users(
+    items: Annotated[
+        List[Any],
+        Body(
+            min_length=1,
+            max_length=MAX_BATCH_SIZE,
+            description="Users to create, in the `UserCreate` format",
+        ),
+    ],
+) -> UserBatchResult:
+    """
+    Create many users, a failed item does not fail the others.
+
+    Items are validated in one pass and their emails are checked against
+    the unique email index at once.
+
+    Args:
+        items: Users to be created
+
+    Returns:
+        UserBatchResult: Status of each item and the created users
+    """
+    new_users, invalid = validate_batch(_create_batch_adapter, items)
+    results = {
+        index: _item_failed(index, HTTPStatus.UNPROCESSABLE_ENTITY, error)
+        for index, error in invalid.items()
+    }
+    # The items are validated already, only the defaults are filled in
+    users = {
+        index: User.model_construct(**new_user.model_dump())
+        for index, new_user in new_users.items()
+    }
+    errors = get_user_repository().create_users(list(users.values()))
+    return _batch_result(len(items), results, users, errors, HTTPStatus.CREATED)
+
+
 @app.put(
     "/users/<user_id>",
     summary="Update a user",
@@ -156,6 +421,10 @@ def create_user(new_user: Annotated[UserCreate, Body()]) -> Response[User]:
             "description": "User updated successfully",
             "content": {"application/json": {"model": User}},
         },
+        HTTPStatus.BAD_REQUEST: {
+            "description": "Email already in use",
+            "content": {},
+        },
         HTTPStatus.NOT_FOUND: {
             "description": "User not found",
             "content": {},
@@ -163,6 +432,7 @@ def create_user(new_user: Annotated[UserCreate, Body()]) -> Response[User]:
     },
     tags=["users"],
 )
+@trusted_response(User)
 def update_user(
     user_id: Annotated[UUID, Path()], user_update: Annotated[UserUpdate, Body()]
 ) -> User:
@@ -175,14 +445,13 @@ def update_user(
 
     Raises:
         HTTPException: If the user with the given UUID is not found
+        BadRequestError: If another user already has the new email
 
     Returns:
         User: Updated user object
     """
-    existing_users = [User.model_validate(user_data) for user_data in user_records]
-    user_to_update = next(
-        (user for user in existing_users if user.user_id == user_id), None
-    )
+    repository = get_user_repository()
+    user_to_update = repository.get_user(user_id)
 
     if user_to_update is None:
         raise NotFoundError(f"User with ID {user_id} not found")
@@ -191,13 +460,86 @@ def update_user(
     update_data = user_update.model_dump(exclude_unset=True)
     updated_user = user_to_update.model_copy(update=update_data)
 
-    # In a real-world scenario, you would update the user in the database here
-    # For this example, we'll just log the update
+    try:
+        repository.update_user(updated_user)
+    except UserNotFoundError:
+        raise NotFoundError(f"User with ID {user_id} not found")
+    except EmailAlreadyExistsError:
+        raise BadRequestError("User with this email already exists")
     logger.info("User updated", extra={"user_id": user_id})
 
     return updated_user
 
 
+@app.patch(
+    "/users:batch",
+    summary="Update users in bulk",
+    description=f"API to update up to {MAX_BATCH_SIZE} users in one request",
+    response_description="The result of each item",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Per-item status: 200 for updated users, "
+            "400 for emails in use, 404 for unknown users, 422 for invalid items",
+            "content": {"application/json": {"model": UserBatchResult}},
+        },
+    },
+    tags=["users"],
+)
+@trusted_response(UserBatchResult)
+def update_users(
+    items: Annotated[
+        List[Any],
+        Body(
+            min_length=1,
+            max_length=MAX_BATCH_SIZE,
+            description="User updates in the `UserBatchUpdate` format",
+        ),
+    ],
+) -> UserBatchResult:
+    """
+    Update many users, a failed item does not fail the others.
+
+    Items are validated in one pass, the users are fetched at once and the
+    new emails are checked against the unique email index at once.
+
+    Args:
+        items: User IDs and the fields to update
+
+    Returns:
+        UserBatchResult: Status of each item and the updated users
+    """
+    updates, invalid = validate_batch(_update_batch_adapter, items)
+    results = {
+        index: _item_failed(index, HTTPStatus.UNPROCESSABLE_ENTITY, error)
+        for index, error in invalid.items()
+    }
+
+    user_ids = set()
+    for index, update in list(updates.items()):
+        if update.user_id in user_ids:
+            results[index] = _item_failed(
+                index, HTTPStatus.BAD_REQUEST, "User is updated twice in the batch"
+            )
+            del updates[index]
+        user_ids.add(update.user_id)
+
+    repository = get_user_repository()
+    current_users = repository.get_users(user_ids)
+    users: dict[int, User] = {}
+    for index, update in updates.items():
+        current = current_users.get(update.user_id)
+        if current is None:
+            results[index] = _item_failed(
+                index, HTTPStatus.NOT_FOUND, f"User with ID {update.user_id} not found"
+            )
+            continue
+        update_data = update.model_dump(exclude_unset=True, exclude={"user_id"})
+        users[index] = current.model_copy(update=update_data)
+
+    errors = repository.update_users(list(users.values()))
+    return _batch_result(len(items), results, users, errors, HTTPStatus.OK)
+
+
 @app.delete(
     "/users/<user_id>",
     summary="Delete a user",
@@ -229,24 +571,104 @@ def delete_user(user_id: Annotated[UUID, Path()]) -> Response[None]:
         None
     """
     logger.append_keys(user_id=user_id)
-    existing_users = [User(**user_data) for user_data in user_records]
-    user_to_delete = next(
-        (user for user in existing_users if user.user_id == user_id), None
-    )
-
-    if user_to_delete is None:
+    try:
+        get_user_repository().delete_user(user_id)
+    except UserNotFoundError:
         raise NotFoundError(f"User with ID {user_id} not found")
 
-    # In a real-world scenario, you would delete the user from the database here
-    # For this example, we'll just log the deletion
     logger.info("User deleted", extra={"user_id": user_id})
     return Response(status_code=HTTPStatus.NO_CONTENT)
 
 
+@app.delete(
+    "/users:batch",
+    summary="Delete users in bulk",
+    description=f"API to delete up to {MAX_BATCH_SIZE} users in one request",
+    response_description="The result of each item",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Per-item status: 204 for deleted users, "
+            "404 for unknown users, 422 for invalid IDs",
+            "content": {"application/json": {"model": UserBatchResult}},
+        },
+    },
+    tags=["users"],
+)
+@trusted_response(UserBatchResult)
+def delete_users(
+    items: Annotated[
+        List[Any],
+        Body(
+            min_length=1,
+            max_length=MAX_BATCH_SIZE,
+            description="IDs of the users to delete",
+        ),
+    ],
+) -> UserBatchResult:
+    """
+    Delete many users, a failed item does not fail the others.
+
+    IDs are validated in one pass and the users are fetched at once.
+
+    Args:
+        items: UUIDs of the users to be deleted
+
+    Returns:
+        UserBatchResult: Status of each item
+    """
+    user_ids, invalid = validate_batch(_delete_batch_adapter, items)
+    results = {
+        index: _item_failed(index, HTTPStatus.UNPROCESSABLE_ENTITY, error)
+        for index, error in invalid.items()
+    }
+
+    seen = set()
+    for index, user_id in list(user_ids.items()):
+        if user_id in seen:
+            results[index] = _item_failed(
+                index, HTTPStatus.BAD_REQUEST, "User is deleted twice in the batch"
+            )
+            del user_ids[index]
+        seen.add(user_id)
+
+    repository = get_user_repository()
+    current_users = repository.get_users(seen)
+    users: dict[int, User] = {}
+    for index, user_id in user_ids.items():
+        current = current_users.get(user_id)
+        if current is None:
+            results[index] = _item_failed(
+                index, HTTPStatus.NOT_FOUND, f"User with ID {user_id} not found"
+            )
+            continue
+        users[index] = current
+
+    errors = repository.delete_users([user.user_id for user in users.values()])
+    return _batch_result(len(items), results, users, errors, HTTPStatus.NO_CONTENT)
+
+
+def _resolve(event: dict, context: LambdaContext) -> dict:
+    return app.resolve(event, context)
+
+
+@lru_cache(maxsize=1)
+def _get_resolver() -> Callable[[dict, LambdaContext], dict]:
+    """
+    Return the resolver, traced unless tracing is disabled.
+
+    The tracer is created on the first invocation and only if tracing is
+    enabled, so the X-Ray SDK is not imported during the cold start.
+    """
+    if resolve_truthy_env_var_choice(
+        env=os.getenv("POWERTOOLS_TRACE_DISABLED", "false")
+    ):
+        return _resolve
+    return Tracer().capture_lambda_handler(_resolve)
+
+
 @logger.inject_lambda_context(correlation_id_path=correlation_paths.LAMBDA_FUNCTION_URL)
-@tracer.capture_lambda_handler
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """
     Simple lambda handler
     """
-    return app.resolve(event, context)
+    return _get_resolver()(event, context)
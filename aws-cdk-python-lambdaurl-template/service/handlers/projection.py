@@ -0,0 +1,79 @@
+"""
+Sparse field projection of users
+"""
+
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from service.models.users import User
+
+Fields = Tuple[str, ...]
+
+
+def parse_fields(fields: Iterable[str]) -> Fields:
+    """
+    Parse `User` field names, each value can also be a comma-separated list.
+
+    Returns:
+        The fields in model order, so every spelling of a projection shares
+        one serializer
+
+    Raises:
+        ValueError: If a field is not a `User` field, or no field is given
+    """
+    requested = {field.strip() for value in fields for field in value.split(",")} - {""}
+    unknown = requested - User.model_fields.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if not requested:
+        raise ValueError("No fields given")
+    return tuple(field for field in User.model_fields if field in requested)
+
+
+# The caches are bounded by the number of field combinations of `User`
+@lru_cache(maxsize=None)
+def _projection(fields: Fields) -> type:
+    return TypedDict(
+        "UserProjection",
+        {field: User.model_fields[field].annotation for field in fields},
+    )
+
+
+@lru_cache(maxsize=None)
+def user_serializer(fields: Fields) -> Callable[[User], str]:
+    """
+    Return the serializer of users projected on the given fields.
+
+    Users are serialized from their attributes with a TypedDict of the
+    projection, which only writes the projected fields. Only use it for
+    trusted users, nothing is validated.
+    """
+    adapter = TypeAdapter(_projection(fields))
+
+    def serialize(user: User) -> str:
+        return adapter.dump_json(user.__dict__).decode()
+
+    return serialize
+
+
+@lru_cache(maxsize=None)
+def user_page_serializer(fields: Fields) -> Callable[[List[User], Optional[str]], str]:
+    """
+    Return the serializer of user pages projected on the given fields,
+    see `user_serializer`
+    """
+    page = TypedDict(
+        "UserPageProjection",
+        {"items": List[_projection(fields)], "next_cursor": Optional[str]},
+    )
+    adapter = TypeAdapter(page)
+
+    def serialize(users: List[User], next_cursor: Optional[str]) -> str:
+        return adapter.dump_json(
+            {"items": [user.__dict__ for user in users], "next_cursor": next_cursor}
+        ).decode()
+
+    return serialize
@@ -0,0 +1,56 @@
+"""
+Fast response serialization for trusted data
+"""
+
+import inspect
+from functools import wraps
+from http import HTTPStatus
+from typing import Any, Callable
+
+from aws_lambda_powertools.event_handler import Response, content_types
+from pydantic import TypeAdapter
+
+
+def trusted_response(
+    response_type: Any, status_code: int = HTTPStatus.OK
+) -> Callable[[Callable[..., Any]], Callable[..., Response]]:
+    """
+    Mark a route as returning trusted data.
+
+    The route result is serialized once with a pre-built TypeAdapter and
+    returned as a ready JSON response, so the OpenAPI validation middleware
+    does not validate it a second time. Use it only for data that was already
+    validated when it entered the service (e.g. users from the store), and
+    document the response model in the route `responses`.
+
+    Args:
+        response_type: Type of the route result, e.g. `UserPage`
+        status_code: Status code of the response
+
+    Returns:
+        Route decorator
+    """
+    adapter = TypeAdapter(response_type)
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Response]:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Response:
+            result = func(*args, **kwargs)
+            if isinstance(result, Response):
+                # Routes can return a Response to set the status code or headers
+                if result.body is not None and not isinstance(result.body, str):
+                    result.body = adapter.dump_json(result.body).decode()
+                return result
+            return Response(
+                status_code=status_code,
+                content_type=content_types.APPLICATION_JSON,
+                body=adapter.dump_json(result).decode(),
+            )
+
+        # Without a return annotation the middleware skips response validation
+        wrapper.__signature__ = inspect.signature(func).replace(
+            return_annotation=inspect.Signature.empty
+        )
+        return wrapper
+
+    return decorator
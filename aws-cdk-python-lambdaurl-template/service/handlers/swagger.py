@@ -0,0 +1,160 @@
+"""
+Swagger UI served from build-time artifacts
+"""
+
+import base64
+import gzip
+from functools import lru_cache
+from http import HTTPStatus
+from pathlib import Path
+from typing import Callable, Optional
+
+from aws_lambda_powertools.event_handler import (
+    LambdaFunctionUrlResolver,
+    Response,
+    content_types,
+)
+
+from service.handlers.compression import negotiate_encoding
+
+# Root of the Lambda asset (`.build/lambdas`), where `make build` writes the artifacts
+ARTIFACTS_FOLDER = Path(__file__).resolve().parents[2]
+OPENAPI_ARTIFACT = "openapi.json.gz"
+SWAGGER_ARTIFACT = "swagger.html.gz"
+
+
+def render_openapi_json(
+    app: LambdaFunctionUrlResolver, title: str, description: str
+) -> str:
+    """
+    Build the OpenAPI document of the app
+    """
+    # Escape "</" so the document cannot close the <script> tag of the page
+    return app.get_openapi_json_schema(title=title, description=description).replace(
+        "</", "<\\/"
+    )
+
+
+def render_swagger_html(openapi_json: str) -> str:
+    """
+    Build the Swagger UI page with the OpenAPI document and assets inlined
+    """
+    from aws_lambda_powertools.event_handler.openapi import swagger_ui
+    from aws_lambda_powertools.event_handler.openapi.swagger_ui import (
+        generate_swagger_html,
+    )
+
+    assets = Path(swagger_ui.__file__).parent
+    return generate_swagger_html(
+        openapi_json,
+        (assets / "swagger-ui-bundle.min.js").read_text(),
+        (assets / "swagger-ui.min.css").read_text(),
+        swagger_base_url="",
+        oauth2_config=None,
+    )
+
+
+def _compress(document: str) -> bytes:
+    # A fixed mtime keeps the artifacts, and so the asset hash, reproducible
+    return gzip.compress(document.encode(), compresslevel=9, mtime=0)
+
+
+def write_swagger_artifacts(
+    app: LambdaFunctionUrlResolver, folder: Path, title: str, description: str
+) -> None:
+    """
+    Write the gzip-compressed OpenAPI document and Swagger UI page of the app
+
+    Args:
+        app: Resolver to document
+        folder: Folder to write the artifacts to, the root of the Lambda asset
+        title: Title of the API
+        description: Description of the API
+    """
+    openapi_json = render_openapi_json(app, title, description)
+    (folder / OPENAPI_ARTIFACT).write_bytes(_compress(openapi_json))
+    (folder / SWAGGER_ARTIFACT).write_bytes(
+        _compress(render_swagger_html(openapi_json))
+    )
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Check whether an `Accept-Encoding` header allows a gzip response
+    """
+    return negotiate_encoding(accept_encoding, ("gzip",)) == "gzip"
+
+
+def enable_swagger_artifacts(
+    app: LambdaFunctionUrlResolver,
+    path: str,
+    title: str,
+    description: str,
+    artifacts_folder: Path = ARTIFACTS_FOLDER,
+) -> None:
+    """
+    Serve the Swagger UI like `app.enable_swagger`, without generating it at runtime.
+
+    The OpenAPI document and the Swagger UI page are read from the artifacts
+    written by `write_swagger_artifacts` during the build, and returned as they
+    are (gzip) to clients that accept it. Without artifacts, e.g. in local
+    tests, they are built on the first request instead. Either way nothing is
+    done until the first request to `path`, and the result is kept for the
+    warm container. `?format=json` returns the OpenAPI document.
+
+    Args:
+        app: Resolver to document
+        path: Path of the Swagger UI
+        title: Title of the API
+        description: Description of the API
+        artifacts_folder: Folder with the build artifacts
+    """
+
+    @lru_cache(maxsize=1)
+    def openapi_json() -> bytes:
+        artifact = artifacts_folder / OPENAPI_ARTIFACT
+        if artifact.exists():
+            return artifact.read_bytes()
+        return _compress(render_openapi_json(app, title, description))
+
+    @lru_cache(maxsize=1)
+    def swagger_html() -> bytes:
+        artifact = artifacts_folder / SWAGGER_ARTIFACT
+        if artifact.exists():
+            return artifact.read_bytes()
+        return _compress(render_swagger_html(gzip.decompress(openapi_json()).decode()))
+
+    @lru_cache(maxsize=2)
+    def decompressed(document: Callable[[], bytes]) -> str:
+        return gzip.decompress(document()).decode()
+
+    @lru_cache(maxsize=2)
+    def base64_encoded(document: Callable[[], bytes]) -> str:
+        return base64.b64encode(document()).decode()
+
+    @app.get(path, include_in_schema=False)
+    def swagger_handler() -> Response[str]:
+        query_params = app.current_event.query_string_parameters or {}
+        if query_params.get("format") == "json":
+            document, content_type = openapi_json, content_types.APPLICATION_JSON
+        else:
+            document, content_type = swagger_html, content_types.TEXT_HTML
+
+        headers = {"Vary": "Accept-Encoding"}
+        if accepts_gzip(app.current_event.headers.get("accept-encoding")):
+            # Encoded once per container, bytes bodies would be encoded on every
+            # request (and rejected for JSON responses)
+            response = Response(
+                status_code=HTTPStatus.OK,
+                content_type=content_type,
+                body=base64_encoded(document),
+                headers={**headers, "Content-Encoding": "gzip"},
+            )
+            response.base64_encoded = True
+            return response
+        return Response(
+            status_code=HTTPStatus.OK,
+            content_type=content_type,
+            body=decompressed(document),
+            headers=headers,
+        )
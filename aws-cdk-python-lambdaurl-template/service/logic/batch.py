@@ -0,0 +1,45 @@
+"""
+Batch request helpers
+"""
+
+from typing import Any, List, Tuple, TypeVar
+
+from pydantic import TypeAdapter, ValidationError
+
+MAX_BATCH_SIZE = 100
+
+T = TypeVar("T")
+
+
+def _error_message(error: dict[str, Any]) -> str:
+    field = ".".join(str(part) for part in error["loc"][1:])
+    return f"{field}: {error['msg']}" if field else error["msg"]
+
+
+def validate_batch(
+    adapter: TypeAdapter[List[T]], items: List[Any]
+) -> Tuple[dict[int, T], dict[int, str]]:
+    """
+    Validate the items of a batch request with a list TypeAdapter.
+
+    The whole batch is validated in one pass. Only when some items are invalid,
+    the remaining items are validated once more without them, so one bad item
+    does not fail the whole batch.
+
+    Args:
+        adapter: Adapter of the list of item models, e.g. `TypeAdapter(List[UserCreate])`
+        items: Raw items of the request
+
+    Returns:
+        Valid items and validation errors, both by position in the request
+    """
+    try:
+        return dict(enumerate(adapter.validate_python(items))), {}
+    except ValidationError as error:
+        errors: dict[int, str] = {}
+        for detail in error.errors(include_url=False):
+            errors.setdefault(detail["loc"][0], _error_message(detail))
+
+    positions = [position for position in range(len(items)) if position not in errors]
+    valid = adapter.validate_python([items[position] for position in positions])
+    return dict(zip(positions, valid)), errors
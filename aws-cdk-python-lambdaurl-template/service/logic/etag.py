@@ -0,0 +1,56 @@
+"""
+Entity tags for conditional GET requests
+"""
+
+import hashlib
+from typing import Iterable, Optional, Sequence
+
+from pydantic import TypeAdapter
+
+from service.models.users import User
+
+_user_adapter = TypeAdapter(User)
+
+
+def _digest(content: bytes) -> str:
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def user_etag(user: User) -> str:
+    """
+    Strong ETag computed from the serialized user
+    """
+    return _digest(_user_adapter.dump_json(user))
+
+
+def collection_etag(etags: Iterable[str], next_key: Optional[str] = None) -> str:
+    """
+    Strong ETag of a collection page, combined from the ETags of its records
+    and the key the next page starts after
+    """
+    content = ",".join(etags)
+    if next_key is not None:
+        content = f"{content};{next_key}"
+    return _digest(content.encode())
+
+
+def projection_etag(etag: str, fields: Sequence[str]) -> str:
+    """
+    Strong ETag of a projection of a resource, which is a different
+    representation of it
+    """
+    return _digest(f"{etag};{','.join(fields)}".encode())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an `If-None-Match` header against the current ETag
+    """
+    if if_none_match is None:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == etag
+        for candidate in candidates
+    )
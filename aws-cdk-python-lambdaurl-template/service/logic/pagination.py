@@ -0,0 +1,51 @@
+"""
+Keyset pagination helpers
+"""
+
+import base64
+import binascii
+from uuid import UUID
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(user_id: UUID) -> str:
+    """
+    Encode the last user ID of a page into an opaque cursor
+    """
+    return base64.urlsafe_b64encode(user_id.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> UUID:
+    """
+    Decode a cursor produced by `encode_cursor`
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return UUID(bytes=raw)
+    except (binascii.Error, ValueError) as error:
+        raise ValueError(f"Invalid cursor: {cursor}") from error
+
+
+def encode_email_cursor(email: str) -> str:
+    """
+    Encode the last email of a page ordered by email into an opaque cursor
+    """
+    return base64.urlsafe_b64encode(email.encode()).rstrip(b"=").decode()
+
+
+def decode_email_cursor(cursor: str) -> str:
+    """
+    Decode a cursor produced by `encode_email_cursor`
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, ValueError) as error:
+        raise ValueError(f"Invalid cursor: {cursor}") from error
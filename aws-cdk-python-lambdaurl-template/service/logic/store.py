@@ -0,0 +1,396 @@
+"""
+Columnar in-memory user store
+"""
+
+import sys
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, FrozenSet, Iterable, List, Optional, Tuple, Union
+from uuid import UUID
+
+from pydantic import TypeAdapter
+
+from service.logic.data import user_records
+from service.logic.etag import user_etag
+from service.models.users import User, UserRole
+
+_users_adapter = TypeAdapter(List[User])
+
+_ID_SIZE = 16
+_ROLES: Tuple[UserRole, ...] = tuple(UserRole)
+_ROLE_CODES = {role: position for position, role in enumerate(_ROLES)}
+_ALL_CODES = frozenset(range(len(_ROLES) * 2))
+
+
+def _code(role: UserRole, active: bool) -> int:
+    return _ROLE_CODES[role] << 1 | active
+
+
+def _matching_codes(role: Optional[UserRole], active: Optional[bool]) -> FrozenSet[int]:
+    return frozenset(
+        code
+        for code in _ALL_CODES
+        if (role is None or _ROLES[code >> 1] == role)
+        and (active is None or bool(code & 1) == active)
+    )
+
+
+@lru_cache(maxsize=None)
+def _mask_table(codes: FrozenSet[int]) -> bytes:
+    # Translates a code column into a mask with a 1 in every matching row
+    return bytes(code in codes for code in range(256))
+
+
+def _find(
+    column: bytearray, needle: int, start: int, end: int, limit: int
+) -> List[int]:
+    """
+    Return the positions of up to `limit` `needle` bytes in `column[start:end]`
+    """
+    positions: List[int] = []
+    position = column.find(needle, start, end)
+    while position != -1 and len(positions) < limit:
+        positions.append(position)
+        position = column.find(needle, position + 1, end)
+    return positions
+
+
+def _prefix_end(prefix: str) -> Optional[str]:
+    """
+    Return the smallest string greater than every string starting with
+    `prefix`, or None if there is none
+    """
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+def _row_values(user: User) -> Tuple[bytes, str, int]:
+    """
+    Return the packed user ID, email and code of a user, checked before the
+    store changes so an invalid user can not leave it half updated
+    """
+    if not isinstance(user.email, str):
+        raise ValueError(f"Invalid email {user.email!r}")
+    if user.role not in _ROLE_CODES or not isinstance(user.active, bool):
+        raise ValueError(f"Invalid role or active status of user {user.user_id}")
+    return user.user_id.bytes, user.email, _code(user.role, user.active)
+
+
+def _make_user(user_id: bytes, email: str, code: int) -> User:
+    # Rows only hold validated users, so they are not validated again
+    return User.model_construct(
+        user_id=UUID(bytes=bytes(user_id)),
+        email=email,
+        role=_ROLES[code >> 1],
+        active=bool(code & 1),
+    )
+
+
+class _IdColumn:
+    """
+    Sequence view of the packed user ID column, so it can be bisected
+    """
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: bytearray) -> None:
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids) // _ID_SIZE
+
+    def __getitem__(self, row: int) -> bytearray:
+        start = row * _ID_SIZE
+        return self._ids[start : start + _ID_SIZE]
+
+
+class UserStore:
+    """
+    Holds validated users in columns, one row per user, sorted by `user_id`:
+        - `user_id` packed as 16 big-endian bytes per row, which sorts like UUIDs
+        - one code per row for `role` and `active`
+        - `email`, with a unique index mapping it to the packed user ID
+
+    and keeps the emails sorted, with the codes of their users alongside, for
+    prefix searches.
+
+    A million users take tens of MB instead of the GBs of `User` models.
+    Filters are evaluated on the code column at C speed: a single role and
+    active status is searched directly, other combinations through a row mask
+    built with one `bytearray.translate` and cached until the store changes.
+    Only the rows of the returned page are materialized into `User` models.
+
+    Rows are kept sorted by `user_id`, so listings can be resumed after any
+    user ID (keyset pagination). The emails with a prefix are one range of
+    the sorted emails, found with a bisect and filtered the same way.
+
+    User ETags are computed on first use and cached until the user changes.
+    `version` is bumped on every change, so callers can cache derived data.
+    """
+
+    def __init__(self, users: Iterable[User]) -> None:
+        # Bulk load: sort the rows once, then build each column in one go
+        rows = sorted(
+            (
+                (user.user_id.bytes, user.email, _code(user.role, user.active))
+                for user in users
+            ),
+            key=itemgetter(0),
+        )
+        self._email_index: dict[str, bytes] = {}
+        previous_id = None
+        for user_id, email, _ in rows:
+            if user_id == previous_id:
+                raise ValueError(f"Duplicate user ID {UUID(bytes=user_id)}")
+            if email in self._email_index:
+                raise ValueError(f"Duplicate email {email}")
+            self._email_index[email] = previous_id = user_id
+
+        self._ids = bytearray(b"".join(map(itemgetter(0), rows)))
+        self._id_column = _IdColumn(self._ids)
+        self._emails: List[str] = list(map(itemgetter(1), rows))
+        self._codes = bytearray(map(itemgetter(2), rows))
+        self._sorted_emails = sorted(self._email_index)
+        codes = dict(zip(self._emails, self._codes))
+        self._sorted_codes = bytearray(map(codes.__getitem__, self._sorted_emails))
+        self._etags: dict[UUID, str] = {}
+        self._masks: dict[FrozenSet[int], bytearray] = {}
+        self._masks_version = 0
+        self.version = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict[str, Any]]) -> "UserStore":
+        """
+        Validate raw records in a single pass and build the store
+        """
+        return cls(_users_adapter.validate_python(list(records)))
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def _row(self, user_id: Union[UUID, bytes]) -> Optional[int]:
+        key = user_id.bytes if isinstance(user_id, UUID) else user_id
+        row = bisect_left(self._id_column, key)
+        if row < len(self._codes) and self._id_column[row] == key:
+            return row
+        return None
+
+    def _user(self, row: int) -> User:
+        return _make_user(self._id_column[row], self._emails[row], self._codes[row])
+
+    def _changed(self, user_id: UUID) -> None:
+        self.version += 1
+        self._etags.pop(user_id, None)
+
+    def add(self, user: User) -> None:
+        """
+        Add a new user to the store and its indexes
+        """
+        key, email, code = _row_values(user)
+        row = bisect_left(self._id_column, key)
+        if row < len(self._codes) and self._id_column[row] == key:
+            raise ValueError(f"Duplicate user ID {user.user_id}")
+        if email in self._email_index:
+            raise ValueError(f"Duplicate email {email}")
+        self._changed(user.user_id)
+        start = row * _ID_SIZE
+        self._ids[start:start] = key
+        self._emails.insert(row, email)
+        self._codes.insert(row, code)
+        self._email_index[email] = key
+        self._insert_sorted_email(email, code)
+
+    def replace(self, user: User) -> None:
+        """
+        Replace an existing user, keeping the indexes in sync
+        """
+        key, email, code = _row_values(user)
+        row = self._row(key)
+        if row is None:
+            raise KeyError(user.user_id)
+        current_email = self._emails[row]
+        if email != current_email and email in self._email_index:
+            raise ValueError(f"Duplicate email {email}")
+        self._changed(user.user_id)
+        # The user ID does not change, so the user keeps its row
+        del self._email_index[current_email]
+        self._email_index[email] = key
+        self._emails[row] = email
+        self._codes[row] = code
+        if email == current_email:
+            position = bisect_left(self._sorted_emails, email)
+            self._sorted_codes[position] = code
+        else:
+            self._remove_sorted_email(current_email)
+            self._insert_sorted_email(email, code)
+
+    def remove(self, user_id: UUID) -> User:
+        """
+        Remove a user from the store and its indexes
+        """
+        row = self._row(user_id)
+        if row is None:
+            raise KeyError(user_id)
+        user = self._user(row)
+        self._changed(user_id)
+        start = row * _ID_SIZE
+        del self._ids[start : start + _ID_SIZE]
+        del self._emails[row]
+        del self._codes[row]
+        del self._email_index[user.email]
+        self._remove_sorted_email(user.email)
+        return user
+
+    def _insert_sorted_email(self, email: str, code: int) -> None:
+        position = bisect_left(self._sorted_emails, email)
+        self._sorted_emails.insert(position, email)
+        self._sorted_codes.insert(position, code)
+
+    def _remove_sorted_email(self, email: str) -> None:
+        position = bisect_left(self._sorted_emails, email)
+        del self._sorted_emails[position]
+        del self._sorted_codes[position]
+
+    def get(self, user_id: UUID) -> Optional[User]:
+        """
+        Return the user with the given ID, if it exists
+        """
+        row = self._row(user_id)
+        return None if row is None else self._user(row)
+
+    def etag(self, user_id: UUID) -> Optional[str]:
+        """
+        Return the cached ETag of the user, if it exists
+        """
+        etag = self._etags.get(user_id)
+        if etag is None:
+            user = self.get(user_id)
+            if user is None:
+                return None
+            etag = self._etags[user_id] = user_etag(user)
+        return etag
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        """
+        Return the user with the given email, if it exists
+        """
+        user_id = self._email_index.get(email)
+        return None if user_id is None else self._user(self._row(user_id))
+
+    def email_exists(self, email: str) -> bool:
+        """
+        Check the unique email index
+        """
+        return email in self._email_index
+
+    def email_owners(self, emails: Iterable[str]) -> dict[str, UUID]:
+        """
+        Check many emails against the unique email index at once
+
+        Returns:
+            The user ID of each email that is already in use
+        """
+        index = self._email_index
+        return {email: UUID(bytes=index[email]) for email in index.keys() & set(emails)}
+
+    def _mask(self, codes: FrozenSet[int]) -> bytearray:
+        """
+        Return a mask with a 1 in every row whose code is one of `codes`
+        """
+        if self._masks_version != self.version:
+            self._masks.clear()
+            self._masks_version = self.version
+        mask = self._masks.get(codes)
+        if mask is None:
+            mask = self._masks[codes] = self._codes.translate(_mask_table(codes))
+        return mask
+
+    def filter(
+        self,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: Optional[int] = None,
+        after: Optional[UUID] = None,
+    ) -> List[User]:
+        """
+        Return users matching the given role and active status, ordered by
+        `user_id`, starting after the `after` user ID and up to `limit` users.
+
+        Matching rows are found with `bytearray.find` from the `after` row, so
+        the work per call is bounded by the page plus a C-speed scan over the
+        rows that do not match.
+        """
+        codes = _matching_codes(role, active)
+        start = 0 if after is None else bisect_right(self._id_column, after.bytes)
+        end = len(self._codes)
+        limit = end if limit is None else limit
+
+        if codes == _ALL_CODES:
+            rows: Iterable[int] = range(start, min(start + limit, end))
+        elif len(codes) == 1:
+            rows = _find(self._codes, next(iter(codes)), start, end, limit)
+        else:
+            rows = _find(self._mask(codes), 1, start, end, limit)
+        return [self._user(row) for row in rows]
+
+    def search(
+        self,
+        email_prefix: str,
+        role: Optional[UserRole] = None,
+        active: Optional[bool] = None,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> List[User]:
+        """
+        Return users whose email starts with `email_prefix`, matching the given
+        role and active status, ordered by email, starting after the `after`
+        email and up to `limit` users.
+
+        The emails with the prefix are bisected out of the sorted emails, so
+        the work per call is bounded by the page plus a C-speed scan of the
+        codes of the prefix range, whatever the size of the store.
+        """
+        codes = _matching_codes(role, active)
+        emails = self._sorted_emails
+        if after is None or after < email_prefix:
+            start = bisect_left(emails, email_prefix)
+        else:
+            start = bisect_right(emails, after)
+        prefix_end = _prefix_end(email_prefix)
+        end = (
+            len(emails)
+            if prefix_end is None
+            else bisect_left(emails, prefix_end, start)
+        )
+        limit = end if limit is None else limit
+
+        if codes == _ALL_CODES:
+            positions: Iterable[int] = range(start, min(start + limit, end))
+        elif len(codes) == 1:
+            positions = _find(self._sorted_codes, next(iter(codes)), start, end, limit)
+        else:
+            # Ranges are not cached like the masks of `filter`, they depend on
+            # the prefix, the mask of the range is built on each call
+            mask = self._sorted_codes[start:end].translate(_mask_table(codes))
+            positions = [
+                start + offset for offset in _find(mask, 1, 0, len(mask), limit)
+            ]
+        return [
+            _make_user(
+                self._email_index[emails[position]],
+                emails[position],
+                self._sorted_codes[position],
+            )
+            for position in positions
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_user_store() -> UserStore:
+    """
+    Return the user store, built once per warm container
+    """
+    return UserStore.from_records(user_records)
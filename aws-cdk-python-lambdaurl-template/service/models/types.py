@@ -0,0 +1,22 @@
+"""
+Shared field types
+"""
+
+from typing import Annotated
+
+from pydantic import AfterValidator, WithJsonSchema
+from pydantic.networks import validate_email
+
+
+def _normalize_email(value: str) -> str:
+    return validate_email(value)[1]
+
+
+# Same validation and schema as `pydantic.EmailStr`, but email-validator is
+# imported on the first validation instead of when the models are defined,
+# which keeps it out of the cold start of handlers that only read users
+EmailStr = Annotated[
+    str,
+    AfterValidator(_normalize_email),
+    WithJsonSchema({"type": "string", "format": "email"}),
+]
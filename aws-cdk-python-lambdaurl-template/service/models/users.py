@@ -3,10 +3,12 @@ User models
 """
 
 from enum import Enum
-from typing import Optional
+from typing import Any, List, Optional
 from uuid import uuid4, UUID
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, field_validator
+
+from service.models.types import EmailStr
 
 
 class UserRole(str, Enum):
@@ -35,6 +37,14 @@ class UserUpdate(BaseModel):
     role: Optional[UserRole] = None
     active: Optional[bool] = None
 
+    @field_validator("email", "role", "active", mode="before")
+    @classmethod
+    def _not_null(cls, value: Any) -> Any:
+        # Omitted fields keep their value, `null` would unset a required field
+        if value is None:
+            raise ValueError("Field can not be null")
+        return value
+
 
 class UserCreate(BaseModel):
     """
@@ -43,3 +53,43 @@ class UserCreate(BaseModel):
 
     email: EmailStr
     role: UserRole = Field(default=UserRole.customer, description="User role")
+
+
+class UserPage(BaseModel):
+    """
+    Page of users
+    """
+
+    items: List[User] = Field(..., description="Users in the page")
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor of the next page, absent on the last page"
+    )
+
+
+class UserBatchUpdate(UserUpdate):
+    """
+    User update model of a batch update
+    """
+
+    user_id: UUID = Field(..., description="ID of the user to update")
+
+
+class UserBatchItemResult(BaseModel):
+    """
+    Result of one item of a batch request
+    """
+
+    index: int = Field(..., description="Position of the item in the request")
+    status: int = Field(..., description="HTTP status code of the item")
+    user: Optional[User] = Field(
+        None, description="The created or updated user, null for deleted users"
+    )
+    error: Optional[str] = Field(None, description="Why the item failed")
+
+
+class UserBatchResult(BaseModel):
+    """
+    Per-item results of a batch request, in request order
+    """
+
+    items: List[UserBatchItemResult] = Field(..., description="Item results")
@@ -0,0 +1,54 @@
+"""
+Machine calibration of the benchmarks
+
+Wall-clock latencies only compare on the same machine under the same load.
+`machine_speed_ms` times a fixed workload of the kind the handler runs
+(validating users, dumping and parsing JSON), and the benchmarks express
+their latencies in multiples of it, measured alongside the case, so a slower
+machine or a busy run scales the workload and the case alike.
+"""
+
+import json
+import statistics
+import time
+from typing import List
+from uuid import UUID
+
+from pydantic import TypeAdapter
+
+from service.models.users import User, UserRole
+
+WARMUP_ROUNDS = 5
+ROUNDS = 30
+
+_users_adapter = TypeAdapter(List[User])
+_records = [
+    {
+        "user_id": str(UUID(int=i, version=4)),
+        "email": f"user{i}@example.com",
+        "role": list(UserRole)[i % len(UserRole)].value,
+        "active": i % 5 != 0,
+    }
+    for i in range(50)
+]
+
+
+def _workload() -> None:
+    users = _users_adapter.validate_python(_records)
+    json.loads(_users_adapter.dump_json(users))
+    sorted(_records, key=lambda record: record["email"])
+
+
+def machine_speed_ms(rounds: int = ROUNDS) -> float:
+    """
+    Return the median time of `rounds` runs of the calibration workload, in
+    milliseconds
+    """
+    for _ in range(WARMUP_ROUNDS):
+        _workload()
+    times = []
+    for _ in range(rounds):
+        start_ns = time.perf_counter_ns()
+        _workload()
+        times.append((time.perf_counter_ns() - start_ns) / 1e6)
+    return statistics.median(times)
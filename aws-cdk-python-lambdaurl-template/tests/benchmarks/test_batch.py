@@ -0,0 +1,151 @@
+"""
+Benchmark: bulk create/update/delete routes vs the single-item routes
+"""
+
+import json
+import time
+from http import HTTPStatus
+from typing import Any, List
+
+import pytest
+
+import service.handlers.demo_lambda as demo_lambda
+from service.dal.memory import InMemoryUserRepository
+from service.logic.batch import MAX_BATCH_SIZE
+from service.logic.store import UserStore
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+ITEMS = 2_000
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    repository = InMemoryUserRepository(UserStore([]))
+    monkeypatch.setattr(demo_lambda, "get_user_repository", lambda: repository)
+    return repository
+
+
+def _items_per_second(events: List[dict[str, Any]], items: int) -> float:
+    context = generate_context()
+    start = time.process_time()
+    for event in events:
+        response = demo_lambda.app.resolve(event, context)
+        assert response["statusCode"] in (
+            HTTPStatus.OK,
+            HTTPStatus.CREATED,
+            HTTPStatus.NO_CONTENT,
+        )
+    return items / (time.process_time() - start)
+
+
+def _batches(items: List[Any]) -> List[List[Any]]:
+    return [
+        items[start : start + MAX_BATCH_SIZE]
+        for start in range(0, len(items), MAX_BATCH_SIZE)
+    ]
+
+
+def test_batch_create_throughput(repository):
+    single = _items_per_second(
+        [
+            generate_api_lambda_event(
+                "/users", {"email": f"single{i}@example.com"}, method="POST"
+            )
+            for i in range(ITEMS)
+        ],
+        ITEMS,
+    )
+    batch = _items_per_second(
+        [
+            generate_api_lambda_event("/users:batch", items, method="POST")
+            for items in _batches(
+                [{"email": f"batch{i}@example.com"} for i in range(ITEMS)]
+            )
+        ],
+        ITEMS,
+    )
+    assert len(repository.list_users(limit=2 * ITEMS)[0]) == 2 * ITEMS
+    print(
+        f"\nPOST: single {single:,.0f} items/s, "
+        f"batch of {MAX_BATCH_SIZE} {batch:,.0f} items/s ({batch / single:.1f}x)"
+    )
+    assert batch > single
+
+
+def test_batch_update_throughput(repository):
+    response = demo_lambda.app.resolve(
+        generate_api_lambda_event(
+            "/users:batch",
+            [{"email": f"user{i}@example.com"} for i in range(MAX_BATCH_SIZE)],
+            method="POST",
+        ),
+        generate_context(),
+    )
+    user_ids = [
+        item["user"]["user_id"] for item in json.loads(response["body"])["items"]
+    ]
+    rounds = ITEMS // len(user_ids)
+
+    single = _items_per_second(
+        [
+            generate_api_lambda_event(
+                f"/users/{user_id}", {"active": bool(i % 2)}, method="PUT"
+            )
+            for i in range(rounds)
+            for user_id in user_ids
+        ],
+        ITEMS,
+    )
+    batch = _items_per_second(
+        [
+            generate_api_lambda_event(
+                "/users:batch",
+                [{"user_id": user_id, "active": bool(i % 2)} for user_id in user_ids],
+                method="PATCH",
+            )
+            for i in range(rounds)
+        ],
+        ITEMS,
+    )
+    print(
+        f"\nPUT/PATCH: single {single:,.0f} items/s, "
+        f"batch of {MAX_BATCH_SIZE} {batch:,.0f} items/s ({batch / single:.1f}x)"
+    )
+    assert batch > single
+
+
+def test_batch_delete_throughput(repository):
+    user_ids = []
+    for items in _batches(
+        [{"email": f"user{i}@example.com"} for i in range(2 * ITEMS)]
+    ):
+        response = demo_lambda.app.resolve(
+            generate_api_lambda_event("/users:batch", items, method="POST"),
+            generate_context(),
+        )
+        user_ids += [
+            item["user"]["user_id"] for item in json.loads(response["body"])["items"]
+        ]
+
+    single = _items_per_second(
+        [
+            generate_api_lambda_event(f"/users/{user_id}", None, method="DELETE")
+            for user_id in user_ids[:ITEMS]
+        ],
+        ITEMS,
+    )
+    batch = _items_per_second(
+        [
+            generate_api_lambda_event("/users:batch", items, method="DELETE")
+            for items in _batches(user_ids[ITEMS:])
+        ],
+        ITEMS,
+    )
+    assert len(repository.list_users(limit=ITEMS)[0]) == 0
+    print(
+        f"\nDELETE: single {single:,.0f} items/s, "
+        f"batch of {MAX_BATCH_SIZE} {batch:,.0f} items/s ({batch / single:.1f}x)"
+    )
+    assert batch > single
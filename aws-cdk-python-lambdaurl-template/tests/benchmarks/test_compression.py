@@ -0,0 +1,77 @@
+"""
+Benchmark: bytes and latency saved by compressing a response of 1k users
+"""
+
+import base64
+import time
+from typing import List, Optional
+
+import pytest
+from aws_lambda_powertools.event_handler import LambdaFunctionUrlResolver
+
+from service.handlers.compression import ENCODERS, enable_compression
+from service.handlers.serialization import trusted_response
+from service.models.users import User, UserRole
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+USERS = 1_000
+ROUNDS = 50
+# Downlink of a mobile client, what the saved bytes are worth
+BANDWIDTH_MBPS = 10
+
+pytestmark = pytest.mark.benchmark
+
+
+def _build_app(users: List[User]) -> LambdaFunctionUrlResolver:
+    app = LambdaFunctionUrlResolver(enable_validation=True)
+    enable_compression(app)
+
+    @app.get("/users", compress=True)
+    @trusted_response(List[User])
+    def get_users() -> List[User]:
+        return users
+
+    return app
+
+
+def _call(app: LambdaFunctionUrlResolver, accept_encoding: Optional[str]):
+    headers = {"accept-encoding": accept_encoding} if accept_encoding else None
+    event = generate_api_lambda_event("/users", None, headers=headers)
+    context = generate_context()
+    response = app.resolve(event, context)  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        app.resolve(event, context)
+    latency_ms = (time.perf_counter() - start) * 1000 / ROUNDS
+    body = response["body"]
+    size = len(base64.b64decode(body) if response["isBase64Encoded"] else body)
+    return size, latency_ms
+
+
+def _transfer_ms(size: int) -> float:
+    return size * 8 / (BANDWIDTH_MBPS * 1_000_000) * 1000
+
+
+def test_compression_saves_bytes_and_latency():
+    users = [
+        User(
+            email=f"user{i}@example.com",
+            role=UserRole.customer if i % 10 else UserRole.manager,
+            active=i % 20 != 0,
+        )
+        for i in range(USERS)
+    ]
+    app = _build_app(users)
+    raw_size, raw_ms = _call(app, None)
+    print(f"\n{USERS} users: {raw_size:,} bytes, {raw_ms:.2f} ms uncompressed")
+
+    for encoding in ENCODERS:
+        size, latency_ms = _call(app, encoding)
+        saved_ms = _transfer_ms(raw_size - size) - (latency_ms - raw_ms)
+        print(
+            f"{encoding}: {size:,} bytes ({size / raw_size:.0%}), "
+            f"+{latency_ms - raw_ms:.2f} ms to compress, "
+            f"{saved_ms:.1f} ms saved at {BANDWIDTH_MBPS} Mbit/s"
+        )
+        assert size < raw_size / 3
+        assert saved_ms > 0
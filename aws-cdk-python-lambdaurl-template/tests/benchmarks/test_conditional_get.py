@@ -0,0 +1,71 @@
+"""
+Benchmark: 304 Not Modified vs 200 responses of the users API
+"""
+
+import time
+from http import HTTPStatus
+from typing import Optional
+
+import pytest
+
+import service.handlers.demo_lambda as demo_lambda
+from service.dal.memory import InMemoryUserRepository
+from service.logic.store import UserStore
+from service.models.users import User, UserRole
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+USERS = 10_000
+PAGE_SIZE = 100
+ROUNDS = 200
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    store = UserStore(
+        User(email=f"user{i}@example.com", role=UserRole.customer) for i in range(USERS)
+    )
+    repository = InMemoryUserRepository(store)
+    monkeypatch.setattr(demo_lambda, "get_user_repository", lambda: repository)
+    return repository
+
+
+def _cpu_ms_per_call(path: str, query: dict[str, str], etag: Optional[str]) -> float:
+    headers = {"if-none-match": etag} if etag else None
+    event = generate_api_lambda_event(
+        path, None, query_parameters=query, headers=headers
+    )
+    context = generate_context()
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        demo_lambda.app.resolve(event, context)
+    return (time.process_time() - start) * 1000 / ROUNDS
+
+
+@pytest.mark.parametrize("path", ["/users", "/users/{user_id}"])
+def test_not_modified_is_cheaper(repository, path):
+    user = repository.list_users(limit=1)[0][0]
+    path = path.format(user_id=user.user_id)
+    query = {"limit": str(PAGE_SIZE)} if path == "/users" else None
+
+    response = demo_lambda.app.resolve(
+        generate_api_lambda_event(path, None, query_parameters=query),
+        generate_context(),
+    )
+    etag = response["headers"]["ETag"]
+    response = demo_lambda.app.resolve(
+        generate_api_lambda_event(
+            path, None, query_parameters=query, headers={"if-none-match": etag}
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.NOT_MODIFIED
+
+    full = _cpu_ms_per_call(path, query, None)
+    not_modified = _cpu_ms_per_call(path, query, etag)
+    print(
+        f"\n{path}: 200 {full:.3f} ms, 304 {not_modified:.3f} ms "
+        f"({full / not_modified:.1f}x)"
+    )
+    assert not_modified < full
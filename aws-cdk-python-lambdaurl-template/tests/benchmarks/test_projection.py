@@ -0,0 +1,98 @@
+"""
+Benchmark: GET /users with a `fields` projection vs the full users
+"""
+
+import statistics
+import time
+from http import HTTPStatus
+from typing import Optional
+
+import pytest
+
+import service.handlers.demo_lambda as demo_lambda
+from service.dal.memory import InMemoryUserRepository
+from service.handlers.projection import user_page_serializer
+from service.logic.pagination import MAX_PAGE_SIZE
+from service.logic.store import UserStore
+from service.models.users import User, UserPage, UserRole
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+USERS = 10_000
+ROUNDS = 200
+SERIALIZED_USERS = 1_000
+# A page of users is a small part of a request, the route only has to stay
+# as fast as the full users, the serializer test checks the speed-up
+ROUTE_TOLERANCE = 0.1
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    store = UserStore(
+        User(email=f"user{i}@example.com", role=UserRole.customer) for i in range(USERS)
+    )
+    repository = InMemoryUserRepository(store)
+    monkeypatch.setattr(demo_lambda, "get_user_repository", lambda: repository)
+    return repository
+
+
+def _event(fields: Optional[str]) -> dict:
+    query = {"limit": str(MAX_PAGE_SIZE)}
+    if fields:
+        query["fields"] = fields
+    return generate_api_lambda_event("/users", None, query_parameters=query)
+
+
+def _call_ms(event: dict, context) -> float:
+    start = time.perf_counter_ns()
+    demo_lambda.app.resolve(event, context)
+    return (time.perf_counter_ns() - start) / 1e6
+
+
+def test_projection_route(repository):
+    context = generate_context()
+    full, projected = _event(None), _event("user_id,email")
+    full_response = demo_lambda.app.resolve(full, context)
+    projected_response = demo_lambda.app.resolve(projected, context)
+    assert full_response["statusCode"] == HTTPStatus.OK
+    assert projected_response["statusCode"] == HTTPStatus.OK
+    full_bytes = len(full_response["body"])
+    projected_bytes = len(projected_response["body"])
+
+    # Interleaved, so both routes see the same machine load
+    full_times, projected_times = [], []
+    for _ in range(ROUNDS):
+        full_times.append(_call_ms(full, context))
+        projected_times.append(_call_ms(projected, context))
+    full_ms = statistics.median(full_times)
+    projected_ms = statistics.median(projected_times)
+    print(
+        f"\nGET /users ({MAX_PAGE_SIZE} users): full {full_ms:.3f} ms / {full_bytes} B, "
+        f"user_id,email {projected_ms:.3f} ms / {projected_bytes} B"
+    )
+    assert projected_bytes < full_bytes
+    assert projected_ms < full_ms * (1 + ROUTE_TOLERANCE)
+
+
+def test_projection_serializer():
+    users = [
+        User(email=f"user{i}@example.com", role=UserRole.customer)
+        for i in range(SERIALIZED_USERS)
+    ]
+    page = UserPage.model_construct(items=users, next_cursor=None)
+    serialize = user_page_serializer(("user_id", "email"))
+
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        page.model_dump_json()
+    full_ms = (time.process_time() - start) * 1000 / ROUNDS
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        serialize(users, None)
+    projected_ms = (time.process_time() - start) * 1000 / ROUNDS
+    print(
+        f"\nSerialize {SERIALIZED_USERS} users: full {full_ms:.3f} ms, "
+        f"user_id,email {projected_ms:.3f} ms ({full_ms / projected_ms:.1f}x)"
+    )
+    assert projected_ms < full_ms
@@ -0,0 +1,345 @@
+"""
+Per-route benchmark of the Function URL handler
+
+Every route runs in-process through `lambda_handler` against stores of
+10, 10k and 100k users. Latency (p50/p99) and the memory allocated per
+request are compared with `baseline.json`; a route fails when its p50 or
+its allocations regress past the baseline by more than the tolerance.
+
+Wall-clock times only compare on the same machine under the same load, so
+the p50 is gated in multiples of a calibration workload (see
+`tests.benchmarks.calibration`): the rounds of a case run in blocks, each
+right after a calibration run, and the gate takes the median ratio of the
+blocks. The routes creating users delete them after each request, so every
+request of a case sees a store of its size.
+
+Update the baseline after an intended change with `make benchmark-baseline`.
+"""
+
+import json
+import logging
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+from uuid import UUID
+
+import pytest
+
+import service.handlers.demo_lambda as demo_lambda
+from service.dal.memory import InMemoryUserRepository
+from service.logic.batch import MAX_BATCH_SIZE
+from service.logic.store import UserStore
+from service.models.users import User, UserRole
+from tests.benchmarks.calibration import machine_speed_ms
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+SIZES = [10, 10_000, 100_000]
+WARMUP_ROUNDS = 20
+ROUNDS = 200
+# The machine speed drifts during a case, the ratio of a block to the
+# calibration run right before it does not
+BLOCKS = 5
+CALIBRATION_ROUNDS = 10
+ALLOCATION_ROUNDS = 20
+PAGE_SIZE = "50"
+# Allowed regression over the baseline, catches the routes getting twice as
+# slow; the latency slack absorbs the noise of sub-millisecond routes
+LATENCY_TOLERANCE = 1.0
+LATENCY_SLACK_MS = 0.2
+ALLOCATION_TOLERANCE = 0.25
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+UPDATE_BASELINE = os.getenv("BENCHMARK_UPDATE_BASELINE", "").lower() in ("1", "true")
+
+pytestmark = pytest.mark.benchmark
+
+# A route case returns the event of the next request, it can change the
+# repository before it (e.g. add the user a DELETE removes)
+EventFactory = Callable[[InMemoryUserRepository, int], Dict[str, Any]]
+# Undoes the changes of a request to the size of the store, from its response
+Rollback = Callable[[InMemoryUserRepository, Dict[str, Any]], None]
+
+
+@dataclass
+class RouteResult:
+    p50_ms: float
+    p99_ms: float
+    alloc_kib: float
+    # Calibration time of the machine when the route was measured
+    speed_ms: float
+    # Median p50 of the blocks, in calibration times
+    relative_p50: float
+
+
+def _users(size: int) -> Iterator[User]:
+    rng = random.Random(size)
+    roles = list(UserRole)
+    for i in range(size):
+        # Built like the stored users, without validating them again
+        yield User.model_construct(
+            user_id=UUID(int=rng.getrandbits(128), version=4),
+            email=f"user{i}@example.com",
+            role=roles[i % len(roles)],
+            active=i % 5 != 0,
+        )
+
+
+def _first_user_id(repository: InMemoryUserRepository) -> UUID:
+    return repository.list_users(limit=1)[0][0].user_id
+
+
+def _get(path: str, query: Dict[str, str] = None, **kwargs: Any) -> Dict[str, Any]:
+    return generate_api_lambda_event(path, None, query_parameters=query, **kwargs)
+
+
+def _etag(event: Dict[str, Any]) -> str:
+    return demo_lambda.lambda_handler(event, generate_context())["headers"]["ETag"]
+
+
+def _get_users(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    return _get("/users", {"limit": PAGE_SIZE})
+
+
+def _get_users_filtered(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    return _get("/users", {"limit": PAGE_SIZE, "role": "manager", "is_active": "true"})
+
+
+def _get_users_fields(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    return _get("/users", {"limit": PAGE_SIZE, "fields": "user_id,email"})
+
+
+def _get_users_email_prefix(
+    repository: InMemoryUserRepository, i: int
+) -> Dict[str, Any]:
+    return _get("/users", {"limit": PAGE_SIZE, "email_prefix": "user1"})
+
+
+def _get_users_not_modified(
+    repository: InMemoryUserRepository, i: int
+) -> Dict[str, Any]:
+    query = {"limit": PAGE_SIZE}
+    return _get(
+        "/users", query, headers={"if-none-match": _etag(_get("/users", query))}
+    )
+
+
+def _get_user(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    return _get(f"/users/{_first_user_id(repository)}")
+
+
+def _get_user_not_modified(
+    repository: InMemoryUserRepository, i: int
+) -> Dict[str, Any]:
+    path = f"/users/{_first_user_id(repository)}"
+    return _get(path, headers={"if-none-match": _etag(_get(path))})
+
+
+def _create_user(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    return generate_api_lambda_event(
+        "/users", {"email": f"created{i}@example.com"}, method="POST"
+    )
+
+
+def _update_user(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    return generate_api_lambda_event(
+        f"/users/{_first_user_id(repository)}", {"active": bool(i % 2)}, method="PUT"
+    )
+
+
+def _delete_user(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    # Keeps the store size stable
+    user = User.model_construct(
+        email=f"deleted{i}@example.com", role=UserRole.customer, active=True
+    )
+    repository.create_user(user)
+    return generate_api_lambda_event(f"/users/{user.user_id}", None, method="DELETE")
+
+
+def _create_users(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    items = [{"email": f"batch{i}-{j}@example.com"} for j in range(MAX_BATCH_SIZE)]
+    return generate_api_lambda_event("/users:batch", items, method="POST")
+
+
+def _update_users(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    users, _ = repository.list_users(limit=MAX_BATCH_SIZE)
+    items = [{"user_id": str(user.user_id), "active": bool(i % 2)} for user in users]
+    return generate_api_lambda_event("/users:batch", items, method="PATCH")
+
+
+def _delete_users(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    # Keeps the store size stable
+    users = [
+        User.model_construct(
+            email=f"deleted{i}-{j}@example.com", role=UserRole.customer, active=True
+        )
+        for j in range(MAX_BATCH_SIZE)
+    ]
+    repository.create_users(users)
+    items = [str(user.user_id) for user in users]
+    return generate_api_lambda_event("/users:batch", items, method="DELETE")
+
+
+def _delete_created_users(
+    repository: InMemoryUserRepository, response: Dict[str, Any]
+) -> None:
+    body = json.loads(response["body"])
+    users = [item["user"] for item in body["items"]] if "items" in body else [body]
+    for user in users:
+        if user is not None:
+            repository.delete_user(UUID(user["user_id"]))
+
+
+def _swagger_json(repository: InMemoryUserRepository, i: int) -> Dict[str, Any]:
+    return _get("/swagger", {"format": "json"}, headers={"accept-encoding": "gzip"})
+
+
+ROUTES: Dict[str, EventFactory] = {
+    "GET /users": _get_users,
+    "GET /users?role&is_active": _get_users_filtered,
+    "GET /users?fields": _get_users_fields,
+    "GET /users?email_prefix": _get_users_email_prefix,
+    "GET /users 304": _get_users_not_modified,
+    "GET /users/{id}": _get_user,
+    "GET /users/{id} 304": _get_user_not_modified,
+    "POST /users": _create_user,
+    "PUT /users/{id}": _update_user,
+    "DELETE /users/{id}": _delete_user,
+    "POST /users:batch": _create_users,
+    "PATCH /users:batch": _update_users,
+    "DELETE /users:batch": _delete_users,
+    "GET /swagger?format=json": _swagger_json,
+}
+
+ROLLBACKS: Dict[str, Rollback] = {
+    "POST /users": _delete_created_users,
+    "POST /users:batch": _delete_created_users,
+}
+
+
+@pytest.fixture(scope="module")
+def baseline() -> Iterator[Dict[str, Dict[str, float]]]:
+    stored = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    results: Dict[str, Dict[str, float]] = {}
+    yield stored if not UPDATE_BASELINE else results
+    if UPDATE_BASELINE:
+        BASELINE_FILE.write_text(
+            json.dumps({**stored, **results}, indent=2, sort_keys=True) + "\n"
+        )
+
+
+@pytest.fixture(scope="module", autouse=True)
+def handler_config() -> Iterator[None]:
+    # Same settings as the deployed function, without the log output
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("POWERTOOLS_TRACE_DISABLED", "true")
+        demo_lambda._get_resolver.cache_clear()
+        level = demo_lambda.logger.log_level
+        demo_lambda.logger.setLevel(logging.WARNING)
+        yield
+        demo_lambda.logger.setLevel(level)
+        demo_lambda._get_resolver.cache_clear()
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}-users")
+def size(request) -> int:
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def repository(size) -> Iterator[InMemoryUserRepository]:
+    repository = InMemoryUserRepository(UserStore(_users(size)))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(demo_lambda, "get_user_repository", lambda: repository)
+        yield repository
+
+
+def _measure(
+    repository: InMemoryUserRepository, event_factory: EventFactory, rollback: Rollback
+) -> RouteResult:
+    context = generate_context()
+
+    def call(i: int) -> Dict[str, Any]:
+        response = demo_lambda.lambda_handler(event_factory(repository, i), context)
+        rollback(repository, response)
+        return response
+
+    for i in range(-WARMUP_ROUNDS, 0):
+        call(i)
+
+    latencies: List[float] = []
+    speeds: List[float] = []
+    ratios: List[float] = []
+    block_size = ROUNDS // BLOCKS
+    for block in range(BLOCKS):
+        speeds.append(machine_speed_ms(CALIBRATION_ROUNDS))
+        block_latencies: List[float] = []
+        for i in range(block * block_size, (block + 1) * block_size):
+            event = event_factory(repository, i)
+            start = time.perf_counter_ns()
+            response = demo_lambda.lambda_handler(event, context)
+            block_latencies.append((time.perf_counter_ns() - start) / 1e6)
+            assert response["statusCode"] < 400, response["body"]
+            rollback(repository, response)
+        ratios.append(statistics.median(block_latencies) / speeds[-1])
+        latencies += block_latencies
+
+    # Allocations are traced in separate rounds, tracing slows every call down
+    allocations: List[int] = []
+    tracemalloc.start()
+    try:
+        for i in range(ROUNDS, ROUNDS + ALLOCATION_ROUNDS):
+            event = event_factory(repository, i)
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            response = demo_lambda.lambda_handler(event, context)
+            _, peak = tracemalloc.get_traced_memory()
+            allocations.append(peak - before)
+            rollback(repository, response)
+    finally:
+        tracemalloc.stop()
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return RouteResult(
+        p50_ms=round(percentiles[49], 4),
+        p99_ms=round(percentiles[98], 4),
+        alloc_kib=round(statistics.median(allocations) / 1024, 1),
+        speed_ms=round(statistics.median(speeds), 4),
+        relative_p50=round(statistics.median(ratios), 5),
+    )
+
+
+@pytest.mark.parametrize("route", list(ROUTES))
+def test_route(size, repository, baseline, route):
+    key = f"{route} [{size} users]"
+    rollback = ROLLBACKS.get(route, lambda repository, response: None)
+    result = _measure(repository, ROUTES[route], rollback)
+    print(
+        f"\n{key}: p50 {result.p50_ms:.3f} ms, p99 {result.p99_ms:.3f} ms, "
+        f"{result.alloc_kib:.1f} KiB allocated, calibration {result.speed_ms:.2f} ms"
+    )
+
+    if UPDATE_BASELINE:
+        baseline[key] = asdict(result)
+        return
+    expected = baseline.get(key)
+    if expected is None or "relative_p50" not in expected:
+        pytest.skip(f"No baseline for {key}, run `make benchmark-baseline`")
+
+    max_relative_p50 = (
+        expected["relative_p50"] * (1 + LATENCY_TOLERANCE)
+        + LATENCY_SLACK_MS / result.speed_ms
+    )
+    assert result.relative_p50 <= max_relative_p50, (
+        f"{key} p50 regressed: {result.relative_p50:.4f} calibration times "
+        f"({result.p50_ms:.3f} ms), baseline {expected['relative_p50']:.4f} "
+        f"({expected['p50_ms']:.3f} ms)"
+    )
+    assert result.alloc_kib <= expected["alloc_kib"] * (1 + ALLOCATION_TOLERANCE), (
+        f"{key} allocations regressed: {result.alloc_kib:.1f} KiB, "
+        f"baseline {expected['alloc_kib']:.1f} KiB"
+    )
@@ -0,0 +1,66 @@
+"""
+Benchmark: response serialization of trusted users vs the validated path
+"""
+
+import time
+from typing import List
+
+import pytest
+from aws_lambda_powertools.event_handler import LambdaFunctionUrlResolver
+
+from service.handlers.serialization import trusted_response
+from service.models.users import User, UserRole
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+USERS = 1_000
+ROUNDS = 50
+
+pytestmark = pytest.mark.benchmark
+
+
+def _build_app(users: List[User]) -> LambdaFunctionUrlResolver:
+    app = LambdaFunctionUrlResolver(enable_validation=True)
+
+    @app.get("/validated")
+    def validated() -> List[User]:
+        return users
+
+    @app.get("/trusted")
+    @trusted_response(List[User])
+    def trusted() -> List[User]:
+        return users
+
+    return app
+
+
+def _cpu_ms_per_call(app: LambdaFunctionUrlResolver, path: str) -> float:
+    event, context = generate_api_lambda_event(path, None), generate_context()
+    app.resolve(event, context)  # warm up
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        app.resolve(event, context)
+    return (time.process_time() - start) * 1000 / ROUNDS
+
+
+def test_trusted_serialization_is_faster():
+    users = [
+        User(email=f"user{i}@example.com", role=UserRole.customer) for i in range(USERS)
+    ]
+    app = _build_app(users)
+
+    # Both paths must produce the same payload
+    trusted_body = app.resolve(
+        generate_api_lambda_event("/trusted", None), generate_context()
+    )["body"]
+    validated_body = app.resolve(
+        generate_api_lambda_event("/validated", None), generate_context()
+    )["body"]
+    assert trusted_body == validated_body
+
+    validated = _cpu_ms_per_call(app, "/validated")
+    trusted = _cpu_ms_per_call(app, "/trusted")
+    print(
+        f"\nCPU time per {USERS} users: validated {validated:.2f} ms, "
+        f"trusted {trusted:.2f} ms ({validated / trusted:.1f}x)"
+    )
+    assert trusted < validated
@@ -0,0 +1,175 @@
+"""
+Benchmark: filtered listings and email prefix searches over a million users
+in the columnar store
+
+The latency budget is a p50 on a machine running the calibration workload
+of `tests.benchmarks.calibration` in `REFERENCE_SPEED_MS`. The rounds of a
+case run in blocks, each right after a calibration run, and the median p50
+of the blocks is scaled to that machine before it is checked.
+"""
+
+import gc
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, Iterator
+from uuid import UUID
+
+import pytest
+
+import service.handlers.demo_lambda as demo_lambda
+from service.dal.memory import InMemoryUserRepository
+from service.logic.pagination import MAX_PAGE_SIZE, encode_cursor
+from service.logic.store import UserStore
+from service.models.users import User, UserRole
+from tests.benchmarks.calibration import machine_speed_ms
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+USERS = 1_000_000
+WARMUP_ROUNDS = 20
+ROUNDS = 200
+BLOCKS = 5
+CALIBRATION_ROUNDS = 10
+LATENCY_BUDGET_MS = 5
+REFERENCE_SPEED_MS = 8.0
+# Resident memory of the whole process once the store is built, leaves a
+# quarter of a 512 MB function to serve requests
+MEMORY_BUDGET_MB = 384
+
+FILTERS: Dict[str, Dict[str, str]] = {
+    "no filter": {},
+    "role=manager": {"role": "manager"},
+    "is_active=false": {"is_active": "false"},
+    # ~500 matching users, spread over the whole store
+    "role=admin&is_active=false": {"role": "admin", "is_active": "false"},
+}
+
+SEARCHES: Dict[str, Dict[str, str]] = {
+    # One matching user
+    "email_prefix=user123456@": {"email_prefix": "user123456@"},
+    # ~111k matching users
+    "email_prefix=user1": {"email_prefix": "user1"},
+    # ~1k matching users, spread over the ~111k emails with the prefix
+    "email_prefix=user1&role=admin": {"email_prefix": "user1", "role": "admin"},
+}
+
+pytestmark = pytest.mark.benchmark
+
+
+def _users(size: int) -> Iterator[User]:
+    rng = random.Random(size)
+    for i in range(size):
+        draw = rng.random()
+        role = (
+            UserRole.admin
+            if draw < 0.01
+            else UserRole.manager
+            if draw < 0.1
+            else UserRole.customer
+        )
+        yield User.model_construct(
+            user_id=UUID(int=rng.getrandbits(128), version=4),
+            email=f"user{i}@example.com",
+            role=role,
+            active=rng.random() >= 0.05,
+        )
+
+
+def _rss_mb() -> float:
+    # Resident memory, what the memory size of a function limits
+    with Path("/proc/self/statm").open() as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+@pytest.fixture(scope="module")
+def store() -> Iterator[UserStore]:
+    gc.collect()
+    rss = _rss_mb()
+    store = UserStore(_users(USERS))
+    gc.collect()
+    store.rss_mb = _rss_mb()
+    store.growth_mb = store.rss_mb - rss
+    yield store
+
+
+@pytest.fixture(scope="module")
+def repository(store) -> Iterator[InMemoryUserRepository]:
+    repository = InMemoryUserRepository(store)
+    level = demo_lambda.logger.log_level
+    demo_lambda.logger.setLevel(logging.WARNING)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(demo_lambda, "get_user_repository", lambda: repository)
+        yield repository
+    demo_lambda.logger.setLevel(level)
+
+
+@pytest.mark.skipif(not Path("/proc/self/statm").exists(), reason="Linux only")
+def test_store_memory(store):
+    print(
+        f"\nStore of {len(store):,} users: +{store.growth_mb:.0f} MB, "
+        f"{store.rss_mb:.0f} MB resident"
+    )
+    assert store.rss_mb < MEMORY_BUDGET_MB
+
+
+def _measure(query: Dict[str, str], name: str, start: str, size: int) -> None:
+    event = generate_api_lambda_event("/users", None, query_parameters=query)
+    context = generate_context()
+
+    for _ in range(WARMUP_ROUNDS):
+        demo_lambda.lambda_handler(event, context)
+
+    latencies = []
+    reference_p50s = []
+    for _ in range(BLOCKS):
+        speed_ms = machine_speed_ms(CALIBRATION_ROUNDS)
+        block_latencies = []
+        for _ in range(ROUNDS // BLOCKS):
+            start_ns = time.perf_counter_ns()
+            response = demo_lambda.lambda_handler(event, context)
+            block_latencies.append((time.perf_counter_ns() - start_ns) / 1e6)
+            assert response["statusCode"] == 200
+        # The p50 of the block on the reference machine
+        reference_p50s.append(
+            statistics.median(block_latencies) * REFERENCE_SPEED_MS / speed_ms
+        )
+        latencies += block_latencies
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    reference_p50 = statistics.median(reference_p50s)
+    print(
+        f"\nGET /users {name} ({start}, {MAX_PAGE_SIZE} users of {size:,}): "
+        f"p50 {percentiles[49]:.2f} ms, p99 {percentiles[98]:.2f} ms, "
+        f"p50 on the reference machine {reference_p50:.2f} ms, "
+        f"budget {LATENCY_BUDGET_MS} ms"
+    )
+    assert reference_p50 < LATENCY_BUDGET_MS
+
+
+@pytest.mark.parametrize("start", ["first page", "middle page"])
+@pytest.mark.parametrize("name", list(FILTERS))
+def test_filtered_listing(repository, store, name, start):
+    query = {**FILTERS[name], "limit": str(MAX_PAGE_SIZE)}
+    if start == "middle page":
+        middle = store.filter(limit=1, after=UUID(int=2**127))[0].user_id
+        query["cursor"] = encode_cursor(middle)
+    _measure(query, name, start, len(store))
+
+
+@pytest.mark.parametrize("start", ["first page", "second page"])
+@pytest.mark.parametrize("name", list(SEARCHES))
+def test_email_prefix_search(repository, store, name, start):
+    query = {**SEARCHES[name], "limit": str(MAX_PAGE_SIZE)}
+    if start == "second page":
+        first_page = demo_lambda.lambda_handler(
+            generate_api_lambda_event("/users", None, query_parameters=query),
+            generate_context(),
+        )
+        next_cursor = json.loads(first_page["body"])["next_cursor"]
+        if next_cursor is not None:
+            query["cursor"] = next_cursor
+    _measure(query, name, start, len(store))
@@ -0,0 +1,50 @@
+"""
+Benchmark: first /swagger request from build artifacts vs runtime generation
+"""
+
+import time
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+
+from service.handlers.demo_lambda import API_DESCRIPTION, API_TITLE, app
+from service.handlers.swagger import enable_swagger_artifacts, write_swagger_artifacts
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+pytestmark = pytest.mark.benchmark
+
+
+def _first_request_ms(path: str, artifacts_folder: Path, accept_encoding: str) -> float:
+    # A new docs route starts with nothing cached, like a fresh container
+    enable_swagger_artifacts(
+        app,
+        path=path,
+        title=API_TITLE,
+        description=API_DESCRIPTION,
+        artifacts_folder=artifacts_folder,
+    )
+    event = generate_api_lambda_event(
+        path, None, headers={"accept-encoding": accept_encoding}
+    )
+    start = time.process_time()
+    response = app.resolve(event, generate_context())
+    elapsed = (time.process_time() - start) * 1000
+    assert response["statusCode"] == HTTPStatus.OK
+    return elapsed
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+def test_artifacts_skip_schema_generation(tmp_path, accept_encoding):
+    write_swagger_artifacts(app, tmp_path, title=API_TITLE, description=API_DESCRIPTION)
+    generated = _first_request_ms(
+        f"/docs/generated/{accept_encoding}", tmp_path / "missing", accept_encoding
+    )
+    prebuilt = _first_request_ms(
+        f"/docs/prebuilt/{accept_encoding}", tmp_path, accept_encoding
+    )
+    print(
+        f"\nFirst /swagger request ({accept_encoding}): generated {generated:.1f} ms, "
+        f"prebuilt {prebuilt:.1f} ms ({generated / prebuilt:.1f}x)"
+    )
+    assert prebuilt < generated
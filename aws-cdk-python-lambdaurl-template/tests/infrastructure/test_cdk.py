@@ -15,3 +15,4 @@ def test_lambda_created():
 
     # Extra function for log rotation
     template.resource_count_is("AWS::Lambda::Function", 2)
+    template.resource_count_is("AWS::DynamoDB::Table", 1)
@@ -0,0 +1,16 @@
+import pytest
+
+from service.dal import get_user_repository
+from service.logic.store import get_user_store
+
+
+@pytest.fixture(autouse=True)
+def reset_user_repository():
+    """
+    Give every test a fresh copy of the warm container state
+    """
+    get_user_store.cache_clear()
+    get_user_repository.cache_clear()
+    yield
+    get_user_store.cache_clear()
+    get_user_repository.cache_clear()
@@ -11,7 +11,8 @@ def test_get_users():
     )
     assert response["statusCode"] == HTTPStatus.OK
     response_body = json.loads(response["body"])
-    assert len(response_body) == 10
+    assert len(response_body["items"]) == 10
+    assert response_body["next_cursor"] is None
 
     response = lambda_handler(
         generate_api_lambda_event(
@@ -21,7 +22,74 @@ def test_get_users():
     )
     assert response["statusCode"] == HTTPStatus.OK
     response_body = json.loads(response["body"])
-    assert len(response_body) == 2
+    assert len(response_body["items"]) == 2
+
+
+def test_get_users_pagination():
+    user_ids = []
+    query_parameters = {"limit": "3"}
+    while True:
+        response = lambda_handler(
+            generate_api_lambda_event(
+                "/users", None, query_parameters=query_parameters
+            ),
+            generate_context(),
+        )
+        assert response["statusCode"] == HTTPStatus.OK
+        response_body = json.loads(response["body"])
+        assert len(response_body["items"]) <= 3
+        user_ids.extend(user["user_id"] for user in response_body["items"])
+        if response_body["next_cursor"] is None:
+            break
+        query_parameters = {"limit": "3", "cursor": response_body["next_cursor"]}
+
+    assert len(user_ids) == 10
+    assert user_ids == sorted(user_ids)
+
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users", None, query_parameters={"cursor": "not-a-cursor"}
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.BAD_REQUEST
+
+    response = lambda_handler(
+        generate_api_lambda_event("/users", None, query_parameters={"limit": "0"}),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_get_users_email_prefix():
+    def search(query_parameters):
+        response = lambda_handler(
+            generate_api_lambda_event(
+                "/users", None, query_parameters=query_parameters
+            ),
+            generate_context(),
+        )
+        return response["statusCode"], json.loads(response["body"] or "null")
+
+    status, page = search({"email_prefix": "admin", "limit": "1"})
+    assert status == HTTPStatus.OK
+    assert [user["email"] for user in page["items"]] == ["admin2@example.com"]
+
+    status, page = search(
+        {"email_prefix": "admin", "limit": "1", "cursor": page["next_cursor"]}
+    )
+    assert [user["email"] for user in page["items"]] == ["admin@example.com"]
+    assert page["next_cursor"] is None
+
+    status, page = search({"email_prefix": "a", "role": "customer"})
+    assert [user["email"] for user in page["items"]] == ["active.customer@example.com"]
+    status, page = search({"email_prefix": "customer", "is_active": "false"})
+    assert page["items"] == []
+
+    status, _ = search({"email_prefix": ""})
+    assert status == HTTPStatus.UNPROCESSABLE_ENTITY
+    status, _ = search({"email_prefix": "a", "cursor": "/"})
+    assert status == HTTPStatus.BAD_REQUEST
 
 
 def test_get_user():
@@ -46,6 +114,128 @@ def test_get_user():
     assert response["statusCode"] == HTTPStatus.NOT_FOUND
 
 
+def test_conditional_get():
+    path = "/users/550e8400-e29b-41d4-a716-446655440008"
+    response = lambda_handler(generate_api_lambda_event(path, None), generate_context())
+    assert response["statusCode"] == HTTPStatus.OK
+    etag = response["headers"]["ETag"]
+
+    response = lambda_handler(
+        generate_api_lambda_event(path, None, headers={"if-none-match": etag}),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.NOT_MODIFIED
+    assert response["headers"]["ETag"] == etag
+    assert not response["body"]
+
+    query_parameters = {"role": "manager", "limit": "3"}
+    response = lambda_handler(
+        generate_api_lambda_event("/users", None, query_parameters=query_parameters),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    page_etag = response["headers"]["ETag"]
+
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users",
+            None,
+            query_parameters=query_parameters,
+            headers={"if-none-match": f'"other", {page_etag}'},
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.NOT_MODIFIED
+
+    # Another filter combination has another ETag
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users",
+            None,
+            query_parameters={"role": "admin"},
+            headers={"if-none-match": page_etag},
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+
+    # Changing a user changes its ETag and the ETag of its pages
+    lambda_handler(
+        generate_api_lambda_event(path, {"active": False}, method="PUT"),
+        generate_context(),
+    )
+    response = lambda_handler(
+        generate_api_lambda_event(path, None, headers={"if-none-match": etag}),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    assert response["headers"]["ETag"] != etag
+
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users",
+            None,
+            query_parameters=query_parameters,
+            headers={"if-none-match": page_etag},
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+
+
+def test_get_users_fields():
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users",
+            None,
+            query_parameters={"fields": "email, user_id", "limit": "2"},
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    response_body = json.loads(response["body"])
+    assert list(response_body["items"][0]) == ["user_id", "email"]
+    assert response_body["next_cursor"] is not None
+    projected_etag = response["headers"]["ETag"]
+
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users/550e8400-e29b-41d4-a716-446655440008",
+            None,
+            query_parameters={"fields": "role"},
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    assert json.loads(response["body"]) == {"role": "manager"}
+
+    # A projection is a different representation, with its own ETag
+    response = lambda_handler(
+        generate_api_lambda_event("/users", None, query_parameters={"limit": "2"}),
+        generate_context(),
+    )
+    assert response["headers"]["ETag"] != projected_etag
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users",
+            None,
+            query_parameters={"fields": "user_id,email", "limit": "2"},
+            headers={"if-none-match": projected_etag},
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.NOT_MODIFIED
+
+    for fields in ("password", ""):
+        response = lambda_handler(
+            generate_api_lambda_event(
+                "/users", None, query_parameters={"fields": fields}
+            ),
+            generate_context(),
+        )
+        assert response["statusCode"] == HTTPStatus.BAD_REQUEST
+
+
 def test_create_user():
     response = lambda_handler(
         generate_api_lambda_event("/users", {"name": "test"}, method="POST"),
@@ -61,6 +251,14 @@ def test_create_user():
     )
     assert response["statusCode"] == HTTPStatus.CREATED
 
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users", {"email": "test@example.com"}, method="POST"
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.BAD_REQUEST
+
 
 def test_update_user():
     response = lambda_handler(
@@ -73,6 +271,21 @@ def test_update_user():
     )
     assert response["statusCode"] == HTTPStatus.UNPROCESSABLE_ENTITY
 
+    # Required fields can be omitted but not unset
+    for update in ({"email": None}, {"role": None}, {"active": None}):
+        response = lambda_handler(
+            generate_api_lambda_event(
+                "/users/550e8400-e29b-41d4-a716-446655440008", update, method="PUT"
+            ),
+            generate_context(),
+        )
+        assert response["statusCode"] == HTTPStatus.UNPROCESSABLE_ENTITY
+    response = lambda_handler(
+        generate_api_lambda_event("/users/550e8400-e29b-41d4-a716-446655440008", None),
+        generate_context(),
+    )
+    assert json.loads(response["body"])["email"] == "manager3@example.com"
+
     response = lambda_handler(
         generate_api_lambda_event(
             "/users/550e8400-e29b-41d4-a716-446655440008",
@@ -85,6 +298,16 @@ def test_update_user():
     response_body = json.loads(response["body"])
     assert response_body["email"] == "test@example.com"
 
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users/550e8400-e29b-41d4-a716-446655440008",
+            {"email": "admin@example.com"},
+            method="PUT",
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.BAD_REQUEST
+
     response = lambda_handler(
         generate_api_lambda_event(
             "/users/550e8400-e29b-41d4-a716-446655441118",
@@ -96,6 +319,87 @@ def test_update_user():
     assert response["statusCode"] == HTTPStatus.NOT_FOUND
 
 
+def test_create_users_batch():
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users:batch",
+            [
+                {"email": "batch1@example.com"},
+                {"email": "not-an-email"},
+                {"email": "admin@example.com"},
+                {"email": "batch2@example.com", "role": "admin"},
+                {"email": "batch1@example.com"},
+            ],
+            method="POST",
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    items = json.loads(response["body"])["items"]
+    assert [item["status"] for item in items] == [
+        HTTPStatus.CREATED,
+        HTTPStatus.UNPROCESSABLE_ENTITY,
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.CREATED,
+        HTTPStatus.BAD_REQUEST,
+    ]
+    assert items[3]["user"]["role"] == "admin"
+
+    response = lambda_handler(
+        generate_api_lambda_event(f"/users/{items[0]['user']['user_id']}", None),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+
+    response = lambda_handler(
+        generate_api_lambda_event("/users:batch", [], method="POST"),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users:batch", [{"email": "a@example.com"}] * 101, method="POST"
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_update_users_batch():
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users:batch",
+            [
+                {"user_id": "550e8400-e29b-41d4-a716-446655440008", "active": False},
+                {"user_id": "550e8400-e29b-41d4-a716-446655440008", "role": "admin"},
+                {"user_id": "550e8400-e29b-41d4-a716-446655441118", "active": False},
+                {
+                    "user_id": "550e8400-e29b-41d4-a716-446655440003",
+                    "email": "admin@example.com",
+                },
+                {"email": "test@example.com"},
+                {"user_id": "550e8400-e29b-41d4-a716-446655440003", "role": None},
+            ],
+            method="PATCH",
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    items = json.loads(response["body"])["items"]
+    assert [item["status"] for item in items] == [
+        HTTPStatus.OK,
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.UNPROCESSABLE_ENTITY,
+        HTTPStatus.UNPROCESSABLE_ENTITY,
+    ]
+    assert items[5]["error"] == "role: Value error, Field can not be null"
+    assert items[0]["user"]["active"] is False
+    assert items[0]["user"]["email"] == "manager3@example.com"
+
+
 def test_delete_user():
     response = lambda_handler(
         generate_api_lambda_event(
@@ -115,3 +419,42 @@ def test_delete_user():
         generate_context(),
     )
     assert response["statusCode"] == HTTPStatus.NOT_FOUND
+
+
+def test_delete_users_batch():
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users:batch",
+            [
+                "550e8400-e29b-41d4-a716-446655440008",
+                "550e8400-e29b-41d4-a716-446655441118",
+                "not-a-uuid",
+                "550e8400-e29b-41d4-a716-446655440008",
+                "550e8400-e29b-41d4-a716-446655440003",
+            ],
+            method="DELETE",
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    items = json.loads(response["body"])["items"]
+    assert [item["status"] for item in items] == [
+        HTTPStatus.NO_CONTENT,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.UNPROCESSABLE_ENTITY,
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.NO_CONTENT,
+    ]
+    assert items[0]["user"] is None
+
+    response = lambda_handler(
+        generate_api_lambda_event("/users/550e8400-e29b-41d4-a716-446655440003", None),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.NOT_FOUND
+
+    response = lambda_handler(
+        generate_api_lambda_event("/users:batch", [], method="DELETE"),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.UNPROCESSABLE_ENTITY
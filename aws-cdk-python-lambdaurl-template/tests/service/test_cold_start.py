@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Import time budget of the handler module in a fresh interpreter
+IMPORT_TIME_BUDGET_MS = 750
+ATTEMPTS = 3
+# Initialized on first use, not when the handler module is imported
+LAZY_MODULES = [
+    "aws_xray_sdk",
+    "aws_lambda_powertools.event_handler.openapi.models",
+    "email_validator",
+]
+
+_IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import service.handlers.demo_lambda
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _import_handler() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parents[2],
+        env={**os.environ, "POWERTOOLS_TRACE_DISABLED": "true"},
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_handler_import_is_lazy():
+    results = [_import_handler() for _ in range(ATTEMPTS)]
+
+    assert results[0]["loaded"] == []
+    fastest = min(result["ms"] for result in results)
+    assert fastest < IMPORT_TIME_BUDGET_MS, f"handler import took {fastest:.0f} ms"
@@ -0,0 +1,144 @@
+import base64
+import gzip
+import inspect
+import json
+from http import HTTPStatus
+from typing import get_origin
+
+import pytest
+from aws_lambda_powertools.event_handler import (
+    LambdaFunctionUrlResolver,
+    Response,
+    content_types,
+)
+from aws_lambda_powertools.event_handler.api_gateway import ResponseBuilder
+
+from service.handlers.compression import (
+    CompressingResponseBuilder,
+    enable_compression,
+    negotiate_encoding,
+)
+from service.handlers.demo_lambda import lambda_handler
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+ITEMS = [{"id": index, "name": f"item {index}"} for index in range(100)]
+
+
+def _build_app() -> LambdaFunctionUrlResolver:
+    app = LambdaFunctionUrlResolver()
+    enable_compression(app, min_size=256)
+
+    @app.get("/items", compress=True)
+    def items():
+        return ITEMS
+
+    @app.get("/items/first", compress=True)
+    def first_item():
+        return ITEMS[0]
+
+    @app.get("/items/raw")
+    def raw_items():
+        return ITEMS
+
+    @app.get("/items/no-compress", compress=True)
+    def items_no_compress():
+        return Response(
+            status_code=HTTPStatus.OK,
+            content_type=content_types.APPLICATION_JSON,
+            body=json.dumps(ITEMS),
+            compress=False,
+        )
+
+    return app
+
+
+def _get(app: LambdaFunctionUrlResolver, path: str, accept_encoding=None) -> dict:
+    headers = {"accept-encoding": accept_encoding} if accept_encoding else None
+    return app.resolve(
+        generate_api_lambda_event(path, None, headers=headers), generate_context()
+    )
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("GZIP;q=0.8, br;q=0.5", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("*", "br"),
+        ("*;q=0.5, br;q=0", "gzip"),
+        ("gzip;q=invalid", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding, ("br", "gzip")) == expected
+
+
+def test_compressed_route():
+    app = _build_app()
+    plain = _get(app, "/items")
+    assert plain["isBase64Encoded"] is False
+    assert "Content-Encoding" not in plain["headers"]
+    assert plain["headers"]["Vary"] == "Accept-Encoding"
+
+    compressed = _get(app, "/items", accept_encoding="gzip, deflate")
+    assert compressed["statusCode"] == HTTPStatus.OK
+    assert compressed["isBase64Encoded"] is True
+    assert compressed["headers"]["Content-Encoding"] == "gzip"
+    assert compressed["headers"]["Content-Type"] == "application/json"
+    body = gzip.decompress(base64.b64decode(compressed["body"]))
+    assert body.decode() == plain["body"]
+    assert len(base64.b64decode(compressed["body"])) < len(plain["body"]) / 4
+
+
+def test_uncompressed_responses():
+    app = _build_app()
+    # Under the size threshold
+    small = _get(app, "/items/first", accept_encoding="gzip")
+    assert small["isBase64Encoded"] is False
+    assert json.loads(small["body"]) == ITEMS[0]
+    # Routes without compress=True, and responses with compress=False
+    for path in ["/items/raw", "/items/no-compress"]:
+        response = _get(app, path, accept_encoding="gzip")
+        assert response["isBase64Encoded"] is False
+        assert "Content-Encoding" not in response["headers"]
+        assert json.loads(response["body"]) == ITEMS
+
+
+def test_get_users_compressed():
+    event = generate_api_lambda_event("/users", None, query_parameters={"limit": "100"})
+    plain = lambda_handler(event, generate_context())
+
+    event["headers"]["accept-encoding"] = "gzip"
+    compressed = lambda_handler(event, generate_context())
+    assert compressed["headers"]["Content-Encoding"] == "gzip"
+    # The gzip body is another representation of the page
+    etag = plain["headers"]["ETag"]
+    assert not etag.startswith("W/")
+    assert compressed["headers"]["ETag"] == f"W/{etag}"
+    body = gzip.decompress(base64.b64decode(compressed["body"])).decode()
+    assert json.loads(body) == json.loads(plain["body"])
+
+    # Weak ETags still match, the 304 carries the ETag of the 200
+    event["headers"]["if-none-match"] = compressed["headers"]["ETag"]
+    not_modified = lambda_handler(event, generate_context())
+    assert not_modified["statusCode"] == HTTPStatus.NOT_MODIFIED
+    assert not_modified["headers"]["ETag"] == compressed["headers"]["ETag"]
+
+
+def test_powertools_private_api():
+    # enable_compression replaces the response builder of the resolver and
+    # overrides `ResponseBuilder._route`, private members Powertools may
+    # change in any release
+    app = LambdaFunctionUrlResolver()
+    builder = app._response_builder_class
+    assert (get_origin(builder) or builder) is ResponseBuilder
+    parameters = inspect.signature(ResponseBuilder._route).parameters
+    assert list(parameters) == ["self", "event", "cors"]
+
+    enable_compression(app)
+    assert app._response_builder_class.func is CompressingResponseBuilder
@@ -0,0 +1,290 @@
+import json
+from http import HTTPStatus
+from uuid import uuid4
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from service.dal import EmailAlreadyExistsError, UserNotFoundError
+from service.dal.dynamodb import DynamoDBUserRepository, get_dynamodb_client
+from service.handlers.demo_lambda import lambda_handler
+from service.logic.etag import collection_etag, user_etag
+from service.models.users import User, UserRole
+from tests.service.utils import (
+    create_users_table,
+    generate_api_lambda_event,
+    generate_context,
+)
+
+TABLE_NAME = "users"
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("USERS_REPOSITORY", "dynamodb")
+    monkeypatch.setenv("USERS_TABLE_NAME", TABLE_NAME)
+    with mock_aws():
+        get_dynamodb_client.cache_clear()
+        create_users_table(boto3.client("dynamodb"), TABLE_NAME)
+        yield DynamoDBUserRepository(TABLE_NAME)
+    get_dynamodb_client.cache_clear()
+
+
+def test_create_and_get_user(repository):
+    user = User(email="new@example.com", role=UserRole.admin)
+    repository.create_user(user)
+
+    assert repository.get_user(user.user_id) == user
+    assert repository.get_user(uuid4()) is None
+
+    with pytest.raises(EmailAlreadyExistsError):
+        repository.create_user(User(email="new@example.com", role=UserRole.customer))
+
+
+def test_list_users(repository):
+    users = [
+        User(email=f"user{i}@example.com", role=role, active=active)
+        for i, (role, active) in enumerate(
+            [
+                (UserRole.admin, True),
+                (UserRole.customer, True),
+                (UserRole.customer, False),
+                (UserRole.manager, False),
+            ]
+        )
+    ]
+    for user in users:
+        repository.create_user(user)
+
+    users.sort(key=lambda user: user.user_id)
+    assert repository.list_users() == (users, None)
+    customers, _ = repository.list_users(role=UserRole.customer)
+    assert {user.email for user in customers} == {
+        "user1@example.com",
+        "user2@example.com",
+    }
+    assert len(repository.list_users(active=False)[0]) == 2
+    assert repository.list_users(role=UserRole.customer, active=False)[0] == [
+        user for user in users if user.email == "user2@example.com"
+    ]
+
+
+def test_list_users_pages(repository):
+    users = sorted(
+        (User(email=f"user{i}@example.com", role=UserRole.admin) for i in range(7)),
+        key=lambda user: user.user_id,
+    )
+    for user in users:
+        repository.create_user(user)
+
+    first_page, after = repository.list_users(limit=3)
+    assert first_page == users[:3]
+    assert after == users[2].user_id
+
+    second_page, after = repository.list_users(limit=3, after=after)
+    assert second_page == users[3:6]
+
+    last_page, after = repository.list_users(limit=3, after=after)
+    assert last_page == users[6:]
+    assert after is None
+
+    assert (
+        repository.list_users(role=UserRole.admin, active=True, limit=4)[0]
+        == (users[:4])
+    )
+
+
+def test_search_users(repository):
+    users = [
+        User(email=f"{name}@example.com", role=role)
+        for name, role in [
+            ("ann", UserRole.admin),
+            ("anna", UserRole.customer),
+            ("annie", UserRole.customer),
+            ("bob", UserRole.customer),
+        ]
+    ]
+    for user in users:
+        repository.create_user(user)
+
+    first_page, after = repository.search_users("ann", limit=2)
+    assert first_page == users[:2]
+    assert after == "anna@example.com"
+    assert repository.search_users("ann", limit=2, after=after) == ([users[2]], None)
+
+    assert repository.search_users("ann", role=UserRole.customer, limit=1) == (
+        [users[1]],
+        "anna@example.com",
+    )
+    assert repository.search_users("ann", active=False) == ([], None)
+    assert repository.search_users("b") == ([users[3]], None)
+
+    assert repository.search_users_page("ann", limit=2).etag == collection_etag(
+        [user_etag(user) for user in users[:2]], "anna@example.com"
+    )
+
+
+def test_etags(repository):
+    user = User(email="etag@example.com", role=UserRole.admin)
+    repository.create_user(user)
+
+    entry = repository.get_user_entry(user.user_id)
+    assert entry.etag == user_etag(user)
+    assert entry.load() == user
+    assert repository.get_user_entry(uuid4()) is None
+
+    page = repository.list_users_page(role=UserRole.admin)
+    assert page.etag == collection_etag([user_etag(user)])
+    assert page.next_key is None
+    assert page.load() == [user]
+    assert repository.list_users_page().etag == page.etag
+    assert repository.list_users_page(active=False).etag != page.etag
+
+    repository.update_user(user.model_copy(update={"active": False}))
+    assert repository.list_users_page(role=UserRole.admin).etag != page.etag
+
+
+def test_update_user(repository):
+    first = User(email="first@example.com", role=UserRole.admin)
+    second = User(email="second@example.com", role=UserRole.admin)
+    repository.create_user(first)
+    repository.create_user(second)
+
+    with pytest.raises(EmailAlreadyExistsError):
+        repository.update_user(second.model_copy(update={"email": first.email}))
+
+    repository.update_user(second.model_copy(update={"email": "third@example.com"}))
+    assert repository.get_user(second.user_id).email == "third@example.com"
+    # The old email is released
+    repository.create_user(User(email="second@example.com", role=UserRole.customer))
+
+    with pytest.raises(UserNotFoundError):
+        repository.update_user(User(email="missing@example.com", role=UserRole.admin))
+
+
+def test_batch_writes(repository):
+    existing = User(email="existing@example.com", role=UserRole.admin)
+    repository.create_user(existing)
+
+    users = [
+        User(email="batch1@example.com", role=UserRole.customer),
+        User(email="existing@example.com", role=UserRole.customer),
+        User(email="batch1@example.com", role=UserRole.customer),
+    ]
+    errors = repository.create_users(users)
+    assert errors[0] is None
+    assert isinstance(errors[1], EmailAlreadyExistsError)
+    assert isinstance(errors[2], EmailAlreadyExistsError)
+    assert repository.get_users([users[0].user_id, users[1].user_id]) == {
+        users[0].user_id: users[0]
+    }
+
+    errors = repository.update_users(
+        [
+            # Releases its email for the next user of the batch
+            existing.model_copy(update={"email": "renamed@example.com"}),
+            users[0].model_copy(update={"email": "existing@example.com"}),
+            User(email="missing@example.com", role=UserRole.admin),
+        ]
+    )
+    assert errors[:2] == [None, None]
+    assert isinstance(errors[2], UserNotFoundError)
+    assert repository.get_user(users[0].user_id).email == "existing@example.com"
+
+
+def test_delete_user(repository):
+    user = User(email="delete@example.com", role=UserRole.admin)
+    repository.create_user(user)
+    repository.delete_user(user.user_id)
+
+    assert repository.get_user(user.user_id) is None
+    with pytest.raises(UserNotFoundError):
+        repository.delete_user(user.user_id)
+    repository.create_user(User(email="delete@example.com", role=UserRole.admin))
+
+
+def test_batch_delete(repository):
+    users = [
+        User(email=f"delete{i}@example.com", role=UserRole.admin) for i in range(2)
+    ]
+    repository.create_users(users)
+
+    missing = User(email="missing@example.com", role=UserRole.admin)
+    errors = repository.delete_users(
+        [users[0].user_id, missing.user_id, users[1].user_id]
+    )
+    assert errors[0] is None
+    assert isinstance(errors[1], UserNotFoundError)
+    assert errors[2] is None
+    assert repository.get_users(user.user_id for user in users) == {}
+    # The emails are released
+    repository.create_users(users)
+
+
+def test_handler_routes(repository):
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users", {"email": "test@example.com"}, method="POST"
+        ),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.CREATED
+    user_id = json.loads(response["body"])["user_id"]
+
+    response = lambda_handler(
+        generate_api_lambda_event(f"/users/{user_id}", None), generate_context()
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    assert json.loads(response["body"])["email"] == "test@example.com"
+
+    response = lambda_handler(
+        generate_api_lambda_event(
+            "/users", None, query_parameters={"role": "customer"}
+        ),
+        generate_context(),
+    )
+    assert len(json.loads(response["body"])["items"]) == 1
+
+    response = lambda_handler(
+        generate_api_lambda_event(f"/users/{user_id}", None, method="DELETE"),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.NO_CONTENT
+
+
+def test_handler_round_trips(repository):
+    user = User(email="trips@example.com", role=UserRole.admin)
+    repository.create_user(user)
+    operations = []
+    get_dynamodb_client().meta.events.register(
+        "before-call.dynamodb",
+        lambda model, **kwargs: operations.append(model.name),
+    )
+
+    def get(path, headers=None):
+        operations.clear()
+        response = lambda_handler(
+            generate_api_lambda_event(path, None, headers=headers),
+            generate_context(),
+        )
+        return response, list(operations)
+
+    response, calls = get(f"/users/{user.user_id}")
+    assert response["statusCode"] == HTTPStatus.OK
+    assert calls == ["GetItem"]
+    response, calls = get(
+        f"/users/{user.user_id}", {"if-none-match": response["headers"]["ETag"]}
+    )
+    assert response["statusCode"] == HTTPStatus.NOT_MODIFIED
+    assert calls == ["GetItem"]
+
+    response, calls = get("/users")
+    assert response["statusCode"] == HTTPStatus.OK
+    assert calls == ["Query", "BatchGetItem"]
+    response, calls = get("/users", {"if-none-match": response["headers"]["ETag"]})
+    assert response["statusCode"] == HTTPStatus.NOT_MODIFIED
+    assert calls == ["Query"]
@@ -0,0 +1,88 @@
+import base64
+import gzip
+import json
+from http import HTTPStatus
+
+import pytest
+from aws_lambda_powertools.event_handler import LambdaFunctionUrlResolver
+
+from service.handlers.demo_lambda import API_DESCRIPTION, API_TITLE, app
+from service.handlers.demo_lambda import lambda_handler
+from service.handlers.swagger import (
+    OPENAPI_ARTIFACT,
+    accepts_gzip,
+    enable_swagger_artifacts,
+    write_swagger_artifacts,
+)
+from tests.service.utils import generate_api_lambda_event, generate_context
+
+
+def _swagger_event(query_parameters=None, accept_encoding=None):
+    headers = {"accept-encoding": accept_encoding} if accept_encoding else None
+    return generate_api_lambda_event(
+        "/swagger", None, query_parameters=query_parameters, headers=headers
+    )
+
+
+def test_swagger():
+    response = lambda_handler(_swagger_event(), generate_context())
+    assert response["statusCode"] == HTTPStatus.OK
+    assert response["headers"]["Content-Type"] == "text/html"
+    assert "Content-Encoding" not in response["headers"]
+
+    response = lambda_handler(
+        _swagger_event(query_parameters={"format": "json"}), generate_context()
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    schema = json.loads(response["body"])
+    assert "/users" in schema["paths"]
+    assert "/swagger" not in schema["paths"]
+    assert schema["components"]["schemas"]["User"]["properties"]["email"] == {
+        "type": "string",
+        "format": "email",
+        "title": "Email",
+    }
+
+
+def test_swagger_artifacts(tmp_path):
+    write_swagger_artifacts(app, tmp_path, title=API_TITLE, description=API_DESCRIPTION)
+    # The artifact is served as is, a stale one shows it is not regenerated
+    (tmp_path / OPENAPI_ARTIFACT).write_bytes(gzip.compress(b'{"openapi": "3.0"}'))
+    docs = LambdaFunctionUrlResolver()
+    enable_swagger_artifacts(
+        docs, path="/swagger", title="Docs", description="", artifacts_folder=tmp_path
+    )
+
+    response = docs.resolve(
+        _swagger_event({"format": "json"}, accept_encoding="gzip, deflate, br"),
+        generate_context(),
+    )
+    assert response["statusCode"] == HTTPStatus.OK
+    assert response["isBase64Encoded"] is True
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert response["headers"]["Vary"] == "Accept-Encoding"
+    body = gzip.decompress(base64.b64decode(response["body"]))
+    assert json.loads(body) == {"openapi": "3.0"}
+
+    response = docs.resolve(_swagger_event({"format": "json"}), generate_context())
+    assert json.loads(response["body"]) == {"openapi": "3.0"}
+
+    response = docs.resolve(_swagger_event(accept_encoding="gzip"), generate_context())
+    page = gzip.decompress(base64.b64decode(response["body"])).decode()
+    assert API_DESCRIPTION in page
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, False),
+        ("", False),
+        ("gzip", True),
+        ("deflate, GZIP;q=0.5", True),
+        ("br;q=1.0, gzip;q=0", False),
+        ("*", True),
+        ("identity", False),
+    ],
+)
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) is expected
@@ -0,0 +1,148 @@
+from uuid import UUID
+
+import pytest
+
+from service.logic.data import user_records
+from service.logic.store import UserStore, get_user_store
+from service.models.users import User, UserRole
+
+
+def test_store_is_built_once():
+    assert get_user_store() is get_user_store()
+    assert len(get_user_store()) == len(user_records)
+
+
+def test_store_lookups():
+    store = UserStore.from_records(user_records)
+
+    user = store.get(UUID("550e8400-e29b-41d4-a716-446655440008"))
+    assert user.email == "manager3@example.com"
+    assert store.get(UUID("550e8400-e29b-41d4-a716-446655441118")) is None
+
+    assert store.get_by_email("admin@example.com").role == UserRole.admin
+    assert store.email_exists("admin@example.com")
+    assert not store.email_exists("nobody@example.com")
+
+
+def test_store_filter():
+    store = UserStore.from_records(user_records)
+
+    assert len(store.filter()) == len(user_records)
+    assert len(store.filter(active=False)) == 2
+    assert all(
+        user.role == UserRole.customer for user in store.filter(UserRole.customer)
+    )
+    assert len(store.filter(role=UserRole.customer, active=False)) == 2
+    assert store.filter(role=UserRole.admin, active=False) == []
+
+
+def test_store_filter_pages():
+    store = UserStore.from_records(user_records)
+    all_users = store.filter()
+    assert [user.user_id for user in all_users] == sorted(
+        user.user_id for user in all_users
+    )
+
+    first_page = store.filter(limit=4)
+    second_page = store.filter(limit=4, after=first_page[-1].user_id)
+    assert first_page + second_page == all_users[:8]
+
+    customers = store.filter(role=UserRole.customer)
+    assert (
+        store.filter(role=UserRole.customer, after=customers[0].user_id)
+        == (customers[1:])
+    )
+
+
+def test_store_search():
+    store = UserStore.from_records(user_records)
+
+    def emails(users):
+        return [user.email for user in users]
+
+    assert emails(store.search("j")) == [
+        "jane.smith@example.com",
+        "john.doe@example.com",
+    ]
+    assert emails(store.search("admin", limit=1)) == ["admin2@example.com"]
+    assert emails(store.search("admin", after="admin2@example.com")) == [
+        "admin@example.com"
+    ]
+    assert emails(store.search("customer", active=False)) == []
+    assert emails(store.search("a", role=UserRole.customer)) == [
+        "active.customer@example.com"
+    ]
+    assert store.search("nobody") == []
+    assert emails(store.search("")) == sorted(
+        record["email"] for record in user_records
+    )
+
+    user = User(email="jack@example.com", role=UserRole.admin)
+    store.add(user)
+    assert emails(store.search("ja")) == ["jack@example.com", "jane.smith@example.com"]
+    store.replace(user.model_copy(update={"email": "zed@example.com"}))
+    assert emails(store.search("ja")) == ["jane.smith@example.com"]
+    store.remove(user.user_id)
+    assert store.search("zed") == []
+
+
+def test_store_rejects_duplicate_email():
+    users = [
+        User(email="dup@example.com", role=UserRole.admin),
+        User(email="dup@example.com", role=UserRole.customer),
+    ]
+    with pytest.raises(ValueError):
+        UserStore(users)
+
+
+@pytest.mark.parametrize("update", [{"email": None}, {"role": None}, {"active": None}])
+def test_store_rejects_invalid_user(update):
+    store = UserStore.from_records(user_records)
+    user = store.get(UUID("550e8400-e29b-41d4-a716-446655440008"))
+    version = store.version
+
+    with pytest.raises(ValueError):
+        store.replace(user.model_copy(update=update))
+    with pytest.raises(ValueError):
+        store.add(
+            User(email="new@example.com", role=UserRole.admin).model_copy(update=update)
+        )
+    assert store.version == version
+    assert store.get(user.user_id) == user
+    assert store.get_by_email(user.email) == user
+    assert len(store) == len(user_records)
+
+
+def test_store_changes():
+    store = UserStore.from_records(user_records)
+    admins = store.filter(role=UserRole.admin)
+    # Cache the masks of the filters, they must follow the changes
+    assert store.filter(active=True) and store.filter(role=UserRole.customer)
+
+    user = User(email="new@example.com", role=UserRole.admin, active=False)
+    store.add(user)
+    assert store.get(user.user_id) == user
+    assert user in store.filter(role=UserRole.admin)
+    assert user not in store.filter(active=True)
+    with pytest.raises(ValueError):
+        store.add(user)
+
+    updated = user.model_copy(
+        update={"email": "renamed@example.com", "role": UserRole.customer}
+    )
+    store.replace(updated)
+    assert store.get(user.user_id) == updated
+    assert store.get_by_email("renamed@example.com") == updated
+    assert not store.email_exists("new@example.com")
+    assert updated in store.filter(role=UserRole.customer)
+    assert store.filter(role=UserRole.admin) == admins
+    with pytest.raises(ValueError):
+        store.replace(updated.model_copy(update={"email": "admin@example.com"}))
+
+    assert store.remove(user.user_id) == updated
+    assert store.get(user.user_id) is None
+    assert not store.email_exists("renamed@example.com")
+    assert len(store) == len(user_records)
+    assert [found.user_id for found in store.filter()] == sorted(
+        UUID(record["user_id"]) for record in user_records
+    )
@@ -17,9 +17,10 @@ def generate_context() -> LambdaContext:
 
 def generate_api_lambda_event(
     path: str,
-    body: Optional[dict[str, Any]],
+    body: Optional[Any],
     query_parameters: Optional[dict[str, str]] = None,
     method: str = "GET",
+    headers: Optional[dict[str, str]] = None,
 ) -> dict[str, Any]:
     return {
         "version": "2.0",
@@ -27,7 +28,7 @@ def generate_api_lambda_event(
         "rawPath": path,
         "rawQueryString": "",
         "cookies": ["cookie1", "cookie2"],
-        "headers": {"header1": "value1", "header2": "value1,value2"},
+        "headers": {"header1": "value1", "header2": "value1,value2", **(headers or {})},
         "queryStringParameters": query_parameters if query_parameters else {},
         "requestContext": {
             "accountId": "123456789012",
@@ -64,3 +65,68 @@ def generate_api_lambda_event(
         "isBase64Encoded": False,
         "stageVariables": None,
     }
+
+
+def create_users_table(client: Any, table_name: str) -> None:
+    """
+    Create the users table with the same layout as the CDK stack
+    """
+    client.create_table(
+        TableName=table_name,
+        BillingMode="PAY_PER_REQUEST",
+        KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "user_id", "AttributeType": "S"},
+            {"AttributeName": "role", "AttributeType": "S"},
+            {"AttributeName": "active_key", "AttributeType": "S"},
+            {"AttributeName": "entity", "AttributeType": "S"},
+            {"AttributeName": "email", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "user-index",
+                "KeySchema": [
+                    {"AttributeName": "entity", "KeyType": "HASH"},
+                    {"AttributeName": "user_id", "KeyType": "RANGE"},
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": ["etag"],
+                },
+            },
+            {
+                "IndexName": "role-index",
+                "KeySchema": [
+                    {"AttributeName": "role", "KeyType": "HASH"},
+                    {"AttributeName": "user_id", "KeyType": "RANGE"},
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": ["active_key", "etag"],
+                },
+            },
+            {
+                "IndexName": "active-index",
+                "KeySchema": [
+                    {"AttributeName": "active_key", "KeyType": "HASH"},
+                    {"AttributeName": "user_id", "KeyType": "RANGE"},
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": ["etag"],
+                },
+            },
+            {
+                "IndexName": "email-index",
+                "KeySchema": [
+                    {"AttributeName": "entity", "KeyType": "HASH"},
+                    {"AttributeName": "email", "KeyType": "RANGE"},
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": ["role", "active_key", "etag"],
+                },
+            },
+        ],
+    )
@@ -4,10 +4,10 @@ Service stack
 
 import getpass
 
-from aws_cdk import Stack, Tags, Duration, CfnOutput, aws_lambda_event_sources
+from aws_cdk import Stack, Tags, Duration, CfnOutput, Size, aws_lambda_event_sources
 from constructs import Construct
 from aws_cdk import aws_apigateway as apigw, aws_sns as sns, aws_sns_subscriptions as subs, aws_sqs as sqs, \
-    aws_iam as iam
+    aws_iam as iam, aws_dynamodb as dynamodb, RemovalPolicy
 
 import infrastructure.constants as constants
 from infrastructure.lambdas import (
@@ -48,6 +48,7 @@ class TicketRoutingStack(Stack):
                 throttling_rate_limit=2,
                 throttling_burst_limit=10,
             ),
+            min_compression_size=Size.bytes(constants.API_MIN_COMPRESSION_SIZE),
         )
         # Add this after creating the API Gateway
         CfnOutput(
@@ -76,8 +77,81 @@ class TicketRoutingStack(Stack):
             # The name of the authorizer
             authorizer_name="RequestAuthorizer",
             # The TTL of the cache
-            results_cache_ttl=Duration.seconds(constants.AUTHORIZER_CACHE_TTL),
+            results_cache_ttl=Duration.seconds(
+                int(
+                    self.node.try_get_context("authorizer_cache_ttl")
+                    or constants.AUTHORIZER_CACHE_TTL
+                )
+            ),
+        )
+
+        # Ticket history, written by the channel processors and read by GET /tickets
+        ticket_table = dynamodb.Table(
+            self,
+            "TicketTable",
+            partition_key=dynamodb.Attribute(
+                name=constants.TICKET_TABLE_PARTITION_KEY,
+                type=dynamodb.AttributeType.STRING,
+            ),
+            sort_key=dynamodb.Attribute(
+                name=constants.TICKET_TABLE_SORT_KEY,
+                type=dynamodb.AttributeType.STRING,
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+        ticket_table.add_global_secondary_index(
+            index_name=constants.TICKET_TABLE_TYPE_INDEX,
+            partition_key=dynamodb.Attribute(
+                name=constants.TICKET_TABLE_TYPE_INDEX_PARTITION_KEY,
+                type=dynamodb.AttributeType.STRING,
+            ),
+            sort_key=dynamodb.Attribute(
+                name=constants.TICKET_TABLE_SORT_KEY,
+                type=dynamodb.AttributeType.STRING,
+            ),
+            projection_type=dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=["type", "subject", "message", "created_at"],
+        )
+        ticket_table_environment = {"TICKET_TABLE_NAME": ticket_table.table_name}
+
+        # Recent tickets shared by the user-tickets containers, invalidated by the
+        # channel processors when a user creates a ticket
+        ticket_cache_table = None
+        if self.node.try_get_context("shared_ticket_cache") not in (False, "false"):
+            ticket_cache_table = dynamodb.Table(
+                self,
+                "TicketCacheTable",
+                partition_key=dynamodb.Attribute(
+                    name=constants.TICKET_CACHE_TABLE_PARTITION_KEY,
+                    type=dynamodb.AttributeType.STRING,
+                ),
+                time_to_live_attribute=constants.TICKET_CACHE_TABLE_TTL_ATTRIBUTE,
+                billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+                removal_policy=RemovalPolicy.DESTROY,
+            )
+            ticket_table_environment["TICKET_CACHE_TABLE_NAME"] = (
+                ticket_cache_table.table_name
+            )
+
+        # Processed SNS notifications, so the channel processors skip the
+        # redelivered ones
+        idempotency_table = dynamodb.Table(
+            self,
+            "IdempotencyTable",
+            partition_key=dynamodb.Attribute(
+                name=constants.IDEMPOTENCY_TABLE_PARTITION_KEY,
+                type=dynamodb.AttributeType.STRING,
+            ),
+            time_to_live_attribute=constants.IDEMPOTENCY_TABLE_TTL_ATTRIBUTE,
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
         )
+        channel_environment = {
+            **ticket_table_environment,
+            "IDEMPOTENCY_TABLE_NAME": idempotency_table.table_name,
+            "IDEMPOTENCY_TTL": str(constants.IDEMPOTENCY_TTL),
+        }
 
         # Create the requests resource
         api_resource = api.root.add_resource("tickets")
@@ -91,7 +165,13 @@ class TicketRoutingStack(Stack):
             f"{construct_id}-user-tickets",
             "tickets",
             layers=[lambda_layer.layer],
+            environment=ticket_table_environment,
         )
+        ticket_table.grant_read_data(lambda_get_requests_constructor.lambda_function)
+        if ticket_cache_table is not None:
+            ticket_cache_table.grant_read_write_data(
+                lambda_get_requests_constructor.lambda_function
+            )
         api_resource.add_method(
             "GET",
             apigw.LambdaIntegration(
@@ -104,6 +184,15 @@ class TicketRoutingStack(Stack):
         topic = sns.Topic(self, "TicketRouting", display_name="TicketRouting")
 
         # Create SQS queues and lambda functions to process the queues
+        raw_message_delivery = (
+            self.node.try_get_context("raw_message_delivery") in (True, "true")
+            or constants.SNS_RAW_MESSAGE_DELIVERY
+        )
+        processor_environment = {
+            "PROCESSOR_MAX_CONCURRENCY": str(constants.PROCESSOR_MAX_CONCURRENCY),
+            "PROCESSOR_RECORD_TIMEOUT": str(constants.PROCESSOR_RECORD_TIMEOUT),
+            "SNS_RAW_MESSAGE_DELIVERY": str(raw_message_delivery).lower(),
+        }
         analytics_queue = sqs.Queue(
             self, "AnalyticsQueue", queue_name=f"{construct_id}-analytics"
         )
@@ -113,6 +202,7 @@ class TicketRoutingStack(Stack):
             f"{construct_id}-analytics-processor",
             "processors.analytics",
             layers=[lambda_layer.layer],
+            environment=processor_environment,
         )
 
         priority_tickets_queue = sqs.Queue(
@@ -126,7 +216,20 @@ class TicketRoutingStack(Stack):
             f"{construct_id}-priority-channel-processor",
             "processors.priority_channel",
             layers=[lambda_layer.layer],
+            environment={
+                **processor_environment,
+                **channel_environment,
+                # Gold tickets are sent to the webhook when it is set
+                "WEBHOOK_URL": self.node.try_get_context("webhook_url") or "",
+                "WEBHOOK_MAX_CONNECTIONS": str(constants.WEBHOOK_MAX_CONNECTIONS),
+                "WEBHOOK_TIMEOUT": str(constants.WEBHOOK_TIMEOUT),
+                "WEBHOOK_RETRIES": str(constants.WEBHOOK_RETRIES),
+            },
         )
+        ticket_table.grant_write_data(priority_channel_constructor.lambda_function)
+        idempotency_table.grant_read_write_data(priority_channel_constructor.lambda_function)
+        if ticket_cache_table is not None:
+            ticket_cache_table.grant_write_data(priority_channel_constructor.lambda_function)
 
         general_tickets_queue = sqs.Queue(
             self,
@@ -139,31 +242,51 @@ class TicketRoutingStack(Stack):
             f"{construct_id}-general-channel-processor",
             "processors.general_channel",
             layers=[lambda_layer.layer],
+            environment={**processor_environment, **channel_environment},
         )
+        ticket_table.grant_write_data(general_channel_constructor.lambda_function)
+        idempotency_table.grant_read_write_data(general_channel_constructor.lambda_function)
+        if ticket_cache_table is not None:
+            ticket_cache_table.grant_write_data(general_channel_constructor.lambda_function)
 
-        # Set up event source mappings
+        # Set up event source mappings, the processors return the failed records
+        # of a batch (partial batch response), only those go back to the queue
         analytics_constructor.lambda_function.add_event_source(
-            aws_lambda_event_sources.SqsEventSource(analytics_queue, batch_size=10)
+            aws_lambda_event_sources.SqsEventSource(
+                analytics_queue,
+                batch_size=constants.PROCESSOR_BATCH_SIZE,
+                report_batch_item_failures=True,
+            )
         )
         priority_channel_constructor.lambda_function.add_event_source(
             aws_lambda_event_sources.SqsEventSource(
-                priority_tickets_queue, batch_size=10
+                priority_tickets_queue,
+                batch_size=constants.PROCESSOR_BATCH_SIZE,
+                report_batch_item_failures=True,
             )
         )
         general_channel_constructor.lambda_function.add_event_source(
             aws_lambda_event_sources.SqsEventSource(
-                general_tickets_queue, batch_size=10
+                general_tickets_queue,
+                batch_size=constants.PROCESSOR_BATCH_SIZE,
+                report_batch_item_failures=True,
             )
         )
 
-        # Subscribe the queues to the SNS topic with appropriate filter policies
+        # Subscribe the queues to the SNS topic with appropriate filter policies,
+        # which match the message attributes with or without raw message delivery
         # All tickets
-        topic.add_subscription(subs.SqsSubscription(analytics_queue))
+        topic.add_subscription(
+            subs.SqsSubscription(
+                analytics_queue, raw_message_delivery=raw_message_delivery
+            )
+        )
 
         # Only gold tier tickets
         topic.add_subscription(
             subs.SqsSubscription(
                 priority_tickets_queue,
+                raw_message_delivery=raw_message_delivery,
                 filter_policy={
                     "customer_tier": sns.SubscriptionFilter.string_filter(allowlist=["gold"])
                 },
@@ -173,6 +296,7 @@ class TicketRoutingStack(Stack):
         topic.add_subscription(
             subs.SqsSubscription(
                 general_tickets_queue,
+                raw_message_delivery=raw_message_delivery,
                 filter_policy={
                     "customer_tier": sns.SubscriptionFilter.string_filter(denylist=["gold"])
                 },
@@ -199,8 +323,11 @@ class TicketRoutingStack(Stack):
                 title="TicketCreateModel",
                 type=apigw.JsonSchemaType.OBJECT,
                 properties={
-                    "type": apigw.JsonSchemaType.STRING,
-                    "message": apigw.JsonSchemaType.STRING,
+                    # The channel processors reject other types
+                    "type": apigw.JsonSchema(
+                        type=apigw.JsonSchemaType.STRING, enum=constants.TICKET_TYPES
+                    ),
+                    "message": apigw.JsonSchema(type=apigw.JsonSchemaType.STRING),
                 },
                 required=["message", "type"],
             ),
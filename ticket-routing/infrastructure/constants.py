@@ -17,4 +17,58 @@ HANDLER_LAMBDA_TIMEOUT = 10
 HANDLER_LAMBDA_MEMORY_SIZE = 128
 
 # Authorizer settings
-AUTHORIZER_CACHE_TTL = 5
+# Policies cover every route of the caller, so API Gateway can reuse them for
+# the whole TTL; override it with `cdk deploy -c authorizer_cache_ttl=<seconds>`.
+# API Gateway ignores the `exp` of JWTs, a cached Allow outlives its token by
+# up to the TTL: keep it at or below the shortest JWT lifetime (see README.md)
+AUTHORIZER_CACHE_TTL = 300
+
+# Response compression
+# API Gateway compresses the responses of at least this size (bytes) for the
+# clients that send Accept-Encoding. The functions do not compress themselves:
+# a REST API only decodes their base64 bodies for its binary media types, and
+# "*/*" would make POST /tickets bodies binary, which API Gateway does not pass
+# through the SNS mapping template
+API_MIN_COMPRESSION_SIZE = 1024
+
+# Ticket types accepted by POST /tickets, the values of `TicketType` in
+# service/models/ticket_message.py
+TICKET_TYPES = ["finance", "general"]
+
+# Ticket history table
+TICKET_TABLE_PARTITION_KEY = "user_id"
+# "<created_at>#<request_id>", unique among the tickets of a user
+TICKET_TABLE_SORT_KEY = "created_id"
+# Tickets of a user and type, partitioned by "<user_id>#<type>"
+TICKET_TABLE_TYPE_INDEX = "type-index"
+TICKET_TABLE_TYPE_INDEX_PARTITION_KEY = "user_type"
+
+# Shared ticket cache, opt out with `cdk deploy -c shared_ticket_cache=false`
+TICKET_CACHE_TABLE_PARTITION_KEY = "user_id"
+TICKET_CACHE_TABLE_TTL_ATTRIBUTE = "expires_at"
+
+# Channel processors
+# Records of an SQS batch handled at the same time, at most the batch size
+PROCESSOR_BATCH_SIZE = 10
+PROCESSOR_MAX_CONCURRENCY = 10
+# Seconds before a record fails and goes back to the queue, below the timeout
+# of the function so the other records of the batch are still reported
+PROCESSOR_RECORD_TIMEOUT = 5
+# SNS raw message delivery to the queues: the SQS body is the ticket message
+# instead of an SNS envelope around it; override it with
+# `cdk deploy -c raw_message_delivery=true`
+SNS_RAW_MESSAGE_DELIVERY = False
+
+# Idempotency table of the channel processors, one item per processed SNS
+# notification, kept for IDEMPOTENCY_TTL seconds
+IDEMPOTENCY_TABLE_PARTITION_KEY = "id"
+IDEMPOTENCY_TABLE_TTL_ATTRIBUTE = "expiration"
+IDEMPOTENCY_TTL = 3600
+
+# Webhook of the priority channel, set it with `cdk deploy -c webhook_url=<url>`
+# Pooled keep-alive connections, one per concurrent record
+WEBHOOK_MAX_CONNECTIONS = PROCESSOR_MAX_CONCURRENCY
+# Seconds per attempt; with the retries and their backoff, a ticket takes at
+# most ~3.3 s, below PROCESSOR_RECORD_TIMEOUT
+WEBHOOK_TIMEOUT = 1
+WEBHOOK_RETRIES = 2
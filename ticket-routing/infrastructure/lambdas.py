@@ -75,6 +75,7 @@ class LambdaConstruct(Construct):
                 "POWERTOOLS_SERVICE_NAME": self.construct_id,  # for logger, tracer and metrics
                 "POWERTOOLS_TRACE_DISABLED": "true",  # for tracer
                 "AWS_LAMBDA_LOG_LEVEL": constants.LOG_LEVEL,  # for logger
+                **kwargs.get("environment", {}),
             },
             tracing=_lambda.Tracing.DISABLED,
             retry_attempts=0,
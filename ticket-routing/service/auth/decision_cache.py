@@ -0,0 +1,108 @@
+"""
+Cache of authorization decisions
+
+API Gateway caches policies per token, but every cold container and every
+expired gateway entry runs the authorizer again. The decisions of a warm
+container are kept in a bounded LRU cache keyed by token digest:
+    - Allow decisions for `DECISION_CACHE_TTL` seconds (default 60), or
+      less when the token expires sooner
+    - Deny decisions for `DECISION_CACHE_DENY_TTL` seconds (default 10), so
+      clients retrying a bad token do not cost a full validation each time,
+      while a newly issued token is usable quickly
+Up to `DECISION_CACHE_SIZE` decisions are kept (default 10000), the least
+recently used one is evicted first.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional
+
+from service.auth.token_table import UserInformation
+
+DEFAULT_SIZE = 10_000
+DEFAULT_TTL = 60
+DEFAULT_DENY_TTL = 10
+
+
+class Decision(NamedTuple):
+    """
+    A cached decision, `user_information` is None for a Deny
+    """
+
+    expires_at: float
+    user_information: Optional[UserInformation]
+
+
+class DecisionCache:
+    """
+    LRU cache of authorization decisions with a TTL per decision
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_SIZE,
+        ttl: float = DEFAULT_TTL,
+        deny_ttl: float = DEFAULT_DENY_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._deny_ttl = deny_ttl
+        self._clock = clock
+        self._decisions: OrderedDict[str, Decision] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._decisions)
+
+    def get(self, digest: str) -> Optional[Decision]:
+        """
+        Return the live decision for a token digest, if any
+        """
+        decision = self._decisions.get(digest)
+        if decision is None or self._clock() >= decision.expires_at:
+            self.misses += 1
+            return None
+        self._decisions.move_to_end(digest)
+        self.hits += 1
+        return decision
+
+    def put(
+        self,
+        digest: str,
+        user_information: Optional[UserInformation],
+        ttl: Optional[float] = None,
+    ) -> int:
+        """
+        Cache the decision for a token digest, for at most `ttl` seconds when
+        given (e.g. until the token expires)
+
+        Returns:
+            The number of decisions evicted to make room for it
+        """
+        default_ttl = self._deny_ttl if user_information is None else self._ttl
+        ttl = default_ttl if ttl is None else min(ttl, default_ttl)
+        self._decisions[digest] = Decision(self._clock() + ttl, user_information)
+        self._decisions.move_to_end(digest)
+        evicted = 0
+        while len(self._decisions) > self._max_size:
+            self._decisions.popitem(last=False)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+
+@lru_cache(maxsize=1)
+def get_decision_cache() -> DecisionCache:
+    """
+    Return the decision cache of the container, configured from the environment
+    """
+    return DecisionCache(
+        max_size=int(os.getenv("DECISION_CACHE_SIZE", DEFAULT_SIZE)),
+        ttl=float(os.getenv("DECISION_CACHE_TTL", DEFAULT_TTL)),
+        deny_ttl=float(os.getenv("DECISION_CACHE_DENY_TTL", DEFAULT_DENY_TTL)),
+    )
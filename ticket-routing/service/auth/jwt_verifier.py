@@ -0,0 +1,187 @@
+"""
+Local verification of signed JWTs
+
+Signatures are verified against the JWKS document of the identity provider,
+cached at module level, so the provider is only called when the cache
+expires (`JWKS_TTL` seconds) or a token is signed with an unknown `kid`
+(keys were rotated). Concurrent misses share a single fetch, and misses
+refetch at most once every `JWKS_MIN_REFRESH_INTERVAL` seconds, so tokens
+with made-up `kid`s cannot flood the provider.
+
+Configured from the environment:
+    - `JWKS_URL`: URL of the JWKS document, JWT verification is disabled
+      without it
+    - `JWT_ISSUER`, `JWT_AUDIENCE`: expected `iss` and `aud` claims
+
+PyJWT is imported on the first JWT, containers that only see static tokens
+do not pay for importing it and its crypto backend.
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from aws_lambda_powertools import Logger
+
+from service.auth.token_table import UserInformation
+
+if TYPE_CHECKING:
+    import jwt
+
+logger: Logger = Logger(service="authorizer", child=True)
+
+DEFAULT_JWKS_TTL = 3600
+DEFAULT_MIN_REFRESH_INTERVAL = 30
+FETCH_TIMEOUT = 2
+
+# Authorizer context key -> JWT claim
+CLAIMS = {
+    "user_id": "sub",
+    "email": "email",
+    "customer_tier": "customer_tier",
+}
+
+Fetcher = Callable[[], Dict[str, Any]]
+
+
+def fetch_jwks(url: str) -> Dict[str, Any]:
+    """
+    Download a JWKS document
+    """
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as response:
+        return json.load(response)
+
+
+def looks_like_jwt(token: str) -> bool:
+    """
+    Check whether a token has the shape of a JWT (header.payload.signature)
+    """
+    return token.count(".") == 2
+
+
+def expires_in(token: str) -> float:
+    """
+    Return the seconds left before a token expires, only use it on tokens
+    that were verified
+    """
+    import jwt
+
+    return jwt.decode(token, options={"verify_signature": False})["exp"] - time.time()
+
+
+class JwksCache:
+    """
+    Signing keys of a JWKS document by `kid`
+    """
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        ttl: float = DEFAULT_JWKS_TTL,
+        min_refresh_interval: float = DEFAULT_MIN_REFRESH_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._fetch = fetch
+        self._ttl = ttl
+        self._min_refresh_interval = min_refresh_interval
+        self._clock = clock
+        self._keys: Dict[str, "jwt.PyJWK"] = {}
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_key(self, kid: str) -> Optional["jwt.PyJWK"]:
+        """
+        Return the key with the given `kid`, refreshing the document if it
+        expired or does not have the key
+        """
+        key = self._keys.get(kid)
+        if key is not None and self._clock() < self._expires_at:
+            return key
+        with self._lock:
+            # Another thread may have refreshed the document while this one
+            # waited for the lock
+            now = self._clock()
+            key = self._keys.get(kid)
+            if (key is None or now >= self._expires_at) and now >= self._retry_at:
+                self._refresh(now)
+            return self._keys.get(kid)
+
+    def _refresh(self, now: float) -> None:
+        import jwt
+
+        self._retry_at = now + self._min_refresh_interval
+        try:
+            key_set = jwt.PyJWKSet.from_dict(self._fetch())
+        except Exception:
+            # The current keys are kept until a refresh succeeds
+            logger.exception("Failed to refresh the JWKS document")
+            return
+        self._keys = {key.key_id: key for key in key_set.keys if key.key_id}
+        self._expires_at = now + self._ttl
+        logger.debug("Refreshed the JWKS document", extra={"keys": list(self._keys)})
+
+
+class JwtVerifier:
+    """
+    Verifies JWTs and maps their claims to the authorizer context
+    """
+
+    def __init__(
+        self,
+        jwks: JwksCache,
+        issuer: Optional[str] = None,
+        audience: Optional[str] = None,
+    ) -> None:
+        self._jwks = jwks
+        self._issuer = issuer
+        self._audience = audience
+
+    def verify(self, token: str) -> Optional[UserInformation]:
+        """
+        Return the user information of a valid token, or None if the token
+        is malformed, expired, or not signed by a known key
+        """
+        import jwt
+
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = None if kid is None else self._jwks.get_key(kid)
+            if key is None:
+                return None
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[key.algorithm_name],
+                issuer=self._issuer,
+                audience=self._audience,
+                options={"require": ["exp", *CLAIMS.values()]},
+            )
+        except jwt.PyJWTError as error:
+            logger.debug("Invalid JWT", extra={"error": str(error)})
+            return None
+        return {name: claims[claim] for name, claim in CLAIMS.items()}
+
+
+@lru_cache(maxsize=1)
+def get_jwt_verifier() -> Optional[JwtVerifier]:
+    """
+    Return the JWT verifier of the container, or None if `JWKS_URL` is not set
+    """
+    url = os.getenv("JWKS_URL")
+    if not url:
+        return None
+    jwks = JwksCache(
+        partial(fetch_jwks, url),
+        ttl=float(os.getenv("JWKS_TTL", DEFAULT_JWKS_TTL)),
+        min_refresh_interval=float(
+            os.getenv("JWKS_MIN_REFRESH_INTERVAL", DEFAULT_MIN_REFRESH_INTERVAL)
+        ),
+    )
+    return JwtVerifier(
+        jwks, issuer=os.getenv("JWT_ISSUER"), audience=os.getenv("JWT_AUDIENCE")
+    )
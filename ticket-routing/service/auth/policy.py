@@ -0,0 +1,78 @@
+"""
+Resources of the authorizer policies
+
+API Gateway caches the policy returned for a token and evaluates it against
+every request made with the token until it expires, whatever the route.
+A policy scoped to the method ARN of the first request denies the other
+routes (spurious 403s) until the cache expires, so policies cover every
+route the caller may use, according to `AUTHORIZER_POLICY_SCOPE`:
+    - `tier` (default): the routes of the customer tier, see `TIER_ROUTES`
+    - `stage`: every method and resource of the stage
+    - `method`: only the method ARN of the request, defeats the cache
+"""
+
+import os
+from enum import Enum
+from typing import Dict, List, NamedTuple, Tuple
+
+# Routes each customer tier may call, as "<HTTP method>/<resource path>";
+# tiers that are not listed get the routes of "*"
+TIER_ROUTES: Dict[str, Tuple[str, ...]] = {
+    "*": ("GET/tickets", "POST/tickets"),
+}
+
+
+class PolicyScope(str, Enum):
+    """
+    Resources covered by an Allow policy
+    """
+
+    TIER = "tier"
+    STAGE = "stage"
+    METHOD = "method"
+
+
+class MethodArn(NamedTuple):
+    """
+    Parts of `arn:aws:execute-api:<region>:<account>:<api>/<stage>/<method>/<path>`
+    """
+
+    api: str
+    stage: str
+    method: str
+    path: str
+
+    @classmethod
+    def parse(cls, method_arn: str) -> "MethodArn":
+        api, stage, method, path = (method_arn.split("/", 3) + ["", "", ""])[:4]
+        return cls(api, stage, method, path)
+
+    def route_arn(self, route: str) -> str:
+        """
+        Return the ARN of a route ("<HTTP method>/<resource path>") of the stage
+        """
+        return f"{self.api}/{self.stage}/{route}"
+
+    def __str__(self) -> str:
+        return self.route_arn(f"{self.method}/{self.path}")
+
+
+def get_policy_scope() -> PolicyScope:
+    """
+    Return the scope of the Allow policies, from `AUTHORIZER_POLICY_SCOPE`
+    """
+    return PolicyScope(os.getenv("AUTHORIZER_POLICY_SCOPE", PolicyScope.TIER.value))
+
+
+def allowed_resources(
+    method_arn: MethodArn, customer_tier: str, scope: PolicyScope
+) -> List[str]:
+    """
+    Return the resources of the Allow policy of a request
+    """
+    if scope is PolicyScope.STAGE:
+        return [method_arn.route_arn("*")]
+    if scope is PolicyScope.METHOD:
+        return [str(method_arn)]
+    routes = TIER_ROUTES.get(customer_tier, TIER_ROUTES["*"])
+    return [method_arn.route_arn(route) for route in routes]
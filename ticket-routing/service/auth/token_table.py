@@ -0,0 +1,134 @@
+"""
+API token table
+
+Tokens are never stored in clear: the table maps the SHA-256 digest of each
+token to the information of its user, so validating a token and getting its
+user is a single dictionary lookup whatever the number of tokens.
+
+The table is loaded once per container, from DynamoDB when `TOKEN_TABLE_NAME`
+is set, otherwise from the JSON file `TOKEN_TABLE_FILE` (the bundled
+`tokens.json` by default), and reloaded every `TOKEN_TABLE_TTL` seconds.
+"""
+
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from aws_lambda_powertools import Logger
+
+logger: Logger = Logger(service="authorizer", child=True)
+
+DEFAULT_TOKEN_FILE = Path(__file__).with_name("tokens.json")
+DEFAULT_TTL = 300
+
+UserInformation = Dict[str, Any]
+Loader = Callable[[], Dict[str, UserInformation]]
+
+
+def token_digest(token: str) -> str:
+    """
+    Return the key of a token in the table
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def load_file(path: Path) -> Dict[str, UserInformation]:
+    """
+    Load a JSON object mapping token digests to user information
+    """
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def load_dynamodb(table_name: str, client: Any = None) -> Dict[str, UserInformation]:
+    """
+    Load every item of a DynamoDB table keyed by `token_hash`
+    """
+    if client is None:
+        # Only containers reading the table pay for importing boto3
+        import boto3
+
+        client = boto3.client("dynamodb")
+    users: Dict[str, UserInformation] = {}
+    pages = client.get_paginator("scan").paginate(
+        TableName=table_name,
+        ProjectionExpression="token_hash, user_id, email, customer_tier",
+    )
+    for page in pages:
+        for item in page["Items"]:
+            users[item["token_hash"]["S"]] = {
+                "user_id": int(item["user_id"]["N"]),
+                "email": item["email"]["S"],
+                "customer_tier": item["customer_tier"]["S"],
+            }
+    return users
+
+
+class TokenTable:
+    """
+    Token digests and their users, reloaded when they are older than `ttl`
+    seconds.
+
+    A failed reload keeps the previous table until the next attempt, one
+    `ttl` later; only the first load fails the lookup.
+    """
+
+    def __init__(
+        self,
+        loader: Loader,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._loader = loader
+        self._ttl = ttl
+        self._clock = clock
+        self._users: Optional[Dict[str, UserInformation]] = None
+        self._expires_at = 0.0
+
+    def lookup(self, token: str) -> Optional[UserInformation]:
+        """
+        Return the information of the user of a token, or None if the
+        token is unknown
+        """
+        return self.lookup_digest(token_digest(token))
+
+    def lookup_digest(self, digest: str) -> Optional[UserInformation]:
+        """
+        Same as `lookup`, for callers that already have the token digest
+        """
+        now = self._clock()
+        if self._users is None or now >= self._expires_at:
+            self._reload(now)
+        return self._users.get(digest)
+
+    def _reload(self, now: float) -> None:
+        try:
+            self._users = self._loader()
+        except Exception:
+            if self._users is None:
+                raise
+            logger.exception(
+                "Failed to reload the token table, keeping the current one"
+            )
+        else:
+            logger.debug("Loaded the token table", extra={"tokens": len(self._users)})
+        self._expires_at = now + self._ttl
+
+
+@lru_cache(maxsize=1)
+def get_token_table() -> TokenTable:
+    """
+    Return the token table of the container, configured from the environment
+    """
+    table_name = os.getenv("TOKEN_TABLE_NAME")
+    if table_name:
+        loader: Loader = partial(load_dynamodb, table_name)
+    else:
+        loader = partial(
+            load_file, Path(os.getenv("TOKEN_TABLE_FILE", DEFAULT_TOKEN_FILE))
+        )
+    return TokenTable(loader, ttl=float(os.getenv("TOKEN_TABLE_TTL", DEFAULT_TTL)))
@@ -1,17 +1,24 @@
 """
 Authorizer Lambda function
 """
-from hmac import compare_digest
-from typing import Any
 
-from aws_lambda_powertools import Logger
+from typing import Any, List, Optional, Union
+
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from service.auth.decision_cache import get_decision_cache
+from service.auth.jwt_verifier import expires_in, get_jwt_verifier, looks_like_jwt
+from service.auth.policy import MethodArn, allowed_resources, get_policy_scope
+from service.auth.token_table import UserInformation, get_token_table, token_digest
+
 logger: Logger = Logger(service="authorizer")
+metrics: Metrics = Metrics(namespace="TicketRouting", service="authorizer")
 
 
 def generate_policy(
-    principal_id: str, effect: str, resource: str, context=None
+    principal_id: str, effect: str, resource: Union[str, List[str]], context=None
 ) -> dict:
     auth_response = {"principalId": principal_id}
     if effect and resource:
@@ -28,44 +35,55 @@ def generate_policy(
     return auth_response
 
 
-def validate_token(token: str) -> bool:
+def get_user_information(token: str) -> Optional[UserInformation]:
     """
-    Validate token
-    """
-    # Implement your token validation logic here
-    return compare_digest(token, "QAB3RUYA4gsd") or compare_digest(token, "Avb3TU8O2ts1")
-
+    Get the information of the user of a token, or None if the token is invalid.
 
-def get_user_information(token: str) -> dict[str, Any]:
+    JWTs are verified locally when `JWKS_URL` is set, other tokens are looked
+    up in the token table. Decisions are cached in the container by token
+    digest, see `service.auth.decision_cache`.
     """
-    Get user information
-    """
-    # Implement your user information retrieval logic here
-    storage = {
-        "QAB3RUYA4gsd": {
-            "user_id": 3222,
-            "email": "fakeuser123@example.com",
-            "customer_tier": "silver"
-        },
-        "Avb3TU8O2ts1": {
-            "user_id": 1234,
-            "email": "fakeuser234@example.com",
-            "customer_tier": "gold"
-        }
-    }
+    digest = token_digest(token)
+    cache = get_decision_cache()
+    decision = cache.get(digest)
+    if decision is not None:
+        metrics.add_metric(name="DecisionCacheHit", unit=MetricUnit.Count, value=1)
+        return decision.user_information
+    metrics.add_metric(name="DecisionCacheMiss", unit=MetricUnit.Count, value=1)
+
+    ttl = None
+    verifier = get_jwt_verifier()
+    if verifier is not None and looks_like_jwt(token):
+        user_information = verifier.verify(token)
+        if user_information is not None:
+            # The decision must not outlive the token
+            ttl = expires_in(token)
+    else:
+        user_information = get_token_table().lookup_digest(digest)
 
-    return storage[token]
+    evicted = cache.put(digest, user_information, ttl=ttl)
+    if evicted:
+        metrics.add_metric(
+            name="DecisionCacheEviction", unit=MetricUnit.Count, value=evicted
+        )
+    return user_information
 
 
+@metrics.log_metrics
 def lambda_handler(event: Any, context: LambdaContext):
     """
     Lambda function to authorize requests
     """
-    if not validate_token(event["authorizationToken"]):
-        return generate_policy("user", "Deny", event["methodArn"])
+    user_information = get_user_information(event["authorizationToken"])
+    method_arn = MethodArn.parse(event["methodArn"])
+    if user_information is None:
+        # API Gateway caches the policy for every route, deny them all
+        return generate_policy("user", "Deny", method_arn.route_arn("*"))
     return generate_policy(
         "user",
         "Allow",
-        event["methodArn"],
-        context=get_user_information(event["authorizationToken"]),
+        allowed_resources(
+            method_arn, user_information["customer_tier"], get_policy_scope()
+        ),
+        context=user_information,
     )
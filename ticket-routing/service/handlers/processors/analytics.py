@@ -1,29 +1,92 @@
-from aws_lambda_powertools import Logger
-from aws_lambda_powertools.utilities.batch import (
-    BatchProcessor,
-    EventType,
-    process_partial_response,
-)
+"""
+Ticket volume metrics
+
+The tickets of a batch are counted in memory by customer tier, ticket type
+and minute, then published as CloudWatch Embedded Metric Format (EMF)
+documents, instead of a log line per ticket. Each minute of a batch gets a
+document of the `Tickets` total, then one document per tier and type with
+the `Tickets` of the group and the `tier` and `type` dimensions; sum them
+with `SEARCH('{TicketRouting,service,tier,type} tier="gold"', 'Sum', 60)`.
+
+Ticket types come from the clients, those other than a `TicketType` are
+counted as `other`, so a client cannot create new metrics.
+"""
+
+from collections import Counter
+from typing import Dict, Tuple
+
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.data_classes.sqs_event import SQSRecord
-from aws_lambda_powertools.utilities.typing import LambdaContext
 
-processor = BatchProcessor(event_type=EventType.SQS)
-logger = Logger(service="analytics")
+from service.handlers.processors.batch import (
+    ProcessorConfig,
+    batch_lambda_handler,
+    notification,
+)
+from service.models.ticket_message import TicketMessage, TicketType
+
+MINUTE_MS = 60_000
+OTHER_TYPE = "other"
+
+config = ProcessorConfig.from_env("analytics")
+logger = Logger(service=config.service)
+metrics = Metrics(namespace="TicketRouting", service=config.service)
+
+
+def metric_type(ticket_type: str) -> str:
+    """
+    Return the `type` dimension of a ticket type
+    """
+    try:
+        return TicketType(ticket_type).value
+    except ValueError:
+        return OTHER_TYPE
 
 
-def record_handler(record: SQSRecord):
+class TicketVolume:
     """
-    Process SQS record
+    Ticket counts of a batch by minute (epoch milliseconds), tier and type
     """
-    payload: str = record.json_body
-    logger.info("Analyzing record", extra={"record": payload["Message"]})
-
-
-@logger.inject_lambda_context(log_event=False)
-def lambda_handler(event, context: LambdaContext):
-    return process_partial_response(
-        event=event,
-        record_handler=record_handler,
-        processor=processor,
-        context=context,
-    )
\ No newline at end of file
+
+    def __init__(self) -> None:
+        self.counts: Counter[Tuple[int, str, str]] = Counter()
+
+    def add(self, message: TicketMessage) -> None:
+        minute = int(message.request_time_epoch) // MINUTE_MS * MINUTE_MS
+        self.counts[minute, message.auth.tier, metric_type(message.body.type)] += 1
+
+    def flush(self) -> None:
+        """
+        Publish the total of each minute and the counts of its tiers and
+        types, and reset them
+        """
+        minutes: Dict[int, Counter[Tuple[str, str]]] = {}
+        for (minute, tier, ticket_type), count in self.counts.items():
+            minutes.setdefault(minute, Counter())[tier, ticket_type] += count
+        self.counts.clear()
+        for minute, groups in sorted(minutes.items()):
+            metrics.set_timestamp(minute)
+            metrics.add_metric(
+                name="Tickets", unit=MetricUnit.Count, value=groups.total()
+            )
+            metrics.flush_metrics()
+            # A document has a single value per dimension
+            for (tier, ticket_type), count in sorted(groups.items()):
+                metrics.add_dimension(name="tier", value=tier)
+                metrics.add_dimension(name="type", value=ticket_type)
+                metrics.add_metric(name="Tickets", unit=MetricUnit.Count, value=count)
+                metrics.flush_metrics()
+
+
+volume = TicketVolume()
+
+
+async def record_handler(record: SQSRecord):
+    """
+    Count the ticket of an SQS record
+    """
+    volume.add(notification(record, config).message)
+
+
+lambda_handler = batch_lambda_handler(config, record_handler, on_batch_end=volume.flush)
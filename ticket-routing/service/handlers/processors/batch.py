@@ -0,0 +1,159 @@
+"""
+Shared SQS batch processing of the ticket channels
+
+Each channel is a routing config plus an async record handler. The records
+of a batch are handled concurrently, up to `max_concurrency` at a time, and
+each record fails on its own (partial batch response) if it raises or takes
+more than `record_timeout` seconds, so a slow downstream call only sends its
+record back to the queue.
+
+Blocking calls (boto3) must run in a thread, see `run_blocking`: each
+processor has a pool of `max_concurrency` threads, the default pool of the
+event loop has as few as 6 on a small function. A timeout stops waiting for
+the record but cannot stop a call running in a thread.
+
+The defaults of the config can be overridden from the environment:
+    - `PROCESSOR_MAX_CONCURRENCY`: records handled at the same time
+    - `PROCESSOR_RECORD_TIMEOUT`: seconds before a record fails
+    - `SNS_RAW_MESSAGE_DELIVERY`: "true" when the SNS subscription of the
+      queue delivers raw messages, see `service.models.ticket_message`
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.batch import (
+    AsyncBatchProcessor,
+    EventType,
+    async_process_partial_response,
+)
+from aws_lambda_powertools.utilities.data_classes.sqs_event import SQSRecord
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+from service.models.ticket_message import TicketNotification, parse_notification
+
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_RECORD_TIMEOUT = 5.0
+
+RecordHandler = Callable[[SQSRecord], Awaitable[Any]]
+
+# Thread pool of the processor handling the current record
+_executor: ContextVar[Optional[ThreadPoolExecutor]] = ContextVar(
+    "executor", default=None
+)
+
+
+class ProcessorConfig(NamedTuple):
+    """
+    Routing config of a channel processor
+    """
+
+    service: str
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    record_timeout: float = DEFAULT_RECORD_TIMEOUT
+    raw_message_delivery: bool = False
+
+    @classmethod
+    def from_env(cls, service: str, **defaults: Any) -> "ProcessorConfig":
+        config = cls(service, **defaults)
+        return config._replace(
+            max_concurrency=int(
+                os.getenv("PROCESSOR_MAX_CONCURRENCY", config.max_concurrency)
+            ),
+            record_timeout=float(
+                os.getenv("PROCESSOR_RECORD_TIMEOUT", config.record_timeout)
+            ),
+            raw_message_delivery=os.getenv(
+                "SNS_RAW_MESSAGE_DELIVERY", str(config.raw_message_delivery)
+            ).lower()
+            == "true",
+        )
+
+
+class ConcurrentBatchProcessor(AsyncBatchProcessor):
+    """
+    SQS batch processor running at most `max_concurrency` records at a time,
+    each within `record_timeout` seconds
+    """
+
+    def __init__(self, max_concurrency: int, record_timeout: float) -> None:
+        super().__init__(event_type=EventType.SQS)
+        self.max_concurrency = max_concurrency
+        self.record_timeout = record_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="record"
+        )
+
+    def __call__(
+        self,
+        records: list,
+        handler: Callable,
+        lambda_context: Optional[LambdaContext] = None,
+    ):
+        super().__call__(records, handler, lambda_context)
+        # After the parent inspected the signature of the handler
+        self.handler = partial(self._with_timeout, handler)
+        return self
+
+    def _prepare(self) -> None:
+        super()._prepare()
+        # Bound to the event loop of the batch on first use
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _with_timeout(self, handler: Callable, **kwargs: Any) -> Any:
+        # Each record runs in its own task, with its own context
+        _executor.set(self._executor)
+        return await asyncio.wait_for(handler(**kwargs), self.record_timeout)
+
+    async def _async_process_record(self, record: dict):
+        async with self._semaphore:
+            return await super()._async_process_record(record)
+
+
+def notification(record: SQSRecord, config: ProcessorConfig) -> TicketNotification:
+    """
+    Return the ticket notification of an SQS record
+    """
+    return parse_notification(record.body, config.raw_message_delivery)
+
+
+async def run_blocking(function: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking call in a thread, so other records proceed meanwhile
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor.get(), partial(function, *args))
+
+
+def batch_lambda_handler(
+    config: ProcessorConfig,
+    record_handler: RecordHandler,
+    on_batch_end: Optional[Callable[[], None]] = None,
+) -> Callable[[dict, LambdaContext], dict]:
+    """
+    Return the Lambda handler of a channel, `on_batch_end` is called once the
+    records of a batch were handled, even if they all failed
+    """
+    processor = ConcurrentBatchProcessor(config.max_concurrency, config.record_timeout)
+    logger = Logger(service=config.service)
+
+    @logger.inject_lambda_context(log_event=False)
+    def lambda_handler(event: dict, context: LambdaContext) -> dict:
+        try:
+            return async_process_partial_response(
+                event=event,
+                record_handler=record_handler,
+                processor=processor,
+                context=context,
+            )
+        finally:
+            if on_batch_end is not None:
+                on_batch_end()
+
+    return lambda_handler
@@ -0,0 +1,130 @@
+"""
+Idempotent processing of the SNS notifications
+
+SNS and SQS deliver at least once, and a batch with failed records is
+partly redelivered, so the channels process each notification once, keyed
+on its SNS `MessageId` (the request ID with raw message delivery), with
+Powertools idempotency:
+    - completed notifications are recorded in the DynamoDB table
+      `IDEMPOTENCY_TABLE_NAME` for `IDEMPOTENCY_TTL` seconds (default 3600)
+    - the container keeps the last `IDEMPOTENCY_CACHE_SIZE` of them in
+      memory (default 1000), redelivered records it already processed are
+      skipped without calling DynamoDB
+
+Without `IDEMPOTENCY_TABLE_NAME`, notifications are processed on every
+delivery.
+"""
+
+import functools
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from aws_lambda_powertools.utilities.idempotency import (
+    DynamoDBPersistenceLayer,
+    IdempotencyConfig,
+    idempotent_function,
+)
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+from service.models.ticket_message import TicketNotification
+
+DEFAULT_TTL = 3600
+DEFAULT_CACHE_SIZE = 1000
+
+# The records of a batch run in threads, and `lru_cache` lets concurrent
+# misses each create an instance
+_factory_lock = threading.Lock()
+
+
+class ThreadSafePersistenceLayer(DynamoDBPersistenceLayer):
+    """
+    DynamoDB persistence layer that the threads of a batch can use at the
+    same time: the first records of a cold container would otherwise each
+    create a local cache, and lose the records saved to the others
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._lock = threading.RLock()
+
+    def configure(
+        self,
+        config: IdempotencyConfig,
+        function_name: Optional[str] = None,
+        key_prefix: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            super().configure(config, function_name, key_prefix)
+
+    def _save_to_cache(self, data_record) -> None:
+        with self._lock:
+            super()._save_to_cache(data_record)
+
+    def _retrieve_from_cache(self, idempotency_key: str):
+        with self._lock:
+            return super()._retrieve_from_cache(idempotency_key)
+
+    def _delete_from_cache(self, idempotency_key: str) -> None:
+        with self._lock:
+            super()._delete_from_cache(idempotency_key)
+
+
+@lru_cache(maxsize=1)
+def get_idempotency_config() -> IdempotencyConfig:
+    """
+    Return the idempotency config of the container
+    """
+    return IdempotencyConfig(
+        event_key_jmespath="message_id",
+        raise_on_no_idempotency_key=True,
+        expires_after_seconds=int(os.getenv("IDEMPOTENCY_TTL", DEFAULT_TTL)),
+        use_local_cache=True,
+        local_cache_max_items=int(
+            os.getenv("IDEMPOTENCY_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+        ),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_persistence_layer() -> Optional[ThreadSafePersistenceLayer]:
+    """
+    Return the idempotency store of the container, or None if
+    `IDEMPOTENCY_TABLE_NAME` is not set
+    """
+    table_name = os.getenv("IDEMPOTENCY_TABLE_NAME")
+    if not table_name:
+        return None
+    return ThreadSafePersistenceLayer(table_name=table_name)
+
+
+def once_per_notification(
+    function: Callable[[TicketNotification], Any],
+) -> Callable[[TicketNotification, Optional[LambdaContext]], Any]:
+    """
+    Run `function(notification=...)` once per notification; the Lambda context
+    bounds how long a notification stays in progress if the function times out
+    """
+
+    @functools.wraps(function)
+    def wrapper(
+        notification: TicketNotification, lambda_context: Optional[LambdaContext] = None
+    ) -> Any:
+        with _factory_lock:
+            persistence_layer = get_persistence_layer()
+            config = get_idempotency_config()
+        if persistence_layer is None:
+            return function(notification)
+        if lambda_context is not None:
+            config.register_lambda_context(lambda_context)
+        # Idempotency keys are prefixed with the module and name of `function`
+        idempotent = idempotent_function(
+            function,
+            data_keyword_argument="notification",
+            persistence_store=persistence_layer,
+            config=config,
+        )
+        return idempotent(notification=notification)
+
+    return wrapper
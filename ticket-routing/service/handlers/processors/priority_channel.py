@@ -1,29 +1,60 @@
 from aws_lambda_powertools import Logger
-from aws_lambda_powertools.utilities.batch import (
-    BatchProcessor,
-    EventType,
-    process_partial_response,
-)
 from aws_lambda_powertools.utilities.data_classes.sqs_event import SQSRecord
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
-processor = BatchProcessor(event_type=EventType.SQS)
-logger = Logger(service="priority_channel")
+from service.handlers.processors.batch import (
+    ProcessorConfig,
+    batch_lambda_handler,
+    notification,
+    run_blocking,
+)
+from service.handlers.processors.idempotency import once_per_notification
+from service.models.ticket_message import TicketMessage, TicketNotification
+from service.notifications.webhook import get_webhook_client
+from service.storage.ticket_cache import invalidate_recent_tickets
+from service.storage.ticket_table import created_at, get_ticket_table
+
+config = ProcessorConfig.from_env("priority_channel")
+logger = Logger(service=config.service)
+
+
+def webhook_ticket(message: TicketMessage) -> dict:
+    """
+    Return the ticket of a pipeline message, as sent to the webhook
+    """
+    return {
+        "id": message.request_id,
+        **message.auth.model_dump(),
+        **message.body.model_dump(),
+        "created_at": created_at(message.request_time_epoch),
+    }
 
 
-def record_handler(record: SQSRecord):
+@once_per_notification
+def deliver(notification: TicketNotification) -> None:
+    """
+    Store the ticket of an SNS notification and send it to the webhook
+    """
+    message = notification.message
+    get_ticket_table().put_message(message)
+    # Only once the ticket is stored, so the cache is not refilled without it
+    invalidate_recent_tickets(message.auth.user_id)
+    webhook = get_webhook_client()
+    if webhook is not None:
+        # A failure sends the record back to the queue, the ticket is stored
+        # again (same item) and sent again
+        status = webhook.send(webhook_ticket(message), message.request_id)
+        logger.info(
+            "Sent ticket to the webhook",
+            extra={"request_id": message.request_id, "status": status},
+        )
+
+
+async def record_handler(record: SQSRecord, lambda_context: LambdaContext):
     """
     Process SQS record
     """
-    payload: str = record.json_body
-    logger.info("Send request to priority channel", extra={"record": payload["Message"]})
-
-
-@logger.inject_lambda_context(log_event=False)
-def lambda_handler(event, context: LambdaContext):
-    return process_partial_response(
-        event=event,
-        record_handler=record_handler,
-        processor=processor,
-        context=context,
-    )
\ No newline at end of file
+    await run_blocking(deliver, notification(record, config), lambda_context)
+
+
+lambda_handler = batch_lambda_handler(config, record_handler)
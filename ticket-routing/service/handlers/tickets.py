@@ -1,28 +1,45 @@
 """
-Returns mock user tickets
+Returns user tickets
 """
 
-import random
-from datetime import datetime, timedelta
+import base64
+import binascii
+from datetime import datetime
 from enum import Enum
-from typing import Any, List
+from typing import Annotated, Any, List, Optional
 
-from aws_lambda_powertools import Logger
+from aws_lambda_powertools import Logger, Metrics
 from aws_lambda_powertools.event_handler import APIGatewayRestResolver
+from aws_lambda_powertools.event_handler.exceptions import BadRequestError
+from aws_lambda_powertools.event_handler.openapi.params import Query
+from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from pydantic import BaseModel, Field
 
+from service.models.ticket_message import TicketType
+from service.storage.ticket_cache import (
+    RECENT_TICKETS,
+    CacheTier,
+    first_page,
+    get_ticket_cache,
+)
+from service.storage.ticket_table import SEPARATOR, get_ticket_table
+
 logger: Logger = Logger(service="tickets")
+metrics: Metrics = Metrics(namespace="TicketRouting", service="tickets")
 app = APIGatewayRestResolver(enable_validation=True)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
 
-class TicketType(str, Enum):
+class SortOrder(str, Enum):
     """
-    Request type enum
+    Order of the tickets by creation time
     """
 
-    FINANCE = "finance"
-    GENERAL = "general"
+    ASC = "asc"
+    DESC = "desc"
 
 
 class Ticket(BaseModel):
@@ -31,63 +48,139 @@ class Ticket(BaseModel):
     """
 
     type: TicketType = Field(..., description="Ticket type (finance or general)")
-    subject: str = Field(..., description="Subject")
+    subject: str = Field("", description="Subject")
     message: str = Field(..., description="Message")
     created_at: str = Field(..., description="Created at")
 
 
-def get_data(user_id: str) -> List[Ticket]:
-    """
-    Return mock user tickets
-    """
-    logger.debug("Generating mock user tickets", extra={"user_id": user_id})
-    finance_requests = [
-        ("Tax calculation review", "Need assistance with annual tax calculation"),
-        ("Budget planning", "Requesting support for Q2 budget planning"),
-        ("Investment strategy", "Looking for advice on portfolio diversification"),
-        ("Expense report", "Monthly expense report needs verification"),
-        ("Financial audit", "Request for internal audit documentation"),
-    ]
-
-    general_requests = [
-        ("Account access", "Unable to access my dashboard"),
-        ("Documentation help", "Need help finding user guides"),
-        ("Service inquiry", "Questions about available services"),
-        ("Update contact", "Need to update contact information"),
-        ("Meeting request", "Scheduling a consultation call"),
-    ]
-
-    response = []
-    for _ in range(5):
-        # Randomly choose request type
-        request_type = random.choice(list(TicketType))
-        # Select appropriate request based on type
-        subject, message = random.choice(
-            finance_requests
-            if request_type == TicketType.FINANCE
-            else general_requests
-        )
-        # Generate random date within last 30 days
-        created_at = (
-            datetime.now() - timedelta(days=random.randint(0, 30))
-        ).isoformat()
+class TicketPage(BaseModel):
+    """
+    A page of tickets
+    """
+
+    tickets: List[Ticket] = Field(..., description="Tickets")
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor of the next page, null on the last page"
+    )
+
+
+def encode_cursor(created_id: str) -> str:
+    """
+    Return the opaque cursor of the page after a ticket
+    """
+    return base64.urlsafe_b64encode(created_id.encode()).decode()
+
 
-        record = Ticket(
-            type=request_type, subject=subject, message=message, created_at=created_at
+def decode_cursor(cursor: str) -> str:
+    """
+    Return the `created_id` of the ticket a cursor points to
+    """
+    try:
+        created_id = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, request_id = created_id.split(SEPARATOR, 1)
+        datetime.fromisoformat(created_at)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise BadRequestError("Invalid cursor")
+    if not request_id:
+        raise BadRequestError("Invalid cursor")
+    return created_id
+
+
+def get_data(
+    user_id: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    ticket_type: Optional[TicketType] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    sort: SortOrder = SortOrder.DESC,
+) -> TicketPage:
+    """
+    Return a page of user tickets, the first page of the newest tickets is
+    read from the ticket cache, see `service.storage.ticket_cache`
+    """
+    filtered = any(
+        value is not None for value in (ticket_type, created_after, created_before)
+    )
+    if cursor is None and not filtered and sort is SortOrder.DESC:
+        recent, tier = get_ticket_cache().get(
+            user_id, lambda: get_ticket_table().query(user_id, RECENT_TICKETS)
+        )
+        metrics.add_metric(
+            name="TicketCacheHit" if tier is not CacheTier.TABLE else "TicketCacheMiss",
+            unit=MetricUnit.Count,
+            value=1,
+        )
+        logger.debug(
+            "Read recent user tickets", extra={"user_id": user_id, "tier": tier.value}
         )
-        response.append(record)
-    return response
+        page = first_page(recent, limit)
+    else:
+        after = None if cursor is None else decode_cursor(cursor)
+        logger.debug(
+            "Querying user tickets",
+            extra={
+                "user_id": user_id,
+                "limit": limit,
+                "after": after,
+                "type": ticket_type,
+                "created_after": created_after,
+                "created_before": created_before,
+                "sort": sort,
+            },
+        )
+        page = get_ticket_table().query(
+            user_id,
+            limit,
+            after,
+            ticket_type=None if ticket_type is None else ticket_type.value,
+            created_after=created_after,
+            created_before=created_before,
+            ascending=sort is SortOrder.ASC,
+        )
+    return TicketPage(
+        tickets=page.tickets,
+        next_cursor=(
+            None
+            if page.last_created_id is None
+            else encode_cursor(page.last_created_id)
+        ),
+    )
 
 
 @app.get("/tickets")
-def get_requests() -> List[Ticket]:
+def get_requests(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Annotated[Optional[str], Query(max_length=128)] = None,
+    ticket_type: Annotated[Optional[TicketType], Query(alias="type")] = None,
+    created_after: Annotated[Optional[datetime], Query()] = None,
+    created_before: Annotated[Optional[datetime], Query()] = None,
+    sort: Annotated[SortOrder, Query()] = SortOrder.DESC,
+) -> TicketPage:
     """
-    Return user tickets
+    Return user tickets, optionally of a type and created in a time range
+    (bounds excluded)
     """
+    if (
+        created_after is not None
+        and created_before is not None
+        and created_after >= created_before
+    ):
+        raise BadRequestError("created_after must be before created_before")
     authorizer_data = app.current_event.request_context.authorizer
-    return get_data(authorizer_data["user_id"])
-
-
+    # API Gateway passes the authorizer context values as strings
+    return get_data(
+        str(authorizer_data["user_id"]),
+        limit,
+        cursor,
+        ticket_type=ticket_type,
+        created_after=created_after,
+        created_before=created_before,
+        sort=sort,
+    )
+
+
+@metrics.log_metrics
 def lambda_handler(event: Any, context: LambdaContext) -> str:
     """
     Return user tickets
@@ -0,0 +1,87 @@
+"""
+Messages of the ticket pipeline
+
+`POST /tickets` publishes to SNS the message of the `message_template` of
+`infrastructure/component.py`. SNS delivers it to the SQS queues as the JSON
+string `Message` of a notification envelope, or as the SQS body itself with
+raw message delivery.
+
+The adapters are built once per container, and parse an SQS body in a single
+pass: the envelope and the message it holds at once, into typed models.
+"""
+
+from enum import Enum
+
+from pydantic import BaseModel, Field, Json, TypeAdapter, ValidationError
+
+
+class TicketType(str, Enum):
+    """
+    Request type enum
+    """
+
+    FINANCE = "finance"
+    GENERAL = "general"
+
+
+class TicketBody(BaseModel):
+    type: str
+    message: str
+    subject: str = ""
+
+
+class TicketAuth(BaseModel):
+    user_id: str
+    email: str
+    tier: str
+
+
+class TicketMessage(BaseModel):
+    """
+    Message published for a new ticket
+    """
+
+    body: TicketBody
+    auth: TicketAuth
+    request_time_epoch: str
+    request_id: str
+
+
+class TicketNotification(BaseModel):
+    """
+    SNS notification of a ticket, parsed from the envelope SNS delivers to
+    SQS without raw message delivery. With raw message delivery, SNS does not
+    deliver its `MessageId`, the ID of the request stands for it
+    """
+
+    message_id: str = Field(validation_alias="MessageId")
+    message: Json[TicketMessage] = Field(validation_alias="Message")
+
+
+envelope_adapter: TypeAdapter[TicketNotification] = TypeAdapter(TicketNotification)
+message_adapter: TypeAdapter[TicketMessage] = TypeAdapter(TicketMessage)
+
+
+def _from_raw_message(body: str) -> TicketNotification:
+    message = message_adapter.validate_json(body)
+    return TicketNotification.model_construct(
+        message_id=message.request_id, message=message
+    )
+
+
+def parse_notification(body: str, raw_message_delivery: bool) -> TicketNotification:
+    """
+    Parse the body of an SQS record; the other format is tried when it does
+    not match, for the records sent before raw message delivery was turned on
+    or off
+    """
+    parsers = [envelope_adapter.validate_json, _from_raw_message]
+    if raw_message_delivery:
+        parsers.reverse()
+    try:
+        return parsers[0](body)
+    except ValidationError as error:
+        try:
+            return parsers[1](body)
+        except ValidationError:
+            raise error from None
@@ -0,0 +1,119 @@
+"""
+Webhook notifications of the priority tickets
+
+Tickets are POSTed as JSON to `WEBHOOK_URL` through a keep-alive connection
+pool shared by the records of the batches, so a container only opens a new
+connection when every pooled one is busy. The pool holds at most
+`WEBHOOK_MAX_CONNECTIONS` connections (default 10) and blocks the requests
+beyond them, which also bounds the concurrent requests of a batch.
+
+A request that fails to connect, times out (`WEBHOOK_TIMEOUT` seconds,
+default 2) or gets one of `RETRY_STATUSES` is retried up to `WEBHOOK_RETRIES`
+times (default 2), after a random delay of up to 0.1, 0.2, 0.4... seconds
+(full jitter), so the retries of a batch do not hit the receiver at the same
+time. Every attempt carries the `Idempotency-Key` header, the ID of the
+ticket, for receivers to drop the duplicates.
+
+Without `WEBHOOK_URL`, tickets are not sent.
+"""
+
+import json
+import os
+import random
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+import urllib3
+
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_RETRIES = 2
+BACKOFF_BASE = 0.1
+BACKOFF_MAX = 2.0
+
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Shared by every request of the container
+http = urllib3.PoolManager(
+    maxsize=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+    block=True,
+    timeout=urllib3.Timeout(total=float(os.getenv("WEBHOOK_TIMEOUT", DEFAULT_TIMEOUT))),
+    retries=False,
+)
+
+
+class WebhookError(Exception):
+    """
+    The webhook did not accept a ticket
+    """
+
+
+def full_jitter(attempt: int, rng: Callable[[], float] = random.random) -> float:
+    """
+    Return the delay in seconds before retry number `attempt` (0-based)
+    """
+    return rng() * min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)
+
+
+class WebhookClient:
+    """
+    Sends tickets to a webhook
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool: urllib3.PoolManager = http,
+        retries: int = DEFAULT_RETRIES,
+        backoff: Callable[[int], float] = full_jitter,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._url = url
+        self._pool = pool
+        self._retries = retries
+        self._backoff = backoff
+        self._sleep = sleep
+
+    def send(self, ticket: Dict[str, Any], idempotency_key: str) -> int:
+        """
+        POST a ticket and return the status of the response, raise
+        WebhookError once the retries are exhausted or on a client error
+        """
+        body = json.dumps(ticket).encode()
+        for attempt in range(self._retries + 1):
+            if attempt:
+                self._sleep(self._backoff(attempt - 1))
+            try:
+                response = self._pool.request(
+                    "POST",
+                    self._url,
+                    body=body,
+                    headers={
+                        "Content-Type": "application/json",
+                        "Idempotency-Key": idempotency_key,
+                    },
+                )
+            except urllib3.exceptions.HTTPError as error:
+                failure = f"{type(error).__name__}: {error}"
+                continue
+            if response.status < 300:
+                return response.status
+            failure = f"HTTP {response.status}"
+            if response.status not in RETRY_STATUSES:
+                break
+        raise WebhookError(f"Webhook failed after {attempt + 1} attempts, {failure}")
+
+
+@lru_cache(maxsize=1)
+def get_webhook_client() -> Optional[WebhookClient]:
+    """
+    Return the webhook client of the container, or None if `WEBHOOK_URL` is
+    not set
+    """
+    url = os.getenv("WEBHOOK_URL")
+    if not url:
+        return None
+    return WebhookClient(
+        url, retries=int(os.getenv("WEBHOOK_RETRIES", DEFAULT_RETRIES))
+    )
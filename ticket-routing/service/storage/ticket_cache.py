@@ -0,0 +1,275 @@
+"""
+Cache of the recent tickets of the users
+
+Users reload `GET /tickets` far more often than they create tickets, so the
+first page is served from the `RECENT_TICKETS` newest tickets of each user,
+whatever the page size, cached:
+    - in the DynamoDB table `TICKET_CACHE_TABLE_NAME`, shared by the
+      containers, for `TICKET_CACHE_SHARED_TTL` seconds (default 300)
+    - in the container for `TICKET_CACHE_TTL` seconds (default 30), up to
+      `TICKET_CACHE_SIZE` users (default 1000), `TICKET_CACHE_TTL=0` disables
+      it; these reads only fetch the version of the shared entry
+
+The channel processors invalidate the shared entry of a user once they
+stored a new ticket of the user: they drop its page and bump its `version`.
+Containers only write a page back if the version is still the one they read
+before querying the table, so a page read before a new ticket never replaces
+the invalidated entry, and only serve their copy while the shared version is
+the one they copied, so a new ticket shows up on the next read.
+
+The stack deploys the shared cache unless `cdk deploy -c
+shared_ticket_cache=false`. Without `TICKET_CACHE_TABLE_NAME` invalidations
+are no-ops and the container copies, which skip DynamoDB entirely then, may
+lag behind a new ticket for up to `TICKET_CACHE_TTL` seconds.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from service.storage.ticket_table import TicketPage
+
+RECENT_TICKETS = 100
+DEFAULT_SIZE = 1000
+DEFAULT_TTL = 30
+DEFAULT_SHARED_TTL = 300
+
+
+class CacheTier(str, Enum):
+    """
+    Where a page of recent tickets came from
+    """
+
+    LOCAL = "local"
+    SHARED = "shared"
+    TABLE = "table"
+
+
+class SharedEntry(NamedTuple):
+    """
+    The recent tickets of a user in the shared cache, None when missing or
+    expired, and the version of the entry they were read at
+    """
+
+    recent: Optional[TicketPage]
+    version: int
+
+
+def first_page(recent: TicketPage, limit: int) -> TicketPage:
+    """
+    Return the first `limit` of the recent tickets of a user
+    """
+    if limit < len(recent.tickets):
+        return TicketPage(
+            recent.tickets[:limit], recent.tickets[limit - 1]["created_id"]
+        )
+    return recent
+
+
+class LocalTicketCache:
+    """
+    LRU cache of the recent tickets of the users, in the container, with the
+    version of the shared entry they were copied from
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_SIZE,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._pages: OrderedDict[str, Tuple[float, SharedEntry]] = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[SharedEntry]:
+        entry = self._pages.get(user_id)
+        if entry is None or self._clock() >= entry[0]:
+            return None
+        self._pages.move_to_end(user_id)
+        return entry[1]
+
+    def put(self, user_id: str, recent: TicketPage, version: int = 0) -> None:
+        if self._ttl <= 0:
+            return
+        self._pages[user_id] = (self._clock() + self._ttl, SharedEntry(recent, version))
+        self._pages.move_to_end(user_id)
+        while len(self._pages) > self._max_size:
+            self._pages.popitem(last=False)
+
+
+class SharedTicketCache:
+    """
+    Recent tickets of the users in a DynamoDB table keyed by `user_id`, whose
+    `expires_at` attribute is the TTL attribute of the table, and whose
+    `version` counts the invalidations of the entry
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        ttl: float = DEFAULT_SHARED_TTL,
+        client: Any = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._table_name = table_name
+        self.ttl = ttl
+        self._client = client or boto3.client("dynamodb")
+        self._clock = clock
+
+    def get(self, user_id: str) -> SharedEntry:
+        response = self._client.get_item(
+            TableName=self._table_name,
+            Key={"user_id": {"S": user_id}},
+            # An invalidated entry must not be read again
+            ConsistentRead=True,
+        )
+        item = response.get("Item")
+        if item is None:
+            return SharedEntry(None, 0)
+        version = int(item["version"]["N"])
+        # DynamoDB deletes expired items lazily
+        if "page" not in item or float(item["expires_at"]["N"]) <= self._clock():
+            return SharedEntry(None, version)
+        tickets, last_created_id = json.loads(item["page"]["S"])
+        return SharedEntry(TicketPage(tickets, last_created_id), version)
+
+    def version(self, user_id: str) -> int:
+        """
+        Return the version of the entry of a user, 0 when missing
+        """
+        response = self._client.get_item(
+            TableName=self._table_name,
+            Key={"user_id": {"S": user_id}},
+            ProjectionExpression="version",
+            ConsistentRead=True,
+        )
+        item = response.get("Item")
+        return 0 if item is None else int(item["version"]["N"])
+
+    def put(self, user_id: str, recent: TicketPage, version: int) -> bool:
+        """
+        Store the recent tickets of a user read from the table after the
+        entry of `version`, return False if the entry was invalidated since
+        """
+        try:
+            self._client.put_item(
+                TableName=self._table_name,
+                Item={
+                    "user_id": {"S": user_id},
+                    "version": {"N": str(version)},
+                    "page": {"S": json.dumps(list(recent))},
+                    "expires_at": {"N": str(int(self._clock() + self.ttl))},
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(user_id) OR version = :version"
+                ),
+                ExpressionAttributeValues={":version": {"N": str(version)}},
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return False
+        return True
+
+    def invalidate(self, user_id: str) -> None:
+        # The entry is kept, with its version, as long as a page read before
+        # the invalidation could be written back
+        self._client.update_item(
+            TableName=self._table_name,
+            Key={"user_id": {"S": user_id}},
+            UpdateExpression="ADD version :one REMOVE page SET expires_at = :expires",
+            ExpressionAttributeValues={
+                ":one": {"N": "1"},
+                ":expires": {"N": str(int(self._clock() + self.ttl))},
+            },
+        )
+
+
+class TicketCache:
+    """
+    Recent tickets of the users, from the container, then the shared cache,
+    then the ticket table
+    """
+
+    def __init__(
+        self, local: LocalTicketCache, shared: Optional[SharedTicketCache] = None
+    ) -> None:
+        self._local = local
+        self._shared = shared
+
+    def get(
+        self, user_id: str, load: Callable[[], TicketPage]
+    ) -> Tuple[TicketPage, CacheTier]:
+        """
+        Return the recent tickets of a user and the tier they came from,
+        `load` queries them from the ticket table on a miss
+        """
+        local = self._local.get(user_id)
+        if self._shared is None:
+            if local is not None:
+                return local.recent, CacheTier.LOCAL
+            recent = load()
+            self._local.put(user_id, recent)
+            return recent, CacheTier.TABLE
+        # The copy is stale once a new ticket of the user bumped the version;
+        # copies expire before an invalidated entry does, so an entry deleted
+        # by DynamoDB cannot bring an old version back in time
+        if local is not None and self._shared.version(user_id) == local.version:
+            return local.recent, CacheTier.LOCAL
+        recent, version = self._shared.get(user_id)
+        if recent is not None:
+            self._local.put(user_id, recent, version)
+            return recent, CacheTier.SHARED
+        recent = load()
+        # A ticket stored meanwhile may be missing, the page is not cached
+        if self._shared.put(user_id, recent, version):
+            self._local.put(user_id, recent, version)
+        return recent, CacheTier.TABLE
+
+
+@lru_cache(maxsize=1)
+def get_shared_ticket_cache() -> Optional[SharedTicketCache]:
+    """
+    Return the shared cache, or None if `TICKET_CACHE_TABLE_NAME` is not set
+    """
+    table_name = os.getenv("TICKET_CACHE_TABLE_NAME")
+    if not table_name:
+        return None
+    return SharedTicketCache(
+        table_name, ttl=float(os.getenv("TICKET_CACHE_SHARED_TTL", DEFAULT_SHARED_TTL))
+    )
+
+
+@lru_cache(maxsize=1)
+def get_ticket_cache() -> TicketCache:
+    """
+    Return the ticket cache of the container, configured from the environment
+    """
+    shared = get_shared_ticket_cache()
+    ttl = float(os.getenv("TICKET_CACHE_TTL", DEFAULT_TTL))
+    if shared is not None:
+        # Copies must expire before the shared entry they were read at
+        ttl = min(ttl, shared.ttl)
+    local = LocalTicketCache(
+        max_size=int(os.getenv("TICKET_CACHE_SIZE", DEFAULT_SIZE)), ttl=ttl
+    )
+    return TicketCache(local, shared)
+
+
+def invalidate_recent_tickets(user_id: str) -> None:
+    """
+    Invalidate the shared cache entry of a user, a no-op unless the shared
+    cache is configured
+    """
+    shared = get_shared_ticket_cache()
+    if shared is not None:
+        shared.invalidate(user_id)
@@ -0,0 +1,211 @@
+"""
+Ticket history table
+
+The channel processors store every ticket of the pipeline, and `GET /tickets`
+reads them back. Tickets are partitioned by `user_id` and sorted by
+`created_id` (`<created_at>#<request_id>`): `created_at` is an ISO 8601 UTC
+timestamp with milliseconds, so the timestamps sort as strings, and the
+request ID tells apart the tickets of a user created in the same millisecond.
+The `type-index` global secondary index partitions them by `user_type`
+(`<user_id>#<type>`), so the tickets of a type are a key condition too. The
+table is named by `TICKET_TABLE_NAME`.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import boto3
+
+from service.models.ticket_message import TicketMessage, TicketType
+
+# Attributes returned to the API, the sort key is the cursor of a page
+ATTRIBUTES = ("type", "subject", "message", "created_at", "created_id")
+TYPE_INDEX = "type-index"
+MILLISECOND = timedelta(milliseconds=1)
+# Sort keys of a millisecond sort between "<created_at>" and "<created_at>$",
+# "$" follows the "#" separator
+SEPARATOR = "#"
+MILLISECOND_END = "$"
+
+TicketItem = Dict[str, str]
+
+
+class TicketPage(NamedTuple):
+    """
+    A page of tickets, and the `created_id` of its last ticket when more
+    tickets follow
+    """
+
+    tickets: List[TicketItem]
+    last_created_id: Optional[str]
+
+
+def format_created_at(moment: datetime) -> str:
+    """
+    Return the sort key of a moment, naive moments are in UTC
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def created_at(request_time_epoch: str) -> str:
+    """
+    Return the sort key of a ticket from the request time of API Gateway, in
+    milliseconds since the epoch
+    """
+    return format_created_at(
+        datetime.fromtimestamp(int(request_time_epoch) / 1000, tz=timezone.utc)
+    )
+
+
+def created_id(created_at: str, request_id: str) -> str:
+    """
+    Return the sort key of a ticket
+    """
+    return f"{created_at}{SEPARATOR}{request_id}"
+
+
+def user_type(user_id: str, ticket_type: str) -> str:
+    """
+    Return the partition key of the tickets of a user and type in the type index
+    """
+    return f"{user_id}#{ticket_type}"
+
+
+def _truncate(moment: datetime) -> datetime:
+    return moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+
+
+def created_id_condition(
+    created_after: Optional[datetime], created_before: Optional[datetime]
+) -> Tuple[Optional[str], Dict[str, str]]:
+    """
+    Return the key condition on `created_id` of a time range, bounds excluded,
+    and its values
+    """
+    # Tickets have a millisecond precision, so the bounds are moved to the
+    # closest millisecond inside the range to use the inclusive operators
+    low = high = None
+    if created_after is not None:
+        low = format_created_at(_truncate(created_after) + MILLISECOND)
+    if created_before is not None:
+        last = _truncate(created_before)
+        if last == created_before:
+            last -= MILLISECOND
+        high = format_created_at(last) + MILLISECOND_END
+    if low is not None and high is not None:
+        return "created_id BETWEEN :low AND :high", {":low": low, ":high": high}
+    if low is not None:
+        return "created_id >= :low", {":low": low}
+    if high is not None:
+        return "created_id <= :high", {":high": high}
+    return None, {}
+
+
+class TicketTable:
+    """
+    Tickets of the users, stored in DynamoDB
+    """
+
+    def __init__(self, table_name: str, client: Any = None) -> None:
+        self._table_name = table_name
+        self._client = client or boto3.client("dynamodb")
+
+    def put_message(self, message: TicketMessage) -> None:
+        """
+        Store the ticket of a pipeline message, redelivered messages overwrite
+        the same item
+
+        Raises ValueError for a type other than a `TicketType`, `GET /tickets`
+        could not return the ticket.
+        """
+        user_id = message.auth.user_id
+        ticket_type = TicketType(message.body.type).value
+        ticket_created_at = created_at(message.request_time_epoch)
+        item = {
+            "user_id": user_id,
+            "created_id": created_id(ticket_created_at, message.request_id),
+            "user_type": user_type(user_id, ticket_type),
+            "created_at": ticket_created_at,
+            "request_id": message.request_id,
+            "type": ticket_type,
+            "subject": message.body.subject,
+            "message": message.body.message,
+        }
+        self._client.put_item(
+            TableName=self._table_name,
+            Item={name: {"S": value} for name, value in item.items()},
+        )
+
+    def query(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[str] = None,
+        ticket_type: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        ascending: bool = False,
+    ) -> TicketPage:
+        """
+        Return up to `limit` tickets of a user, newest first unless
+        `ascending`, starting after the ticket whose `created_id` is `after`
+
+        The type and the time range are key conditions, so only the matching
+        tickets are read.
+        """
+        partition_key, partition_value = "user_id", user_id
+        if ticket_type is not None:
+            partition_key = "user_type"
+            partition_value = user_type(user_id, ticket_type)
+        range_condition, range_values = created_id_condition(
+            created_after, created_before
+        )
+        kwargs: Dict[str, Any] = {
+            "TableName": self._table_name,
+            "KeyConditionExpression": " AND ".join(
+                filter(None, [f"{partition_key} = :partition", range_condition])
+            ),
+            "ExpressionAttributeValues": {
+                ":partition": {"S": partition_value},
+                **{name: {"S": value} for name, value in range_values.items()},
+            },
+            # "type" is a reserved word
+            "ProjectionExpression": ", ".join(f"#{name}" for name in ATTRIBUTES),
+            "ExpressionAttributeNames": {f"#{name}": name for name in ATTRIBUTES},
+            "ScanIndexForward": ascending,
+            "Limit": limit,
+        }
+        if ticket_type is not None:
+            kwargs["IndexName"] = TYPE_INDEX
+        if after is not None:
+            # The keys of the table, and of the index when querying it
+            start_key = {
+                "user_id": user_id,
+                "created_id": after,
+                partition_key: partition_value,
+            }
+            kwargs["ExclusiveStartKey"] = {
+                name: {"S": value} for name, value in start_key.items()
+            }
+        response = self._client.query(**kwargs)
+        last_key = response.get("LastEvaluatedKey")
+        return TicketPage(
+            [
+                {name: value["S"] for name, value in item.items()}
+                for item in response["Items"]
+            ],
+            last_key["created_id"]["S"] if last_key else None,
+        )
+
+
+@lru_cache(maxsize=1)
+def get_ticket_table() -> TicketTable:
+    """
+    Return the ticket table of the container, its client is reused across
+    warm invocations
+    """
+    return TicketTable(os.environ["TICKET_TABLE_NAME"])
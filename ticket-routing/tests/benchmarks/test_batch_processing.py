@@ -0,0 +1,79 @@
+"""
+Benchmark: wall time of an SQS batch whose records each make a 50 ms
+downstream call, one record at a time (the former `BatchProcessor` handlers)
+and concurrently
+"""
+
+import asyncio
+import time
+
+import pytest
+from aws_lambda_powertools.utilities.batch import (
+    BatchProcessor,
+    EventType,
+    process_partial_response,
+)
+
+from service.handlers.processors.batch import (
+    ProcessorConfig,
+    batch_lambda_handler,
+    run_blocking,
+)
+from tests.service.utils import LambdaContext, sqs_event, ticket_message
+
+DOWNSTREAM_LATENCY = 0.05
+BATCH_SIZE = 10
+ROUNDS = 5
+
+pytestmark = pytest.mark.benchmark
+
+
+def downstream_call(record) -> None:
+    time.sleep(DOWNSTREAM_LATENCY)
+
+
+def sequential_handler(event: dict, context) -> dict:
+    return process_partial_response(
+        event=event,
+        record_handler=downstream_call,
+        processor=BatchProcessor(event_type=EventType.SQS),
+        context=context,
+    )
+
+
+async def blocking_record_handler(record) -> None:
+    await run_blocking(downstream_call, record)
+
+
+async def async_record_handler(record) -> None:
+    await asyncio.sleep(DOWNSTREAM_LATENCY)
+
+
+def _wall_time_ms(handler) -> float:
+    event = sqs_event(*[ticket_message("3222", index) for index in range(BATCH_SIZE)])
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start_ns = time.perf_counter_ns()
+        assert handler(event, LambdaContext()) == {"batchItemFailures": []}
+        best = min(best, (time.perf_counter_ns() - start_ns) / 1e6)
+    return best
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 5, 10])
+def test_batch_wall_time(max_concurrency, capsys):
+    sequential = _wall_time_ms(sequential_handler)
+    config = ProcessorConfig("benchmark", max_concurrency=max_concurrency)
+    blocking = _wall_time_ms(batch_lambda_handler(config, blocking_record_handler))
+    native = _wall_time_ms(batch_lambda_handler(config, async_record_handler))
+    with capsys.disabled():
+        print(
+            f"\n{BATCH_SIZE} records of {DOWNSTREAM_LATENCY * 1000:.0f} ms: "
+            f"{sequential:.0f} ms one at a time, with max_concurrency="
+            f"{max_concurrency} {blocking:.0f} ms in threads, "
+            f"{native:.0f} ms with async calls"
+        )
+
+    rounds = -(-BATCH_SIZE // max_concurrency)
+    budget = rounds * DOWNSTREAM_LATENCY * 1000 + 40
+    assert sequential >= BATCH_SIZE * DOWNSTREAM_LATENCY * 1000
+    assert blocking < budget and native < budget
@@ -0,0 +1,89 @@
+"""
+Benchmark: parse cost per SQS record, from the record to the ticket message
+
+    - "json_body + json.loads": the former processors, decoding the SNS
+      envelope with `SQSRecord.json_body`, then its `Message`, to untyped dicts
+    - "json_body + json.loads + model_validate": the same, typed afterwards
+    - "envelope TypeAdapter": envelope and message in one `validate_json`
+    - "raw message TypeAdapter": with SNS raw message delivery, which mostly
+      saves the envelope on the queue (about 500 bytes a record) rather than
+      parse time, the notification is built around the message
+"""
+
+import json
+import statistics
+import time
+from typing import Callable, Dict
+
+import pytest
+from aws_lambda_powertools.utilities.data_classes.sqs_event import SQSRecord
+
+from service.models.ticket_message import TicketMessage, parse_notification
+from tests.service.utils import sqs_event, ticket_message
+
+RECORDS = 2_000
+ROUNDS = 10
+
+pytestmark = pytest.mark.benchmark
+
+
+def _untyped(record: dict) -> str:
+    message = json.loads(SQSRecord(record).json_body["Message"])
+    return message["auth"]["tier"]
+
+
+def _validated(record: dict) -> str:
+    message = json.loads(SQSRecord(record).json_body["Message"])
+    return TicketMessage.model_validate(message).auth.tier
+
+
+def _envelope(record: dict) -> str:
+    return parse_notification(SQSRecord(record).body, False).message.auth.tier
+
+
+def _raw(record: dict) -> str:
+    return parse_notification(SQSRecord(record).body, True).message.auth.tier
+
+
+PARSERS: Dict[str, Callable[[dict], str]] = {
+    "json_body + json.loads": _untyped,
+    "json_body + json.loads + model_validate": _validated,
+    "envelope TypeAdapter": _envelope,
+    "raw message TypeAdapter": _raw,
+}
+
+
+def _cost_us(parse: Callable[[dict], str], records: list) -> float:
+    """
+    Return the median cost of a record in microseconds
+    """
+    costs = []
+    for _ in range(ROUNDS):
+        start_ns = time.perf_counter_ns()
+        for record in records:
+            parse(record)
+        costs.append((time.perf_counter_ns() - start_ns) / len(records) / 1e3)
+    return statistics.median(costs)
+
+
+@pytest.fixture(scope="module")
+def costs() -> Dict[str, float]:
+    messages = [ticket_message("3222", index, tier="gold") for index in range(RECORDS)]
+    envelopes = sqs_event(*messages)["Records"]
+    raw = sqs_event(*messages, raw=True)["Records"]
+    return {
+        name: _cost_us(parse, raw if parse is _raw else envelopes)
+        for name, parse in PARSERS.items()
+    }
+
+
+def test_record_parsing(costs, capsys):
+    with capsys.disabled():
+        print()
+        for name, cost in costs.items():
+            print(f"Parse an SQS record ({name}): {cost:.2f} us")
+
+    # Typed in a single pass costs less than typing the untyped dicts
+    assert (
+        costs["envelope TypeAdapter"] < costs["json_body + json.loads + model_validate"]
+    )
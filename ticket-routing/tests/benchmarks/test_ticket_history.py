@@ -0,0 +1,144 @@
+"""
+Benchmark: GET /tickets for a user with 10k tickets, against moto
+
+Moto evaluates a query over the whole partition in Python, so the latencies
+measure the handler plus moto; what holds on DynamoDB is that a page costs a
+single `Query` reading a bounded number of items, wherever it starts, and
+that cached first pages cost none.
+"""
+
+import copy
+import json
+import logging
+import statistics
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from service.handlers import tickets
+from service.storage.ticket_cache import get_ticket_cache
+from service.storage.ticket_table import (
+    created_at,
+    created_id,
+    get_ticket_table,
+    user_type,
+)
+from tests.service.utils import (
+    EPOCH_MS,
+    TABLE_NAME,
+    LambdaContext,
+    api_event,
+    create_table,
+)
+
+TICKETS = 10_000
+OTHER_USERS = 100
+WARMUP_ROUNDS = 5
+ROUNDS = 50
+PAGE_SIZE = "20"
+
+pytestmark = pytest.mark.benchmark
+
+
+def ticket_type(index: int) -> str:
+    return "finance" if index % 2 else "general"
+
+
+def _put_requests(user_id: str, count: int):
+    for index in range(count):
+        ticket_created_at = created_at(str(EPOCH_MS + index * 1000))
+        request_id = f"{user_id}-{index}"
+        yield {
+            "PutRequest": {
+                "Item": {
+                    "user_id": {"S": user_id},
+                    "created_id": {"S": created_id(ticket_created_at, request_id)},
+                    "user_type": {"S": user_type(user_id, ticket_type(index))},
+                    "created_at": {"S": ticket_created_at},
+                    "request_id": {"S": request_id},
+                    "type": {"S": ticket_type(index)},
+                    "subject": {"S": ""},
+                    "message": {"S": f"Ticket {index}"},
+                }
+            }
+        }
+
+
+@pytest.fixture(scope="module")
+def ticket_table():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+        monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+        monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        monkeypatch.setenv("TICKET_TABLE_NAME", TABLE_NAME)
+        with mock_aws():
+            client = boto3.client("dynamodb")
+            create_table(client)
+            requests = list(_put_requests("3222", TICKETS))
+            for user in range(OTHER_USERS):
+                requests.extend(_put_requests(f"user-{user}", 10))
+            for start in range(0, len(requests), 25):
+                client.batch_write_item(
+                    RequestItems={TABLE_NAME: requests[start : start + 25]}
+                )
+            get_ticket_table.cache_clear()
+            level = tickets.logger.log_level
+            tickets.logger.setLevel(logging.WARNING)
+            yield get_ticket_table()
+            tickets.logger.setLevel(level)
+            get_ticket_table.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "start", ["first page", "cached first page", "middle page", "filtered page"]
+)
+def test_ticket_history(ticket_table, start, monkeypatch, capsys):
+    if start != "cached first page":
+        monkeypatch.setenv("TICKET_CACHE_TTL", "0")
+    get_ticket_cache.cache_clear()
+    query = {"limit": PAGE_SIZE}
+    if start == "middle page":
+        index = TICKETS // 2
+        query["cursor"] = tickets.encode_cursor(
+            created_id(created_at(str(EPOCH_MS + index * 1000)), f"3222-{index}")
+        )
+    if start == "filtered page":
+        # Finance tickets of the last 100 seconds
+        query["type"] = "finance"
+        query["created_after"] = created_at(str(EPOCH_MS + (TICKETS - 100) * 1000))
+    event = api_event("3222", query)
+    context = LambdaContext()
+
+    for _ in range(WARMUP_ROUNDS):
+        tickets.lambda_handler(copy.deepcopy(event), context)
+
+    queries = []
+    events = ticket_table._client.meta.events
+    events.register(
+        "before-call.dynamodb.Query",
+        lambda **kwargs: queries.append(kwargs["params"]),
+        unique_id="count-queries",
+    )
+    latencies = []
+    for _ in range(ROUNDS):
+        # The resolver normalizes the query parameters of the event in place
+        fresh_event = copy.deepcopy(event)
+        start_ns = time.perf_counter_ns()
+        response = tickets.lambda_handler(fresh_event, context)
+        latencies.append((time.perf_counter_ns() - start_ns) / 1e6)
+        assert response["statusCode"] == 200
+        assert len(json.loads(response["body"])["tickets"]) == int(PAGE_SIZE)
+
+    events.unregister("before-call.dynamodb.Query", unique_id="count-queries")
+    get_ticket_cache.cache_clear()
+    assert len(queries) == (0 if start == "cached first page" else ROUNDS)
+    percentiles = statistics.quantiles(latencies, n=100)
+    # Keeps the metrics of every invocation out of the report
+    with capsys.disabled():
+        print(
+            f"\nGET /tickets ({start}, {PAGE_SIZE} of {TICKETS:,} tickets, moto): "
+            f"p50 {percentiles[49]:.2f} ms, p99 {percentiles[98]:.2f} ms, "
+            f"{len(queries)} queries"
+        )
@@ -0,0 +1,74 @@
+"""
+Benchmark: tickets per second sent to a local webhook by 10 concurrent
+records, through the shared keep-alive pool and with a new connection per
+ticket
+
+Localhost connections are cheap (no network round trip, no TLS handshake),
+so the gap is a lower bound of what reuse saves against a remote HTTPS
+webhook.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import urllib3
+
+from service.notifications.webhook import WebhookClient
+from tests.service.test_webhook import serve
+
+TICKETS = 1000
+CONCURRENCY = 10
+
+pytestmark = pytest.mark.benchmark
+
+
+class NewConnectionPerRequest:
+    """
+    Opens and closes a connection for every request
+    """
+
+    def request(self, *args, **kwargs):
+        with urllib3.PoolManager(retries=False) as pool:
+            return pool.request(*args, **kwargs)
+
+
+def _send_all(client: WebhookClient) -> float:
+    """
+    Return the tickets sent per second
+    """
+    start_ns = time.perf_counter_ns()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        statuses = list(
+            executor.map(
+                lambda index: client.send({"message": f"Ticket {index}"}, str(index)),
+                range(TICKETS),
+            )
+        )
+    elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+    assert statuses == [200] * TICKETS
+    return TICKETS / elapsed
+
+
+@pytest.mark.parametrize("reuse", [True, False], ids=["pooled", "new connections"])
+def test_webhook_throughput(reuse, capsys):
+    server = serve()
+    pool = urllib3.PoolManager(maxsize=CONCURRENCY, block=True, retries=False)
+    client = WebhookClient(
+        server.url, pool=pool if reuse else NewConnectionPerRequest()
+    )
+    try:
+        throughput = _send_all(client)
+    finally:
+        server.shutdown()
+        server.server_close()
+    with capsys.disabled():
+        print(
+            f"\nWebhook ({'pooled' if reuse else 'new connections'}, "
+            f"{CONCURRENCY} concurrent records): {throughput:,.0f} tickets/s, "
+            f"{server.connections} connections for {TICKETS} tickets"
+        )
+    if reuse:
+        assert server.connections <= CONCURRENCY
+    else:
+        assert server.connections == TICKETS
@@ -5,13 +5,39 @@ Test Infrastructure
 import aws_cdk as core
 import aws_cdk.assertions as assertions
 
-from infrastructure.component import PythonDemoStack
+from infrastructure.component import TicketRoutingStack
 
 
 def test_lambda_created():
     app = core.App()
-    stack = PythonDemoStack(app, "demo-cdk-test")
+    stack = TicketRoutingStack(app, "demo-cdk-test")
     template = assertions.Template.from_stack(stack)
 
     # Extra function for log rotation
     template.resource_count_is("AWS::Lambda::Function", 2)
+
+
+def test_processors_report_batch_item_failures():
+    app = core.App()
+    stack = TicketRoutingStack(app, "ticket-routing-test")
+    template = assertions.Template.from_stack(stack)
+
+    # Otherwise Lambda deletes the failed records of a batch with the others
+    mappings = template.find_resources("AWS::Lambda::EventSourceMapping")
+    assert len(mappings) == 3
+    for mapping in mappings.values():
+        assert mapping["Properties"]["FunctionResponseTypes"] == [
+            "ReportBatchItemFailures"
+        ]
+
+
+def test_shared_ticket_cache():
+    # Tickets, ticket cache and idempotency tables
+    stack = TicketRoutingStack(core.App(), "ticket-routing-test")
+    template = assertions.Template.from_stack(stack)
+    template.resource_count_is("AWS::DynamoDB::Table", 3)
+
+    app = core.App(context={"shared_ticket_cache": "false"})
+    stack = TicketRoutingStack(app, "ticket-routing-test")
+    template = assertions.Template.from_stack(stack)
+    template.resource_count_is("AWS::DynamoDB::Table", 2)
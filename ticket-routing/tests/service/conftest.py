@@ -0,0 +1,18 @@
+import pytest
+
+from service.auth.decision_cache import get_decision_cache
+from service.auth.jwt_verifier import get_jwt_verifier
+from service.auth.token_table import get_token_table
+
+
+@pytest.fixture(autouse=True)
+def reset_authorizer_caches():
+    """
+    Every test starts from a cold authorizer container
+    """
+    caches = [get_token_table, get_jwt_verifier, get_decision_cache]
+    for cache in caches:
+        cache.cache_clear()
+    yield
+    for cache in caches:
+        cache.cache_clear()
@@ -0,0 +1,80 @@
+import json
+import time
+
+from service.handlers.processors import analytics
+from tests.service.utils import LambdaContext, sqs_event, ticket_message
+
+# Start of a recent minute, CloudWatch skips EMF timestamps older than 14 days
+MINUTE = int(time.time() // 60 * 60_000) - 60_000
+
+
+def _message(index: int, tier: str, epoch_ms: int) -> dict:
+    return {
+        **ticket_message("3222", index, tier=tier),
+        "request_time_epoch": str(epoch_ms),
+    }
+
+
+def _documents(output: str) -> list:
+    return [json.loads(line) for line in output.splitlines() if '"_aws"' in line]
+
+
+def _counts(documents: list) -> list:
+    return [
+        (
+            sorted(document["_aws"]["CloudWatchMetrics"][0]["Dimensions"][0]),
+            document.get("tier"),
+            document.get("type"),
+            document["Tickets"],
+        )
+        for document in documents
+    ]
+
+
+def test_one_document_per_group(capsys):
+    # 4 gold tickets (2 general, 2 finance) and 6 general tickets (3 and 3)
+    messages = [
+        _message(index, "gold" if index < 4 else "general", MINUTE + index * 1000)
+        for index in range(10)
+    ]
+    # Unknown types share a single metric
+    for index, ticket_type in enumerate(["refund", "Refund!", "x" * 1000]):
+        message = _message(10 + index, "gold", MINUTE + 10_000)
+        message["body"]["type"] = ticket_type
+        messages.append(message)
+    event = sqs_event(*messages)
+    event["Records"].append({**event["Records"][0], "messageId": "invalid"})
+    event["Records"][-1]["body"] = json.dumps({"Message": "{}"})
+
+    response = analytics.lambda_handler(event, LambdaContext())
+    assert response == {"batchItemFailures": [{"itemIdentifier": "invalid"}]}
+
+    documents = _documents(capsys.readouterr().out)
+    assert {document["_aws"]["Timestamp"] for document in documents} == {MINUTE}
+    assert {document["service"] for document in documents} == {"analytics"}
+    groups = ["service", "tier", "type"]
+    assert _counts(documents) == [
+        (["service"], None, None, [13.0]),
+        (groups, "general", "finance", [3.0]),
+        (groups, "general", "general", [3.0]),
+        (groups, "gold", "finance", [2.0]),
+        (groups, "gold", "general", [2.0]),
+        (groups, "gold", "other", [3.0]),
+    ]
+
+
+def test_one_document_per_minute(capsys):
+    event = sqs_event(
+        _message(0, "gold", MINUTE + 59_999),
+        _message(1, "gold", MINUTE + 60_000),
+        _message(2, "gold", MINUTE + 60_001),
+    )
+    assert analytics.lambda_handler(event, LambdaContext()) == {"batchItemFailures": []}
+    documents = _documents(capsys.readouterr().out)
+    assert [
+        (document["_aws"]["Timestamp"], document["Tickets"])
+        for document in documents
+        if "tier" not in document
+    ] == [(MINUTE, [1.0]), (MINUTE + 60_000, [2.0])]
+    # The counts do not leak into the next batch
+    assert analytics.volume.counts == {}
@@ -0,0 +1,97 @@
+import json
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from service.auth.token_table import (
+    TokenTable,
+    get_token_table,
+    load_dynamodb,
+    load_file,
+    token_digest,
+)
+from service.handlers.authorizer import lambda_handler
+
+METHOD_ARN = "arn:aws:execute-api:eu-west-1:123456789012:api-id/prod/GET/tickets"
+USER = {"user_id": 42, "email": "user@example.com", "customer_tier": "gold"}
+
+
+def test_lambda_handler():
+    response = lambda_handler(
+        {"authorizationToken": "Avb3TU8O2ts1", "methodArn": METHOD_ARN}, None
+    )
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Allow"
+    assert response["context"] == {
+        "user_id": 1234,
+        "email": "fakeuser234@example.com",
+        "customer_tier": "gold",
+    }
+
+    response = lambda_handler(
+        {"authorizationToken": "unknown", "methodArn": METHOD_ARN}, None
+    )
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Deny"
+    assert "context" not in response
+
+
+def test_token_table_file(tmp_path, monkeypatch):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps({token_digest("secret"): USER}))
+    assert load_file(path) == {token_digest("secret"): USER}
+
+    monkeypatch.setenv("TOKEN_TABLE_FILE", str(path))
+    assert get_token_table().lookup("secret") == USER
+    assert get_token_table().lookup("Avb3TU8O2ts1") is None
+
+
+def test_token_table_refresh():
+    now = 0.0
+    tables = iter([{token_digest("first"): USER}, {token_digest("second"): USER}])
+    table = TokenTable(lambda: next(tables), ttl=60, clock=lambda: now)
+
+    assert table.lookup("first") == USER
+    now = 59.0
+    assert table.lookup("second") is None
+    now = 60.0
+    assert table.lookup("second") == USER
+    assert table.lookup("first") is None
+
+    # A failed reload keeps the current table until the next attempt
+    now = 120.0
+    assert table.lookup("second") == USER
+    with pytest.raises(StopIteration):
+        TokenTable(lambda: next(tables)).lookup("second")
+
+
+def test_token_table_dynamodb(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("dynamodb")
+        client.create_table(
+            TableName="tokens",
+            BillingMode="PAY_PER_REQUEST",
+            KeySchema=[{"AttributeName": "token_hash", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "token_hash", "AttributeType": "S"}
+            ],
+        )
+        tokens = {f"token-{i}": {**USER, "user_id": i} for i in range(2_000)}
+        for token, user in tokens.items():
+            client.put_item(
+                TableName="tokens",
+                Item={
+                    "token_hash": {"S": token_digest(token)},
+                    "user_id": {"N": str(user["user_id"])},
+                    "email": {"S": user["email"]},
+                    "customer_tier": {"S": user["customer_tier"]},
+                },
+            )
+
+        assert len(load_dynamodb("tokens", client)) == len(tokens)
+
+        monkeypatch.setenv("TOKEN_TABLE_NAME", "tokens")
+        assert get_token_table().lookup("token-1999") == tokens["token-1999"]
+        assert get_token_table().lookup("token-2000") is None
@@ -0,0 +1,71 @@
+import asyncio
+
+from aws_lambda_powertools.utilities.data_classes.sqs_event import SQSRecord
+
+from service.handlers.processors.batch import (
+    ProcessorConfig,
+    batch_lambda_handler,
+    notification,
+)
+from tests.service.utils import LambdaContext, sqs_event, ticket_message
+
+
+def _failed(response: dict, event: dict) -> list:
+    """
+    Return the indexes of the records reported as failed
+    """
+    ids = [record["messageId"] for record in event["Records"]]
+    return sorted(
+        ids.index(failure["itemIdentifier"])
+        for failure in response["batchItemFailures"]
+    )
+
+
+def test_records_run_concurrently_up_to_the_limit():
+    running = 0
+    peak = 0
+
+    async def record_handler(record: SQSRecord):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    handler = batch_lambda_handler(
+        ProcessorConfig("test", max_concurrency=3), record_handler
+    )
+    event = sqs_event(*[ticket_message("3222", index) for index in range(10)])
+    assert handler(event, LambdaContext()) == {"batchItemFailures": []}
+    assert peak == 3
+
+
+def test_failed_and_slow_records_are_reported():
+    async def record_handler(record: SQSRecord):
+        message = notification(record, ProcessorConfig("test")).message
+        index = int(message.body.message.split()[-1])
+        if index == 1:
+            raise ValueError("Downstream rejected the ticket")
+        await asyncio.sleep(1 if index == 3 else 0)
+
+    handler = batch_lambda_handler(
+        ProcessorConfig("test", record_timeout=0.05), record_handler
+    )
+    event = sqs_event(*[ticket_message("3222", index) for index in range(5)])
+    assert _failed(handler(event, LambdaContext()), event) == [1, 3]
+
+    # The next batch gets a new semaphore on a new event loop
+    assert handler(sqs_event(ticket_message("3222", 0)), LambdaContext()) == {
+        "batchItemFailures": []
+    }
+
+
+def test_config_from_env(monkeypatch):
+    assert ProcessorConfig.from_env("test", max_concurrency=5) == ProcessorConfig(
+        "test", 5, 5.0
+    )
+    monkeypatch.setenv("PROCESSOR_MAX_CONCURRENCY", "2")
+    monkeypatch.setenv("PROCESSOR_RECORD_TIMEOUT", "0.5")
+    assert ProcessorConfig.from_env("test", max_concurrency=5) == ProcessorConfig(
+        "test", 2, 0.5
+    )
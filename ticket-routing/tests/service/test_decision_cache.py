@@ -0,0 +1,90 @@
+import json
+
+from service.auth.decision_cache import DecisionCache
+from service.auth.token_table import TokenTable, token_digest
+from service.handlers import authorizer
+
+METHOD_ARN = "arn:aws:execute-api:eu-west-1:123456789012:api-id/prod/GET/tickets"
+USER = {"user_id": 1234, "email": "user@example.com", "customer_tier": "gold"}
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _total(documents: list, metric: str) -> float:
+    # A metric added several times in an invocation holds a list of values
+    total = 0.0
+    for document in documents:
+        value = document.get(metric, [])
+        total += sum(value) if isinstance(value, list) else value
+    return total
+
+
+def test_lru_eviction():
+    cache = DecisionCache(max_size=2)
+    assert cache.put("a", USER) == 0
+    assert cache.put("b", USER) == 0
+    # "a" becomes the most recently used decision
+    assert cache.get("a") is not None
+    assert cache.put("c", None) == 1
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+
+
+def test_ttl():
+    clock = Clock()
+    cache = DecisionCache(ttl=60, deny_ttl=10, clock=clock)
+    cache.put("allow", USER)
+    cache.put("deny", None)
+    cache.put("expiring", USER, ttl=5)
+    # A token TTL never extends the default one
+    cache.put("long-lived", USER, ttl=3600)
+
+    clock.now = 9.0
+    assert cache.get("deny").user_information is None
+    assert cache.get("expiring") is None
+    clock.now = 10.0
+    assert cache.get("deny") is None
+    assert cache.get("allow").user_information == USER
+    clock.now = 60.0
+    assert cache.get("allow") is None
+    assert cache.get("long-lived") is None
+
+
+def test_repeated_tokens_are_validated_once(monkeypatch, capsys):
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {token_digest("good"): USER}
+
+    # The table is reloaded on every lookup, each one shows as a load
+    table = TokenTable(loader, ttl=0)
+    monkeypatch.setattr(authorizer, "get_token_table", lambda: table)
+
+    effects = []
+    for token in ["good", "bad", "good", "bad", "bad"]:
+        response = authorizer.lambda_handler(
+            {"authorizationToken": token, "methodArn": METHOD_ARN}, None
+        )
+        effects.append(response["policyDocument"]["Statement"][0]["Effect"])
+
+    assert effects == ["Allow", "Deny", "Allow", "Deny", "Deny"]
+    assert len(loads) == 2
+
+    # One EMF document per invocation
+    documents = [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if '"_aws"' in line
+    ]
+    assert _total(documents, "DecisionCacheHit") == 3
+    assert _total(documents, "DecisionCacheMiss") == 2
@@ -0,0 +1,149 @@
+import copy
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from service.handlers.processors import general_channel
+from service.handlers.processors.idempotency import (
+    get_idempotency_config,
+    get_persistence_layer,
+)
+from service.models.ticket_message import TicketMessage
+from service.storage.ticket_table import TicketTable, get_ticket_table
+from tests.service.utils import (
+    TABLE_NAME,
+    LambdaContext,
+    create_table,
+    get_tickets,
+    reset_containers,
+    sqs_event,
+    ticket_message,
+)
+
+IDEMPOTENCY_TABLE_NAME = "idempotency"
+BATCH_SIZE = 10
+
+
+def reset_idempotency() -> None:
+    for cache in [get_persistence_layer, get_idempotency_config]:
+        cache.cache_clear()
+
+
+@pytest.fixture
+def ticket_table(monkeypatch):
+    """
+    Return the ticket table, next to the idempotency table
+    """
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("TICKET_TABLE_NAME", TABLE_NAME)
+    monkeypatch.setenv("IDEMPOTENCY_TABLE_NAME", IDEMPOTENCY_TABLE_NAME)
+    with mock_aws():
+        client = boto3.client("dynamodb")
+        create_table(client)
+        client.create_table(
+            TableName=IDEMPOTENCY_TABLE_NAME,
+            BillingMode="PAY_PER_REQUEST",
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        )
+        reset_containers()
+        reset_idempotency()
+        yield get_ticket_table()
+        reset_containers()
+        reset_idempotency()
+
+
+def count_calls(ticket_table: TicketTable) -> list:
+    """
+    Record the DynamoDB operations of the ticket table and idempotency store
+    """
+    calls = []
+    for client in [ticket_table._client, get_persistence_layer().client]:
+        client.meta.events.register(
+            "before-parameter-build.dynamodb",
+            lambda model, **kwargs: calls.append(model.name),
+        )
+    return calls
+
+
+def deliver(event: dict) -> float:
+    """
+    Return the wall time in milliseconds of a batch without failures
+    """
+    start_ns = time.perf_counter_ns()
+    response = general_channel.lambda_handler(copy.deepcopy(event), LambdaContext())
+    elapsed = (time.perf_counter_ns() - start_ns) / 1e6
+    assert response == {"batchItemFailures": []}
+    return elapsed
+
+
+def test_redelivered_batches_skip_downstream_io(ticket_table):
+    event = sqs_event(*[ticket_message("3222", index) for index in range(BATCH_SIZE)])
+    calls = count_calls(ticket_table)
+    first = deliver(event)
+    # Claim, store the ticket, complete
+    assert calls.count("PutItem") == 2 * BATCH_SIZE
+    assert calls.count("UpdateItem") == BATCH_SIZE
+
+    calls.clear()
+    redelivered = deliver(event)
+    assert calls == []
+
+    # A new container finds the completed notifications in the table
+    reset_idempotency()
+    calls = count_calls(ticket_table)
+    cold = deliver(event)
+    assert calls == ["PutItem"] * BATCH_SIZE
+
+    # SNS may deliver a notification twice, as different SQS messages
+    for record in event["Records"]:
+        record["messageId"] += "-duplicate"
+    calls.clear()
+    deliver(event)
+    assert calls == []
+
+    print(
+        f"\nBatch of {BATCH_SIZE} (moto): {first:.1f} ms first delivery, "
+        f"{redelivered:.1f} ms redelivered, {cold:.1f} ms redelivered to a new "
+        "container"
+    )
+    assert redelivered * 5 < first
+    assert len(get_tickets("3222")["tickets"]) == BATCH_SIZE
+
+
+def test_failed_records_are_processed_again(ticket_table):
+    event = sqs_event(ticket_message("3222", 0), ticket_message("3222", 1))
+    put_message = ticket_table.put_message
+
+    def failing_put_message(message: TicketMessage) -> None:
+        if message.body.message == "Ticket 1":
+            raise RuntimeError("Throttled")
+        put_message(message)
+
+    ticket_table.put_message = failing_put_message
+    response = general_channel.lambda_handler(copy.deepcopy(event), LambdaContext())
+    failed_id = event["Records"][1]["messageId"]
+    assert response == {"batchItemFailures": [{"itemIdentifier": failed_id}]}
+
+    ticket_table.put_message = put_message
+    calls = count_calls(ticket_table)
+    deliver(event)
+    # Only the failed record is stored again
+    assert calls.count("PutItem") == 2 and calls.count("UpdateItem") == 1
+    assert [ticket["message"] for ticket in get_tickets("3222")["tickets"]] == [
+        "Ticket 1",
+        "Ticket 0",
+    ]
+
+
+def test_without_idempotency_table(ticket_table, monkeypatch):
+    monkeypatch.delenv("IDEMPOTENCY_TABLE_NAME")
+    event = sqs_event(ticket_message("3222", 0))
+    assert get_persistence_layer() is None
+    deliver(event)
+    deliver(event)
+    assert len(get_tickets("3222")["tickets"]) == 1
@@ -0,0 +1,219 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from service.auth.jwt_verifier import JwksCache, JwtVerifier
+from service.handlers.authorizer import lambda_handler
+
+ISSUER = "https://idp.example.com"
+AUDIENCE = "tickets"
+METHOD_ARN = "arn:aws:execute-api:eu-west-1:123456789012:api-id/prod/GET/tickets"
+CLAIMS = {"sub": "user-42", "email": "user@example.com", "customer_tier": "gold"}
+
+
+class KeySet:
+    """
+    Locally generated signing keys and their JWKS document
+    """
+
+    def __init__(self, *kids: str) -> None:
+        self.keys = {kid: self._generate() for kid in kids}
+        self.fetches = 0
+
+    @staticmethod
+    def _generate() -> rsa.RSAPrivateKey:
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def rotate(self, kid: str) -> None:
+        self.keys[kid] = self._generate()
+
+    def fetch(self) -> dict:
+        self.fetches += 1
+        return {
+            "keys": [
+                {
+                    **jwt.algorithms.RSAAlgorithm.to_jwk(
+                        key.public_key(), as_dict=True
+                    ),
+                    "kid": kid,
+                    "alg": "RS256",
+                    "use": "sig",
+                }
+                for kid, key in self.keys.items()
+            ]
+        }
+
+    def sign(self, kid: str, key: rsa.RSAPrivateKey = None, **claims) -> str:
+        payload = {
+            **CLAIMS,
+            "iss": ISSUER,
+            "aud": AUDIENCE,
+            "exp": int(time.time()) + 300,
+            **claims,
+        }
+        # A None claim is left out of the token
+        payload = {
+            claim: value for claim, value in payload.items() if value is not None
+        }
+        return jwt.encode(
+            payload, key or self.keys[kid], algorithm="RS256", headers={"kid": kid}
+        )
+
+
+@pytest.fixture
+def key_set():
+    return KeySet("first")
+
+
+@pytest.fixture
+def verifier(key_set):
+    return JwtVerifier(JwksCache(key_set.fetch), issuer=ISSUER, audience=AUDIENCE)
+
+
+def test_verify(key_set, verifier):
+    expected = {
+        "user_id": "user-42",
+        "email": "user@example.com",
+        "customer_tier": "gold",
+    }
+    assert verifier.verify(key_set.sign("first")) == expected
+    assert verifier.verify(key_set.sign("first")) == expected
+    assert key_set.fetches == 1
+
+    assert verifier.verify(key_set.sign("first", exp=int(time.time()) - 60)) is None
+    assert verifier.verify(key_set.sign("first", aud="other")) is None
+    assert verifier.verify(key_set.sign("first", iss="https://evil.example")) is None
+    assert verifier.verify(key_set.sign("first", customer_tier=None)) is None
+    assert verifier.verify("not.a.jwt") is None
+
+    header, payload, signature = key_set.sign("first").split(".")
+    tampered = key_set.sign("first", sub="admin").split(".")[1]
+    assert verifier.verify(f"{header}.{tampered}.{signature}") is None
+    # Signed by a key that is not in the JWKS document
+    forged = key_set.sign("first", key=KeySet("first").keys["first"])
+    assert verifier.verify(forged) is None
+
+
+def test_unknown_kid_refreshes_once(key_set):
+    now = 0.0
+    verifier = JwtVerifier(
+        JwksCache(key_set.fetch, ttl=3600, min_refresh_interval=30, clock=lambda: now),
+        issuer=ISSUER,
+        audience=AUDIENCE,
+    )
+    assert verifier.verify(key_set.sign("first"))
+
+    # Rotated keys are picked up on the first token signed with them
+    key_set.keys["second"] = KeySet._generate()
+    now = 31.0
+    assert verifier.verify(key_set.sign("second"))
+    assert key_set.fetches == 2
+
+    # Unknown kids do not refetch the document more than once per interval
+    for _ in range(10):
+        assert verifier.verify(key_set.sign("third", key=key_set.keys["first"])) is None
+    assert key_set.fetches == 2
+
+
+def test_jwks_ttl(key_set):
+    now = 0.0
+    jwks = JwksCache(key_set.fetch, ttl=60, clock=lambda: now)
+    first_key = jwks.get_key("first")
+
+    key_set.rotate("first")
+    now = 59.0
+    assert jwks.get_key("first") is first_key
+    now = 60.0
+    assert jwks.get_key("first") is not first_key
+    assert key_set.fetches == 2
+
+
+def test_jwks_refresh_failure(key_set):
+    now = 0.0
+    responses = iter([key_set.fetch(), RuntimeError("unavailable")])
+
+    def fetch():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    jwks = JwksCache(fetch, ttl=60, min_refresh_interval=30, clock=lambda: now)
+    key = jwks.get_key("first")
+    # The expired keys are kept while the provider fails
+    now = 60.0
+    assert jwks.get_key("first") is key
+
+
+def test_concurrent_misses_share_one_fetch(key_set):
+    fetch_started = threading.Event()
+    release = threading.Event()
+
+    def slow_fetch():
+        fetch_started.set()
+        release.wait(5)
+        return key_set.fetch()
+
+    jwks = JwksCache(slow_fetch)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(jwks.get_key("first")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    fetch_started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert key_set.fetches == 1
+    assert len(results) == 8 and all(key is results[0] for key in results)
+
+
+def test_lambda_handler(key_set, monkeypatch):
+    monkeypatch.setenv("JWKS_URL", "https://idp.example.com/.well-known/jwks.json")
+    monkeypatch.setenv("JWT_ISSUER", ISSUER)
+    monkeypatch.setenv("JWT_AUDIENCE", AUDIENCE)
+    monkeypatch.setattr(
+        "service.auth.jwt_verifier.fetch_jwks", lambda url: key_set.fetch()
+    )
+    response = lambda_handler(
+        {"authorizationToken": key_set.sign("first"), "methodArn": METHOD_ARN},
+        None,
+    )
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Allow"
+    assert response["context"]["user_id"] == "user-42"
+    assert response["context"]["customer_tier"] == "gold"
+
+    # Static tokens are still looked up in the token table
+    response = lambda_handler(
+        {"authorizationToken": "Avb3TU8O2ts1", "methodArn": METHOD_ARN}, None
+    )
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Allow"
+
+
+def test_static_tokens_do_not_import_jwt():
+    script = (
+        "import sys\n"
+        "from service.handlers.authorizer import lambda_handler\n"
+        f"lambda_handler({{'authorizationToken': 'Avb3TU8O2ts1', 'methodArn': {METHOD_ARN!r}}}, None)\n"
+        "print('jwt' in sys.modules)\n"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "JWKS_URL"}
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parents[2],
+        env=env,
+        text=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "False"
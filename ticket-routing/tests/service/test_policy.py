@@ -0,0 +1,116 @@
+import random
+from fnmatch import fnmatchcase
+from typing import Dict, List, Tuple
+
+import pytest
+
+from service.auth.policy import MethodArn, PolicyScope, allowed_resources
+from service.handlers.authorizer import lambda_handler
+
+API_ARN = "arn:aws:execute-api:eu-west-1:123456789012:api-id"
+TOKENS = ["QAB3RUYA4gsd", "Avb3TU8O2ts1"]
+
+
+def _method_arn(method: str, path: str = "tickets") -> str:
+    return f"{API_ARN}/prod/{method}/{path}"
+
+
+def _allows(response: dict, method_arn: str) -> bool:
+    """
+    Evaluate a policy like API Gateway, an explicit Deny wins over any Allow
+    """
+    effects = {
+        statement["Effect"]
+        for statement in response["policyDocument"]["Statement"]
+        for resource in (
+            statement["Resource"]
+            if isinstance(statement["Resource"], list)
+            else [statement["Resource"]]
+        )
+        if fnmatchcase(method_arn, resource)
+    }
+    return effects == {"Allow"}
+
+
+class AuthorizerCache:
+    """
+    API Gateway token authorizer cache: the policy of a token is reused for
+    every request with the token until the TTL expires, whatever the route
+    """
+
+    def __init__(self, ttl: int) -> None:
+        self.ttl = ttl
+        self.policies: Dict[str, Tuple[float, dict]] = {}
+        self.invocations = 0
+        self.denied: List[str] = []
+
+    def authorize(self, token: str, method_arn: str, now: float) -> bool:
+        cached = self.policies.get(token)
+        if cached is None or now >= cached[0]:
+            self.invocations += 1
+            response = lambda_handler(
+                {"authorizationToken": token, "methodArn": method_arn}, None
+            )
+            cached = self.policies[token] = (now + self.ttl, response)
+        return _allows(cached[1], method_arn)
+
+
+def _replay(scope: PolicyScope, ttl: int, monkeypatch) -> AuthorizerCache:
+    """
+    Replay 10 minutes of a GET/POST mix from both tokens, about one request
+    per second
+    """
+    monkeypatch.setenv("AUTHORIZER_POLICY_SCOPE", scope.value)
+    rng = random.Random(15)
+    cache = AuthorizerCache(ttl)
+    now = 0.0
+    while now < 600:
+        method_arn = _method_arn(rng.choice(["GET", "GET", "POST"]))
+        if not cache.authorize(rng.choice(TOKENS), method_arn, now):
+            cache.denied.append(method_arn)
+        now += rng.uniform(0.5, 1.5)
+    return cache
+
+
+def test_policies_cover_the_routes_of_the_caller(monkeypatch):
+    before = _replay(PolicyScope.METHOD, ttl=5, monkeypatch=monkeypatch)
+    after = _replay(PolicyScope.TIER, ttl=300, monkeypatch=monkeypatch)
+    print(
+        f"\nAuthorizer invocations: {before.invocations} "
+        f"({len(before.denied)} spurious 403s) with method policies and a 5 s TTL, "
+        f"{after.invocations} ({len(after.denied)}) with tier policies and a 300 s TTL"
+    )
+
+    # Every cached method policy denies the other route until it expires
+    assert before.denied
+    assert after.denied == []
+    # One invocation per token and TTL
+    assert after.invocations == len(TOKENS) * 2
+    assert after.invocations * 20 < before.invocations
+
+    stage = _replay(PolicyScope.STAGE, ttl=300, monkeypatch=monkeypatch)
+    assert stage.denied == [] and stage.invocations == after.invocations
+
+
+@pytest.mark.parametrize(
+    "scope, expected",
+    [
+        (PolicyScope.TIER, [_method_arn("GET"), _method_arn("POST")]),
+        (PolicyScope.STAGE, [f"{API_ARN}/prod/*"]),
+        (PolicyScope.METHOD, [_method_arn("GET")]),
+    ],
+)
+def test_allowed_resources(scope, expected):
+    method_arn = MethodArn.parse(_method_arn("GET"))
+    assert str(method_arn) == _method_arn("GET")
+    assert allowed_resources(method_arn, "gold", scope) == expected
+
+
+def test_deny_covers_the_stage():
+    response = lambda_handler(
+        {"authorizationToken": "unknown", "methodArn": _method_arn("GET")}, None
+    )
+    assert not _allows(response, _method_arn("POST"))
+    assert response["policyDocument"]["Statement"][0]["Resource"] == (
+        f"{API_ARN}/prod/*"
+    )
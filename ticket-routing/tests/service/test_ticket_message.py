@@ -0,0 +1,30 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from service.models.ticket_message import parse_notification
+from tests.service.utils import sns_notification, ticket_message
+
+
+@pytest.mark.parametrize("raw_message_delivery", [False, True])
+def test_parse_notification(raw_message_delivery):
+    message = ticket_message("3222", 1, tier="gold")
+    envelope = sns_notification(message)
+
+    # Records of the other format are still parsed
+    for body, message_id in [
+        (json.dumps(envelope), envelope["MessageId"]),
+        (json.dumps(message), message["request_id"]),
+    ]:
+        notification = parse_notification(body, raw_message_delivery)
+        assert notification.message_id == message_id
+        assert notification.message.model_dump() == {
+            **message,
+            "body": {**message["body"], "subject": ""},
+        }
+
+    with pytest.raises(ValidationError):
+        parse_notification(json.dumps({"Message": "{}"}), raw_message_delivery)
+    with pytest.raises(ValidationError):
+        parse_notification("not json", raw_message_delivery)
@@ -0,0 +1,414 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from infrastructure import constants
+from service.handlers.processors import general_channel, priority_channel
+from service.models.ticket_message import TicketMessage, TicketType
+from service.storage.ticket_cache import (
+    RECENT_TICKETS,
+    CacheTier,
+    LocalTicketCache,
+    SharedEntry,
+    first_page,
+    get_shared_ticket_cache,
+    get_ticket_cache,
+)
+from service.storage.ticket_table import (
+    TicketPage,
+    TicketTable,
+    created_at,
+    created_id,
+    created_id_condition,
+    get_ticket_table,
+)
+from tests.service.utils import (
+    EPOCH_MS,
+    TABLE_NAME,
+    LambdaContext,
+    create_table,
+    get_tickets,
+    reset_containers,
+    sqs_event,
+    ticket_message,
+)
+
+CACHE_TABLE_NAME = "ticket-cache"
+
+
+@pytest.fixture
+def ticket_table(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("TICKET_TABLE_NAME", TABLE_NAME)
+    with mock_aws():
+        create_table(boto3.client("dynamodb"))
+        reset_containers()
+        yield get_ticket_table()
+        reset_containers()
+
+
+def test_created_at():
+    assert created_at(str(EPOCH_MS + 42)) == "2025-01-01T00:00:00.042+00:00"
+
+
+def test_pipeline_stores_tickets(ticket_table):
+    general = [ticket_message("3222", index) for index in range(3)]
+    priority = [ticket_message("1234", index, tier="gold") for index in range(2)]
+    for module, messages in [(general_channel, general), (priority_channel, priority)]:
+        response = module.lambda_handler(sqs_event(*messages), LambdaContext())
+        assert response == {"batchItemFailures": []}
+
+    # A redelivered message overwrites its ticket
+    general_channel.lambda_handler(sqs_event(general[0]), LambdaContext())
+
+    response = get_tickets("3222")
+    assert response["statusCode"] == 200
+    assert response["next_cursor"] is None
+    assert response["tickets"] == [
+        {
+            "type": "general",
+            "subject": "",
+            "message": "Ticket 2",
+            "created_at": "2025-01-01T00:00:02.000+00:00",
+        },
+        {
+            "type": "finance",
+            "subject": "",
+            "message": "Ticket 1",
+            "created_at": "2025-01-01T00:00:01.000+00:00",
+        },
+        {
+            "type": "general",
+            "subject": "",
+            "message": "Ticket 0",
+            "created_at": "2025-01-01T00:00:00.000+00:00",
+        },
+    ]
+    assert [ticket["message"] for ticket in get_tickets("1234")["tickets"]] == [
+        "Ticket 1",
+        "Ticket 0",
+    ]
+    assert get_tickets("unknown")["tickets"] == []
+
+
+def test_raw_message_delivery(ticket_table, monkeypatch):
+    monkeypatch.setattr(
+        general_channel,
+        "config",
+        general_channel.config._replace(raw_message_delivery=True),
+    )
+    messages = [ticket_message("3222", index) for index in range(3)]
+    response = general_channel.lambda_handler(
+        sqs_event(*messages, raw=True), LambdaContext()
+    )
+    assert response == {"batchItemFailures": []}
+    assert len(get_tickets("3222")["tickets"]) == 3
+
+
+def test_pipeline_rejects_unknown_types(ticket_table):
+    message = ticket_message("3222", 0)
+    message["body"]["type"] = "refund"
+    event = sqs_event(message, ticket_message("3222", 1))
+    response = general_channel.lambda_handler(event, LambdaContext())
+    assert response == {
+        "batchItemFailures": [{"itemIdentifier": event["Records"][0]["messageId"]}]
+    }
+    assert [ticket["type"] for ticket in get_tickets("3222")["tickets"]] == ["finance"]
+
+
+def test_api_model_ticket_types():
+    assert constants.TICKET_TYPES == [ticket_type.value for ticket_type in TicketType]
+
+
+def test_pagination(ticket_table: TicketTable):
+    for index in range(25):
+        ticket_table.put_message(
+            TicketMessage.model_validate(ticket_message("3222", index))
+        )
+    ticket_table.put_message(TicketMessage.model_validate(ticket_message("1234", 100)))
+
+    messages = []
+    query = {"limit": "10"}
+    pages = 0
+    while True:
+        response = get_tickets("3222", **query)
+        pages += 1
+        messages.extend(ticket["message"] for ticket in response["tickets"])
+        if response["next_cursor"] is None:
+            break
+        query["cursor"] = response["next_cursor"]
+
+    assert messages == [f"Ticket {index}" for index in reversed(range(25))]
+    assert pages == 3
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"limit": "0"},
+        {"limit": "101"},
+        {"cursor": "not a cursor"},
+        {"cursor": "Zm9v"},
+        {"type": "support"},
+        {"sort": "newest"},
+        {"created_after": "yesterday"},
+        {
+            "created_after": "2025-01-02T00:00:00Z",
+            "created_before": "2025-01-01T00:00:00Z",
+        },
+    ],
+)
+def test_invalid_query(ticket_table, query):
+    assert get_tickets("3222", **query)["statusCode"] in (400, 422)
+
+
+def count_queries(table: TicketTable) -> list:
+    queries = []
+    table._client.meta.events.register(
+        "before-parameter-build.dynamodb.Query",
+        lambda params, **kwargs: queries.append(params),
+    )
+    return queries
+
+
+def metric_total(output: str, metric: str) -> float:
+    total = 0.0
+    for line in output.splitlines():
+        if '"_aws"' in line:
+            value = json.loads(line).get(metric, [])
+            total += sum(value) if isinstance(value, list) else value
+    return total
+
+
+def test_first_page():
+    tickets = [{"created_id": str(index)} for index in reversed(range(5))]
+    recent = TicketPage(tickets, None)
+    assert first_page(recent, 2) == TicketPage(tickets[:2], "3")
+    assert first_page(recent, 5) is recent
+    assert first_page(TicketPage(tickets, "0"), 10).last_created_id == "0"
+
+
+def test_local_cache():
+    now = 0.0
+    cache = LocalTicketCache(max_size=2, ttl=30, clock=lambda: now)
+    pages = {user: TicketPage([], user) for user in ["a", "b", "c"]}
+    cache.put("a", pages["a"], 3)
+    cache.put("b", pages["b"])
+    assert cache.get("a") == SharedEntry(pages["a"], 3)
+    # "b" is the least recently used user
+    cache.put("c", pages["c"])
+    assert cache.get("b") is None
+    now = 30.0
+    assert cache.get("a") is None
+
+    disabled = LocalTicketCache(ttl=0)
+    disabled.put("a", pages["a"])
+    assert disabled.get("a") is None
+
+
+def test_reads_skip_the_table(ticket_table, capsys):
+    for index in range(30):
+        ticket_table.put_message(
+            TicketMessage.model_validate(ticket_message("3222", index))
+        )
+    queries = count_queries(ticket_table)
+
+    first = get_tickets("3222", limit="10")
+    for _ in range(9):
+        assert get_tickets("3222", limit="10") == first
+    # Every page size is served from the same recent tickets
+    assert get_tickets("3222", limit="100")["tickets"][:10] == first["tickets"]
+    assert len(queries) == 1
+
+    # The following pages are not cached
+    get_tickets("3222", limit="10", cursor=first["next_cursor"])
+    assert len(queries) == 2
+
+    output = capsys.readouterr().out
+    assert metric_total(output, "TicketCacheHit") == 10
+    assert metric_total(output, "TicketCacheMiss") == 1
+
+
+@pytest.fixture
+def shared_cache(ticket_table, monkeypatch):
+    monkeypatch.setenv("TICKET_CACHE_TABLE_NAME", CACHE_TABLE_NAME)
+    boto3.client("dynamodb").create_table(
+        TableName=CACHE_TABLE_NAME,
+        BillingMode="PAY_PER_REQUEST",
+        KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "user_id", "AttributeType": "S"}],
+    )
+    reset_containers()
+    return get_shared_ticket_cache()
+
+
+def test_pipeline_invalidates_the_shared_cache(shared_cache):
+    general_channel.lambda_handler(
+        sqs_event(ticket_message("3222", 0)), LambdaContext()
+    )
+    assert len(get_tickets("3222")["tickets"]) == 1
+
+    # Another container reads the shared cache instead of the table
+    reset_containers()
+    queries = count_queries(get_ticket_table())
+    assert len(get_tickets("3222")["tickets"]) == 1
+    assert queries == []
+
+    general_channel.lambda_handler(
+        sqs_event(ticket_message("3222", 1)), LambdaContext()
+    )
+    reset_containers()
+    queries = count_queries(get_ticket_table())
+    assert len(get_tickets("3222")["tickets"]) == 2
+    assert len(queries) == 1
+
+
+def test_local_copies_follow_invalidations(shared_cache):
+    general_channel.lambda_handler(
+        sqs_event(ticket_message("3222", 0)), LambdaContext()
+    )
+    assert len(get_tickets("3222")["tickets"]) == 1
+    queries = count_queries(get_ticket_table())
+    assert len(get_tickets("3222")["tickets"]) == 1
+    assert queries == []
+
+    # The same container sees a new ticket right away, not once its copy
+    # expires
+    general_channel.lambda_handler(
+        sqs_event(ticket_message("3222", 1)), LambdaContext()
+    )
+    assert len(get_tickets("3222")["tickets"]) == 2
+    assert len(queries) == 1
+
+
+def test_local_ttl(shared_cache, monkeypatch):
+    monkeypatch.setenv("TICKET_CACHE_TTL", "600")
+    get_ticket_cache.cache_clear()
+    assert get_ticket_cache()._local._ttl == shared_cache.ttl
+
+
+def test_invalidation_during_a_read(shared_cache):
+    general_channel.lambda_handler(
+        sqs_event(ticket_message("3222", 0)), LambdaContext()
+    )
+
+    def load() -> TicketPage:
+        recent = get_ticket_table().query("3222", RECENT_TICKETS)
+        # A new ticket is stored before the page read without it is cached
+        general_channel.lambda_handler(
+            sqs_event(ticket_message("3222", 1)), LambdaContext()
+        )
+        return recent
+
+    recent, tier = get_ticket_cache().get("3222", load)
+    assert len(recent.tickets) == 1
+    assert tier is CacheTier.TABLE
+    assert shared_cache.get("3222") == SharedEntry(None, 2)
+
+    # Neither this container nor another one reads the stale page
+    assert len(get_tickets("3222")["tickets"]) == 2
+    reset_containers()
+    assert len(get_tickets("3222")["tickets"]) == 2
+
+
+def test_created_id_condition():
+    moment = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert created_id_condition(None, None) == (None, {})
+    # Bounds are excluded, the high bound sorts after the sort keys of its
+    # millisecond
+    assert created_id_condition(moment, moment + timedelta(days=7)) == (
+        "created_id BETWEEN :low AND :high",
+        {
+            ":low": "2025-01-01T00:00:00.001+00:00",
+            ":high": "2025-01-07T23:59:59.999+00:00$",
+        },
+    )
+    last = created_id("2025-01-07T23:59:59.999+00:00", str(uuid.UUID(int=2**128 - 1)))
+    assert last < "2025-01-07T23:59:59.999+00:00$"
+    # Sub-millisecond bounds keep the tickets of their millisecond on the
+    # right side of the range, naive moments are in UTC
+    precise = datetime(2025, 1, 1, 0, 0, 0, 1500)
+    assert created_id_condition(precise, None)[1] == {
+        ":low": "2025-01-01T00:00:00.002+00:00"
+    }
+    assert created_id_condition(None, precise)[1] == {
+        ":high": "2025-01-01T00:00:00.001+00:00$"
+    }
+    paris = timezone(timedelta(hours=1))
+    assert created_id_condition(None, datetime(2025, 1, 1, 1, tzinfo=paris))[1] == {
+        ":high": "2024-12-31T23:59:59.999+00:00$"
+    }
+
+
+def test_tickets_of_the_same_millisecond(ticket_table):
+    messages = [ticket_message("3222", index) for index in range(5)]
+    for message in messages:
+        message["request_time_epoch"] = str(EPOCH_MS)
+    general_channel.lambda_handler(sqs_event(*messages), LambdaContext())
+
+    pages = [get_tickets("3222", limit="2", sort="asc")]
+    while pages[-1]["next_cursor"] is not None:
+        pages.append(
+            get_tickets("3222", limit="2", sort="asc", cursor=pages[-1]["next_cursor"])
+        )
+    assert [ticket["message"] for page in pages for ticket in page["tickets"]] == [
+        f"Ticket {index}" for index in range(5)
+    ]
+    response = get_tickets(
+        "3222",
+        created_after="2024-12-31T23:59:59.999Z",
+        created_before="2025-01-01T00:00:00.001Z",
+    )
+    assert len(response["tickets"]) == 5
+
+
+def test_filters(ticket_table):
+    # A ticket every hour for 10 days, alternating general and finance
+    for index in range(240):
+        message = ticket_message("3222", index)
+        message["request_time_epoch"] = str(EPOCH_MS + index * 3_600_000)
+        ticket_table.put_message(TicketMessage.model_validate(message))
+    ticket_table.put_message(TicketMessage.model_validate(ticket_message("1234", 1)))
+    queries = count_queries(ticket_table)
+
+    # Finance tickets of the last 2 days
+    response = get_tickets("3222", type="finance", created_after="2025-01-08T23:30:00Z")
+    assert [ticket["created_at"][:13] for ticket in response["tickets"][:2]] == [
+        "2025-01-10T23",
+        "2025-01-10T21",
+    ]
+    assert len(response["tickets"]) == 20
+    assert {ticket["type"] for ticket in response["tickets"]} == {"finance"}
+    assert queries[-1]["IndexName"] == "type-index"
+
+    messages = [ticket["message"] for ticket in response["tickets"]]
+    response = get_tickets(
+        "3222",
+        type="finance",
+        created_after="2025-01-08T23:30:00Z",
+        cursor=response["next_cursor"],
+    )
+    messages += [ticket["message"] for ticket in response["tickets"]]
+    assert response["next_cursor"] is None
+    assert messages == [f"Ticket {index}" for index in range(239, 215, -2)] + [
+        f"Ticket {index}" for index in range(215, 191, -2)
+    ]
+
+    # Oldest first, within a range, bounds excluded
+    response = get_tickets(
+        "3222",
+        created_after="2025-01-01T00:00:00Z",
+        created_before="2025-01-01T05:00:00Z",
+        sort="asc",
+    )
+    assert [ticket["message"] for ticket in response["tickets"]] == [
+        f"Ticket {index}" for index in range(1, 5)
+    ]
+    # Only the matching tickets are read
+    assert all("FilterExpression" not in query for query in queries)
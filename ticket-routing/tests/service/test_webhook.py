@@ -0,0 +1,178 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator, List
+
+import pytest
+
+from service.handlers.processors import priority_channel
+from service.models.ticket_message import TicketMessage
+from service.notifications.webhook import (
+    WebhookClient,
+    WebhookError,
+    full_jitter,
+    get_webhook_client,
+)
+from tests.service.utils import LambdaContext, sqs_event, ticket_message
+
+
+class StubWebhook(ThreadingHTTPServer):
+    """
+    Local webhook receiver, answers each request with `respond(ticket)`
+    """
+
+    daemon_threads = True
+
+    def __init__(self, respond: Callable[[dict], int]) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.respond = respond
+        self.tickets: List[dict] = []
+        self.idempotency_keys: List[str] = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/tickets"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections
+    protocol_version = "HTTP/1.1"
+    server: StubWebhook
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self) -> None:
+        ticket = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.tickets.append(ticket)
+            self.server.idempotency_keys.append(self.headers["Idempotency-Key"])
+        self.send_response(self.server.respond(ticket))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve(respond: Callable[[dict], int] = lambda ticket: 200) -> StubWebhook:
+    server = StubWebhook(respond)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def webhook() -> Iterator[StubWebhook]:
+    server = serve()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def statuses(*codes: int) -> Callable[[dict], int]:
+    """
+    Answer the requests with `codes`, then 200
+    """
+    remaining = list(codes)
+    return lambda ticket: remaining.pop(0) if remaining else 200
+
+
+def test_send_reuses_connections(webhook):
+    client = WebhookClient(webhook.url)
+    for index in range(20):
+        assert client.send({"message": f"Ticket {index}"}, f"ticket-{index}") == 200
+
+    assert webhook.connections == 1
+    assert webhook.tickets[3] == {"message": "Ticket 3"}
+    assert webhook.idempotency_keys[3] == "ticket-3"
+
+
+def test_retries(webhook):
+    delays = []
+    client = WebhookClient(webhook.url, retries=2, sleep=delays.append)
+    webhook.respond = statuses(503, 429)
+    assert client.send({"message": "Ticket"}, "ticket") == 200
+    assert len(webhook.tickets) == 3
+    assert 0 <= delays[0] <= 0.1 and 0 <= delays[1] <= 0.2
+    # Every attempt carries the same key, for the receiver to drop duplicates
+    assert webhook.idempotency_keys == ["ticket"] * 3
+
+    webhook.respond = statuses(500, 500, 500)
+    with pytest.raises(WebhookError, match="3 attempts, HTTP 500"):
+        client.send({"message": "Ticket"}, "ticket")
+
+    # Client errors are not retried
+    webhook.respond = statuses(400)
+    with pytest.raises(WebhookError, match="1 attempts, HTTP 400"):
+        client.send({"message": "Ticket"}, "ticket")
+
+
+def test_connection_errors_are_retried():
+    server = serve()
+    url = server.url
+    server.shutdown()
+    server.server_close()
+    delays = []
+    client = WebhookClient(url, retries=1, sleep=delays.append)
+    with pytest.raises(WebhookError, match="2 attempts"):
+        client.send({"message": "Ticket"}, "ticket")
+    assert len(delays) == 1
+
+
+def test_full_jitter():
+    assert [full_jitter(attempt, rng=lambda: 1.0) for attempt in range(6)] == [
+        0.1,
+        0.2,
+        0.4,
+        0.8,
+        1.6,
+        2.0,
+    ]
+    assert full_jitter(3, rng=lambda: 0.5) == 0.4
+
+
+class TicketTable:
+    def __init__(self) -> None:
+        self.messages = []
+
+    def put_message(self, message: TicketMessage) -> None:
+        self.messages.append(message)
+
+
+def test_priority_channel(webhook, monkeypatch):
+    monkeypatch.setenv("WEBHOOK_URL", webhook.url)
+    monkeypatch.setenv("WEBHOOK_RETRIES", "0")
+    get_webhook_client.cache_clear()
+    table = TicketTable()
+    monkeypatch.setattr(priority_channel, "get_ticket_table", lambda: table)
+    # The receiver rejects one ticket
+    webhook.respond = lambda ticket: 422 if ticket["message"] == "Ticket 3" else 200
+
+    messages = [ticket_message("1234", index, tier="gold") for index in range(10)]
+    event = sqs_event(*messages)
+    response = priority_channel.lambda_handler(event, LambdaContext())
+    get_webhook_client.cache_clear()
+
+    assert response == {
+        "batchItemFailures": [{"itemIdentifier": event["Records"][3]["messageId"]}]
+    }
+    assert len(table.messages) == 10
+    assert webhook.connections <= priority_channel.config.max_concurrency
+    ticket = next(t for t in webhook.tickets if t["message"] == "Ticket 1")
+    assert ticket == {
+        "id": messages[1]["request_id"],
+        "user_id": "1234",
+        "email": "user@example.com",
+        "tier": "gold",
+        "type": "finance",
+        "subject": "",
+        "message": "Ticket 1",
+        "created_at": "2025-01-01T00:00:01.000+00:00",
+    }
+    assert sorted(webhook.idempotency_keys) == sorted(
+        message["request_id"] for message in messages
+    )
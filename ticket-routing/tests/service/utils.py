@@ -0,0 +1,143 @@
+"""
+Shared test helpers of the ticket pipeline: Lambda contexts, the messages and
+events of the pipeline, and the ticket table
+"""
+
+import json
+import uuid
+from typing import Dict, Optional
+
+from service.handlers import tickets
+from service.storage.ticket_cache import get_shared_ticket_cache, get_ticket_cache
+from service.storage.ticket_table import get_ticket_table
+
+TABLE_NAME = "tickets"
+# 2025-01-01T00:00:00Z
+EPOCH_MS = 1_735_689_600_000
+
+
+class LambdaContext:
+    function_name = "test"
+    memory_limit_in_mb = 128
+    invoked_function_arn = "arn:aws:lambda:eu-west-1:123456789012:function:test"
+    aws_request_id = "request-id"
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 10_000
+
+
+def ticket_message(user_id: str, index: int, tier: str = "general") -> dict:
+    """
+    Return the message API Gateway publishes for a new ticket
+    """
+    return {
+        "body": {
+            "type": "finance" if index % 2 else "general",
+            "message": f"Ticket {index}",
+        },
+        "auth": {"user_id": user_id, "email": "user@example.com", "tier": tier},
+        "request_time_epoch": str(EPOCH_MS + index * 1000),
+        "request_id": str(uuid.UUID(int=index)),
+    }
+
+
+def sns_notification(message: dict) -> dict:
+    """
+    Return the envelope SNS delivers to SQS without raw message delivery
+    """
+    return {
+        "Type": "Notification",
+        "MessageId": str(uuid.uuid4()),
+        "TopicArn": "arn:aws:sns:eu-west-1:123456789012:TicketRouting",
+        "Message": json.dumps(message),
+        "Timestamp": "2025-01-01T00:00:00.000Z",
+        "SignatureVersion": "1",
+        "Signature": "c2lnbmF0dXJl",
+        "SigningCertURL": "https://sns.eu-west-1.amazonaws.com/cert.pem",
+        "UnsubscribeURL": "https://sns.eu-west-1.amazonaws.com/?Action=Unsubscribe",
+        "MessageAttributes": {
+            "customer_tier": {"Type": "String", "Value": message["auth"]["tier"]}
+        },
+    }
+
+
+def sqs_event(*messages: dict, raw: bool = False) -> dict:
+    """
+    Return an SQS event of SNS notifications, or of the messages themselves
+    with raw message delivery
+    """
+    return {
+        "Records": [
+            {
+                "messageId": str(uuid.uuid4()),
+                "eventSource": "aws:sqs",
+                "body": json.dumps(message if raw else sns_notification(message)),
+            }
+            for message in messages
+        ]
+    }
+
+
+def api_event(user_id: str, query: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Return a GET /tickets event of API Gateway, authorized for a user
+    """
+    return {
+        "resource": "/tickets",
+        "path": "/tickets",
+        "httpMethod": "GET",
+        "headers": {},
+        "multiValueHeaders": {},
+        "queryStringParameters": query,
+        "multiValueQueryStringParameters": (
+            {name: [value] for name, value in query.items()} if query else None
+        ),
+        "requestContext": {
+            "authorizer": {"user_id": user_id, "customer_tier": "general"},
+            "httpMethod": "GET",
+            "path": "/prod/tickets",
+            "requestId": "request-id",
+            "stage": "prod",
+        },
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+
+def create_table(client) -> None:
+    client.create_table(
+        TableName=TABLE_NAME,
+        BillingMode="PAY_PER_REQUEST",
+        KeySchema=[
+            {"AttributeName": "user_id", "KeyType": "HASH"},
+            {"AttributeName": "created_id", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "user_id", "AttributeType": "S"},
+            {"AttributeName": "created_id", "AttributeType": "S"},
+            {"AttributeName": "user_type", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "type-index",
+                "KeySchema": [
+                    {"AttributeName": "user_type", "KeyType": "HASH"},
+                    {"AttributeName": "created_id", "KeyType": "RANGE"},
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": ["type", "subject", "message", "created_at"],
+                },
+            }
+        ],
+    )
+
+
+def reset_containers() -> None:
+    for cache in [get_ticket_table, get_ticket_cache, get_shared_ticket_cache]:
+        cache.cache_clear()
+
+
+def get_tickets(user_id: str, **query: str) -> dict:
+    response = tickets.lambda_handler(api_event(user_id, query), LambdaContext())
+    return {"statusCode": response["statusCode"], **json.loads(response["body"])}